@@ -0,0 +1,163 @@
+# __________________
+# Controle de admissão na frente das rotas: limita as requisições simultâneas por classe (escrita, leitura e
+# leitura em massa) dentro da capacidade do pool de conexões e enfileira o excedente, com as leituras em massa por último.
+# Quem esperaria na fila além do prazo recebe 503 com Retry-After, em vez de esperar uma conexão do pool
+# enquanto a latência cresce sem limite
+# __________________
+
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+from urllib.parse import parse_qs
+from fastapi.responses import ORJSONResponse
+from .config import settings
+from .metrics import LATENCY_BUCKETS, Counter, Histogram, format_labels
+
+# Classes de requisição. Quando uma vaga é liberada, escritas e leituras são atendidas por ordem de chegada e as
+# leituras em massa só ficam com as vagas que nenhuma delas está esperando
+CLASSES = ("write", "read", "bulk")
+
+# Rotas fora do controle: observabilidade (precisa responder justamente durante a sobrecarga), documentação
+# e o feed de eventos, que não segura conexão do banco depois de aberto
+EXEMPT_PATHS = {"/metrics", "/cache/stats", "/docs", "/docs/oauth2-redirect", "/redoc", "/openapi.json"}
+
+# Valores aceitos como verdadeiro em parâmetros bool do FastAPI
+TRUE_VALUES = {"1", "true", "on", "yes"}
+
+CLASS_LABELS = ("class",)
+
+admitted_total = Counter("admission_admitted_total", "Requisições admitidas por classe")
+rejected_total = Counter("admission_rejected_total", "Requisições rejeitadas com 503 por classe e motivo (timeout ou queue_full)")
+queue_wait = Histogram("admission_queue_wait_seconds", "Espera na fila de admissão das requisições admitidas", LATENCY_BUCKETS)
+
+# Classe da requisição ou None para as rotas fora do controle
+def request_class(scope) -> Optional[str]:
+    path, method = scope["path"], scope["method"]
+    if method == "OPTIONS" or path in EXEMPT_PATHS or path.endswith("/events"):
+        return None
+    if method not in ("GET", "HEAD"):
+        return "write"
+    stream = parse_qs(scope["query_string"].decode("latin-1")).get("stream", [""])[-1]
+    return "bulk" if stream.lower() in TRUE_VALUES else "read"
+
+# Vagas por classe dentro de uma capacidade total, com uma fila FIFO por classe. Roda no event loop
+# (sem lock): as vagas são concedidas por release/_wake antes de o aguardante voltar a executar
+class AdmissionController:
+    def __init__(self, capacity: int, limits: dict, timeouts: dict, max_queue: int):
+        self.capacity = capacity
+        self.limits = limits
+        self.timeouts = timeouts
+        self.max_queue = max_queue
+        self.active = dict.fromkeys(CLASSES, 0)
+        self.queues = {cls: deque() for cls in CLASSES}
+
+    def _has_room(self, cls: str) -> bool:
+        return sum(self.active.values()) < self.capacity and self.active[cls] < self.limits[cls]
+
+    # Ocupa uma vaga da classe; devolve False (requisição rejeitada) se a fila estiver cheia ou o prazo acabar
+    async def acquire(self, cls: str) -> bool:
+        queue = self.queues[cls]
+        if not queue and self._has_room(cls):
+            self.active[cls] += 1
+            return True
+        if len(queue) >= self.max_queue:
+            rejected_total.inc((cls, "queue_full"))
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append((time.monotonic(), waiter))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.timeouts[cls])
+        except asyncio.TimeoutError:
+            # A vaga pode ter sido concedida junto com o fim do prazo
+            if waiter.done():
+                return True
+            queue.remove(next(entry for entry in queue if entry[1] is waiter))
+            rejected_total.inc((cls, "timeout"))
+            return False
+        except asyncio.CancelledError:
+            # Cliente desconectou enquanto esperava
+            if waiter.done():
+                self.release(cls)
+            else:
+                queue.remove(next(entry for entry in queue if entry[1] is waiter))
+            raise
+        return True
+
+    def release(self, cls: str) -> None:
+        self.active[cls] -= 1
+        self._wake()
+
+    # Concede as vagas livres aos aguardantes: o mais antigo entre escritas e leituras com vaga na classe, depois as leituras em massa
+    def _wake(self) -> None:
+        while True:
+            ready = [cls for cls in ("write", "read") if self.queues[cls] and self._has_room(cls)]
+            if not ready:
+                ready = ["bulk"] if self.queues["bulk"] and self._has_room("bulk") else []
+            if not ready:
+                return
+            cls = min(ready, key=lambda cls: self.queues[cls][0][0])
+            self.active[cls] += 1
+            self.queues[cls].popleft()[1].set_result(None)
+
+    # Gauges de ocupação, fila e limite por classe, contadores e histograma de espera, em formato Prometheus
+    def render(self) -> list:
+        lines = admitted_total.render(CLASS_LABELS) + rejected_total.render(CLASS_LABELS + ("reason",)) + queue_wait.render(CLASS_LABELS)
+        gauges = {
+            "admission_active": ("Requisições em execução por classe", lambda cls: self.active[cls]),
+            "admission_queue_depth": ("Requisições aguardando vaga por classe", lambda cls: len(self.queues[cls])),
+            "admission_limit": ("Execuções simultâneas permitidas por classe", lambda cls: self.limits[cls]),
+        }
+        for name, (help_text, value) in gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for cls in CLASSES:
+                lines.append(f"{name}{{{format_labels(CLASS_LABELS, (cls,))}}} {value(cls)}")
+        lines += ["# HELP admission_capacity Execuções simultâneas permitidas no total", "# TYPE admission_capacity gauge",
+                  f"admission_capacity {self.capacity}"]
+        return lines
+
+# Middleware ASGI que passa cada requisição pelo controle de admissão; a vaga fica ocupada até o fim da resposta
+# (inclusive do corpo das respostas NDJSON, que leem do banco durante o envio)
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        cls = request_class(scope) if scope["type"] == "http" else None
+        if cls is None:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        if not await admission.acquire(cls):
+            response = ORJSONResponse(
+                {"detail": "Servidor sobrecarregado; tente novamente"},
+                status_code=503,
+                headers={"Retry-After": str(settings.admission_retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        admitted_total.inc((cls,))
+        queue_wait.observe((cls,), time.perf_counter() - started)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(cls)
+
+# Controle do processo, com os limites padrão derivados do pool de conexões
+def build_controller() -> AdmissionController:
+    capacity = settings.admission_capacity or settings.db_pool_size + max(settings.db_max_overflow, 0)
+    limits = {
+        "write": settings.admission_write_limit or capacity,
+        "read": settings.admission_read_limit or capacity,
+        "bulk": settings.admission_bulk_limit or max(1, capacity // 4),
+    }
+    timeouts = {
+        "write": settings.admission_write_queue_timeout,
+        "read": settings.admission_queue_timeout,
+        "bulk": settings.admission_queue_timeout,
+    }
+    return AdmissionController(capacity, limits, timeouts, settings.admission_max_queue)
+
+admission = build_controller()
@@ -0,0 +1,170 @@
+# __________________
+# Cache de leitura (read-through) para respostas já serializadas
+# __________________
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, Optional
+from .config import settings
+
+# Interface dos backends de cache. Um backend compartilhado entre workers (ex: Redis)
+# deve implementar os mesmos métodos (abstratos aqui); as tags permitem invalidar todas as chaves
+# que dependem de um registro (ex: todos os projetos em que um usuário aparece).
+# `since` (time.monotonic) é o instante a que correspondem os dados lidos: o set é descartado se a chave
+# ou uma das tags foi invalidada depois dele, para que uma leitura antiga (iniciada antes de uma escrita
+# ou feita em uma réplica atrasada) não volte a preencher o cache com dados já invalidados
+class CacheBackend(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), since: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete_tags(self, *tags: str) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> dict:
+        ...
+
+# Backend que não guarda nada, usado quando o cache está desativado
+class NullCache(CacheBackend):
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), since: Optional[float] = None) -> None:
+        pass
+
+    def delete(self, *keys: str) -> None:
+        pass
+
+    def delete_tags(self, *tags: str) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"enabled": False}
+
+# Cache LRU em memória do processo, limitado por quantidade de entradas, bytes e TTL.
+# Protegido por lock, pois os controladores síncronos rodam no threadpool
+class LRUCache(CacheBackend):
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # chave -> (expira_em, valor, tags)
+        self._tags = {}  # tag -> conjunto de chaves
+        self._fences = {}  # chave ou tag -> instante da última invalidação (descartado após o TTL)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: bytes, tags: Iterable[str] = (), since: Optional[float] = None) -> None:
+        if len(value) > self.max_bytes:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            if since is not None and any(self._fences.get(name, since) > since for name in (key, *tags)):
+                self.stale_fills += 1
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            self._bytes += len(value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            self._fence(keys)
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def delete_tags(self, *tags: str) -> None:
+        with self._lock:
+            self._fence(tags)
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_fills": self.stale_fills,
+            }
+
+    # Registra o instante da invalidação; marcas mais velhas que o TTL são descartadas quando elas se acumulam
+    # (chamado com o lock adquirido)
+    def _fence(self, names: Iterable[str]) -> None:
+        now = time.monotonic()
+        if len(self._fences) > self.max_entries:
+            self._fences = {name: at for name, at in self._fences.items() if at > now - self.ttl}
+        for name in names:
+            self._fences[name] = now
+
+    # Remove a entrada e suas referências nas tags (chamado com o lock adquirido)
+    def _remove(self, key: str) -> None:
+        _, value, tags = self._entries.pop(key)
+        self._bytes -= len(value)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+# Chave do detalhe de um projeto (ProjectResponse serializado)
+def project_key(project_id: int) -> str:
+    return f"project:{project_id}"
+
+# Tag das entradas que exibem dados de um usuário (dono ou membro do projeto)
+def user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+# Cache do detalhe de projetos (GET /projects/{project_id})
+project_cache: CacheBackend = (
+    LRUCache(settings.project_cache_max_entries, settings.project_cache_max_bytes, settings.project_cache_ttl)
+    if settings.project_cache_enabled else NullCache()
+)
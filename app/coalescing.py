@@ -0,0 +1,91 @@
+# __________________
+# Agrupamento de escritas (group commit): as escritas que chegam dentro de uma janela curta são aplicadas juntas,
+# em uma transação e um commit, e cada requisição recebe o próprio resultado ou erro. Escritas na mesma chave
+# nunca vão no mesmo lote nem em lotes simultâneos, então são aplicadas na ordem de chegada
+# __________________
+
+import asyncio
+import contextvars
+from collections import deque
+from .metrics import Counter, Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+COALESCER_LABELS = ("coalescer",)
+
+batches_total = Counter("write_coalescer_batches_total", "Lotes (transações) aplicados por agrupador")
+items_total = Counter("write_coalescer_items_total", "Escritas aplicadas por agrupador")
+batch_size = Histogram("write_coalescer_batch_size", "Escritas por lote", BATCH_SIZE_BUCKETS)
+
+# Agrupador de um tipo de escrita. `flush` recebe a lista de itens do lote e devolve, na mesma ordem,
+# o resultado ou a exceção de cada um; uma exceção levantada pelo próprio flush vale para o lote inteiro
+class WriteCoalescer:
+    def __init__(self, name: str, flush, window: float, max_batch: int):
+        self.name = name
+        self.flush = flush
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = deque()  # (chave, item, future) na ordem de chegada
+        self.in_flight = set()  # chaves dos lotes em execução
+        self.timer = None
+        # Tarefas dos lotes em execução: o loop só guarda referência fraca, e uma tarefa sem outra referência
+        # pode ser coletada no meio do lote
+        self._tasks = set()
+
+    # Entra no próximo lote e espera o resultado da própria escrita
+    async def submit(self, key, item):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((key, item, future))
+        self._schedule()
+        # shield: a escrita já está no lote mesmo que o cliente desista de esperar
+        return await asyncio.shield(future)
+
+    # Dispara o lote ao completar max_batch itens ou ao fim da janela contada a partir do primeiro pendente
+    def _schedule(self) -> None:
+        if len(self.pending) >= self.max_batch:
+            if self.timer is not None:
+                self.timer.cancel()
+            self._start_batch()
+        elif self.timer is None and self.pending:
+            # Contexto vazio: as consultas do lote não contam nas métricas da requisição que abriu a janela
+            self.timer = asyncio.get_running_loop().call_later(self.window, self._start_batch, context=contextvars.Context())
+
+    # Separa até max_batch itens com chaves distintas e fora dos lotes em execução; os demais esperam o próximo lote
+    def _start_batch(self) -> None:
+        self.timer = None
+        batch, keys, waiting = [], set(), deque()
+        while self.pending:
+            entry = self.pending.popleft()
+            if len(batch) < self.max_batch and entry[0] not in keys and entry[0] not in self.in_flight:
+                batch.append(entry)
+                keys.add(entry[0])
+            else:
+                waiting.append(entry)
+        self.pending = waiting
+        if batch:
+            self.in_flight |= keys
+            task = asyncio.get_running_loop().create_task(self._run(batch, keys), context=contextvars.Context())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list, keys: set) -> None:
+        try:
+            results = await self.flush([item for _, item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        finally:
+            self.in_flight -= keys
+        batches_total.inc((self.name,))
+        items_total.inc((self.name,), len(batch))
+        batch_size.observe((self.name,), len(batch))
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+        self._schedule()
+
+def render() -> list:
+    return batches_total.render(COALESCER_LABELS) + items_total.render(COALESCER_LABELS) + batch_size.render(COALESCER_LABELS)
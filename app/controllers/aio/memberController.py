@@ -0,0 +1,150 @@
+# __________________
+# Versão assíncrona (AsyncSession/asyncpg) do controlador de membros dos projetos
+# __________________
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Set
+from ...cache import project_cache, project_key
+from ...config import settings
+from ...database import chunked, upsert_insert
+from ...events import publish
+from ...models.userModels import ProjectMembers, Users, Projects
+from ...versioning import version_criteria, check_version, precondition_failed, stale_writes
+from ...views.userView import ProjectMemberCreate, ProjectMemberUpdate
+from ..fastWrites import insert_returning, update_returning, delete_returning, missing_parent
+
+# Constraints de chave estrangeira de project_users e o 404 correspondente (modo FAST_WRITES)
+MEMBER_PARENTS = {
+    "project_users_project_id_fkey": "Projeto não encontrado",
+    "project_users_user_id_fkey": "Usuário não encontrado",
+}
+
+# Adicionar um novo membro a um projeto específico
+async def add_member_to_project(project_id: int, member: ProjectMemberCreate, db: AsyncSession):
+    if settings.fast_writes:
+        try:
+            await db.execute(insert_returning(ProjectMembers, project_id=project_id, user_id=member.user_id, role=member.role))
+            publish(db, project_id, "member.added", {"user_id": member.user_id, "role": member.role})
+            await db.commit()
+        except IntegrityError as exc:
+            raise missing_parent(exc, MEMBER_PARENTS)
+        project_cache.delete(project_key(project_id))
+        return {"message": "Membro adicionado com sucesso"}
+
+    db_project = await db.scalar(select(Projects).where(Projects.id == project_id))
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+    db_user = await db.scalar(select(Users).where(Users.id == member.user_id))
+    if not db_user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    db_member = ProjectMembers(project_id=project_id, user_id=member.user_id, role=member.role)
+    db.add(db_member)
+    publish(db, project_id, "member.added", {"user_id": member.user_id, "role": member.role})
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    await db.refresh(db_member)
+    return {"message": "Membro adicionado com sucesso"}
+
+# Tornar a lista de membros do projeto igual à enviada, em uma única transação:
+# um UPSERT multi-linha (ON CONFLICT atualiza o papel) e um DELETE dos membros que não vieram na lista
+async def sync_project_members(project_id: int, members: List[ProjectMemberCreate], db: AsyncSession) -> dict:
+    if await db.scalar(select(Projects.id).where(Projects.id == project_id)) is None:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+    existing_users = set()
+    for ids in chunked({member.user_id for member in members}):
+        existing_users.update(await db.scalars(select(Users.id).where(Users.id.in_(ids))))
+    current_members = set(await db.scalars(select(ProjectMembers.user_id).where(ProjectMembers.project_id == project_id)))
+    last_index = {member.user_id: index for index, member in enumerate(members)}
+
+    results = []
+    rows = []
+    for index, member in enumerate(members):
+        if last_index[member.user_id] != index:
+            results.append({"index": index, "status": "error", "id": member.user_id, "detail": "Usuário repetido na requisição"})
+        elif member.user_id not in existing_users:
+            results.append({"index": index, "status": "error", "id": member.user_id, "detail": "Usuário não encontrado"})
+        else:
+            rows.append(dict(project_id=project_id, user_id=member.user_id, role=member.role))
+            status = "updated" if member.user_id in current_members else "created"
+            results.append({"index": index, "status": status, "id": member.user_id})
+
+    if rows:
+        stmt = upsert_insert(db, ProjectMembers)
+        # Só regrava (e incrementa a versão de) quem mudou de papel
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ProjectMembers.project_id, ProjectMembers.user_id],
+            set_={"role": stmt.excluded.role, "version": ProjectMembers.version + 1},
+            where=ProjectMembers.role.is_distinct_from(stmt.excluded.role),
+        )
+        await db.execute(stmt, rows)
+
+    removed = sorted(current_members - {row["user_id"] for row in rows})
+    for ids in chunked(removed):
+        await db.execute(delete(ProjectMembers).where(ProjectMembers.project_id == project_id, ProjectMembers.user_id.in_(ids)).execution_options(synchronize_session=False))
+
+    # Um único evento com as contagens: a lista completa pode passar do limite de payload do NOTIFY
+    created = sum(1 for result in results if result["status"] == "created")
+    publish(db, project_id, "members.synced", {"created": created, "updated": len(rows) - created, "removed": len(removed)})
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    return {"results": results, "removed": removed}
+
+# Atualizar informações de um membro existente em um projeto
+# (`expected_versions` vem do If-Match: a escrita só acontece se a versão atual do membro for uma delas)
+async def update_project_member(project_id: int, member_id: int, member: ProjectMemberUpdate, db: AsyncSession, expected_versions: Optional[Set[int]] = None):
+    if settings.fast_writes:
+        criteria = (ProjectMembers.project_id == project_id, ProjectMembers.user_id == member_id)
+        row = (await db.execute(update_returning(ProjectMembers, (*criteria, *version_criteria(ProjectMembers, expected_versions)), member.model_dump(exclude_unset=True)))).one_or_none()
+        if row is None:
+            if expected_versions is not None and await db.scalar(select(ProjectMembers.user_id).where(*criteria)) is not None:
+                raise precondition_failed()
+            raise HTTPException(status_code=404, detail="Membro não encontrado")
+        publish(db, project_id, "member.updated", {"user_id": member_id, "role": row.role})
+        await db.commit()
+        project_cache.delete(project_key(project_id))
+        return {"message": "Membro atualizado com sucesso"}
+
+    db_member = await db.scalar(select(ProjectMembers).where(ProjectMembers.project_id == project_id, ProjectMembers.user_id == member_id))
+    if not db_member:
+        raise HTTPException(status_code=404, detail="Membro não encontrado")
+    check_version(db_member.version, expected_versions)
+
+    for key, value in member.model_dump(exclude_unset=True).items():
+        setattr(db_member, key, value)
+
+    with stale_writes(expected_versions):
+        await db.flush()
+    publish(db, project_id, "member.updated", {"user_id": member_id, "role": db_member.role})
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    await db.refresh(db_member)
+    return {"message": "Membro atualizado com sucesso"}
+
+# Remover um membro existente de um projeto
+async def delete_project_member(project_id: int, member_id: int, db: AsyncSession):
+    if settings.fast_writes:
+        criteria = (ProjectMembers.project_id == project_id, ProjectMembers.user_id == member_id)
+        if (await db.execute(delete_returning(ProjectMembers, criteria))).one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Membro não encontrado")
+        publish(db, project_id, "member.removed", {"user_id": member_id})
+        await db.commit()
+        project_cache.delete(project_key(project_id))
+        return {"message": "Membro Apagado com Sucesso"}
+
+    db_member = await db.scalar(select(ProjectMembers).where(ProjectMembers.project_id == project_id, ProjectMembers.user_id == member_id))
+    if not db_member:
+        raise HTTPException(status_code=404, detail="Membro não encontrado")
+
+    await db.delete(db_member)
+    with stale_writes():
+        await db.flush()
+    publish(db, project_id, "member.removed", {"user_id": member_id})
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    return {"message": "Membro Apagado com Sucesso"}
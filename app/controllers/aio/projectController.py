@@ -0,0 +1,144 @@
+# __________________
+# Versão assíncrona (AsyncSession/asyncpg) do controlador de projetos
+# __________________
+
+import time
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.exc import IntegrityError
+from typing import Optional, Set
+from ...cache import project_cache, project_key, user_tag
+from ...config import settings
+from ...events import publish
+from ...replicas import read_staleness
+from ...serialization import project_serializer, project_item_serializer
+from ...models.userModels import Projects, ProjectMembers, Users
+from ...versioning import project_etag, project_versions_query, project_version_rows, version_criteria, check_version, precondition_failed, stale_writes
+from ...views.userView import ProjectBase, ProjectUpdate, ProjectResponse
+from ..fastWrites import insert_returning, update_returning, delete_returning, missing_parent
+
+# Obter detalhes de um projeto específico pelo ID
+async def get_project_by_id(project_id: int, db: AsyncSession) -> ProjectResponse:
+    stmt = (
+        select(Projects)
+        .options(
+            joinedload(Projects.owner),
+            joinedload(Projects.members).joinedload(ProjectMembers.user)
+        )
+        .where(Projects.id == project_id)
+    )
+    db_project = (await db.scalars(stmt)).unique().first()
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return db_project
+
+# Obter o detalhe do projeto já serializado (ProjectResponse em JSON) e sua ETag, passando pelo cache de leitura.
+# A entrada do cache guarda a ETag e o JSON separados por uma quebra de linha; o preenchimento é descartado
+# se o projeto foi invalidado depois do instante a que a leitura corresponde (início da leitura, menos o atraso da réplica)
+async def get_project_detail(project_id: int, db: AsyncSession) -> tuple:
+    key = project_key(project_id)
+    cached = project_cache.get(key)
+    if cached is not None:
+        etag, _, payload = cached.partition(b"\n")
+        return payload, etag.decode()
+
+    since = time.monotonic() - read_staleness(db)
+    db_project = await get_project_by_id(project_id, db)
+    payload = project_serializer.dump(db_project)
+    etag = project_etag(project_version_rows(db_project))
+    tags = [user_tag(db_project.owner_id)] + [user_tag(member.user_id) for member in db_project.members]
+    project_cache.set(key, etag.encode() + b"\n" + payload, tags, since=since)
+    return payload, etag
+
+# ETag do detalhe do projeto sem montar a resposta (If-None-Match): do cache ou da consulta só de versões
+async def get_project_etag(project_id: int, db: AsyncSession) -> str:
+    cached = project_cache.get(project_key(project_id))
+    if cached is not None:
+        return cached.partition(b"\n")[0].decode()
+    rows = (await db.execute(project_versions_query(project_id))).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return project_etag(rows)
+
+# Criar um novo projeto no banco de dados
+async def create_new_project(project: ProjectBase, db: AsyncSession) -> Projects:
+    if settings.fast_writes:
+        try:
+            row = (await db.execute(insert_returning(Projects, name=project.name, description=project.description, owner_id=project.owner_id))).one()
+            await db.commit()
+        except IntegrityError as exc:
+            raise missing_parent(exc, {"projects_owner_id_fkey": f"Usuário proprietário com id {project.owner_id} não encontrado"})
+        return row._asdict()
+
+    db_owner = await db.scalar(select(Users).where(Users.id == project.owner_id))
+    if not db_owner:
+        raise HTTPException(status_code=404, detail=f"Usuário proprietário com id {project.owner_id} não encontrado")
+
+    db_project = Projects(
+        name=project.name,
+        description=project.description,
+        owner_id=project.owner_id
+    )
+    db.add(db_project)
+    await db.commit()
+    await db.refresh(db_project)
+    return db_project
+
+# Atualizar informações de um projeto existente
+# `expected_versions` vem do If-Match: a escrita só acontece se a versão atual do projeto for uma delas
+async def update_existing_project(project_id: int, project_data: ProjectUpdate, db: AsyncSession, expected_versions: Optional[Set[int]] = None) -> Projects:
+    if settings.fast_writes:
+        values = {key: value for key, value in project_data.model_dump(exclude_unset=True).items() if value != 'string'}
+        criteria = (Projects.id == project_id, *version_criteria(Projects, expected_versions))
+        row = (await db.execute(update_returning(Projects, criteria, values))).one_or_none()
+        if row is None:
+            if expected_versions is not None and await db.scalar(select(Projects.id).where(Projects.id == project_id)) is not None:
+                raise precondition_failed()
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        publish(db, project_id, "project.updated", project_item_serializer.jsonable(row))
+        await db.commit()
+        project_cache.delete(project_key(project_id))
+        return row._asdict()
+
+    db_project = await db.scalar(select(Projects).where(Projects.id == project_id))
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    check_version(db_project.version, expected_versions)
+
+    for key, value in project_data.model_dump(exclude_unset=True).items():
+        # Ignora o valor padrão enviado pela documentação interativa (Swagger)
+        if value == 'string':
+            continue
+        setattr(db_project, key, value)
+
+    with stale_writes(expected_versions):
+        await db.flush()
+    publish(db, project_id, "project.updated", project_item_serializer.jsonable(db_project))
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    await db.refresh(db_project)
+    return db_project
+
+# Deletar um projeto existente do banco de dados
+async def delete_existing_project(project_id: int, db: AsyncSession) -> dict:
+    if settings.fast_writes:
+        if (await db.execute(delete_returning(Projects, (Projects.id == project_id,)))).one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        publish(db, project_id, "project.deleted", {"project_id": project_id})
+        await db.commit()
+        project_cache.delete(project_key(project_id))
+        return {"message": "Projeto Apagado com Sucesso"}
+
+    db_project = await db.scalar(select(Projects).where(Projects.id == project_id))
+    if not db_project:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+
+    await db.delete(db_project)
+    with stale_writes():
+        await db.flush()
+    publish(db, project_id, "project.deleted", {"project_id": project_id})
+    await db.commit()
+    project_cache.delete(project_key(project_id))
+    return {"message": "Projeto Apagado com Sucesso"}
@@ -0,0 +1,15 @@
+# __________________
+# Versão assíncrona (AsyncSession/asyncpg) do controlador da busca textual
+# __________________
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from ..searchQueries import search_statement
+
+# Busca ranqueada em nome e descrição de tarefas e projetos, com filtros e paginação por offset
+async def search(db: AsyncSession, q: str, project_id: Optional[int] = None, state: Optional[str] = None,
+                 assignee_id: Optional[int] = None, kind: Optional[str] = None, limit: int = 20, offset: int = 0) -> list:
+    stmt = search_statement(db.bind.dialect.name, q, project_id, state, assignee_id, kind, limit, offset)
+    if stmt is None:
+        return []
+    return (await db.execute(stmt)).all()
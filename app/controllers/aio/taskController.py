@@ -0,0 +1,280 @@
+# __________________
+# Versão assíncrona (AsyncSession/asyncpg) do controlador de tarefas dos projetos
+# __________________
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+from collections import Counter
+from typing import List, Optional, Set
+from ...config import settings
+from ...database import chunked
+from ...events import publish
+from ...models.userModels import Tasks, Projects, Users
+from ...serialization import task_serializer
+from ...versioning import list_etag, version_criteria, check_version, precondition_failed, stale_writes
+from ...views.userView import TaskBase, TaskUpdate
+from ..fastWrites import insert_returning, update_returning, update_returning_previous, update_many_returning, delete_returning, insert_task_with_counter, missing_parent
+from ..taskStats import stat_key, move_delta, stats_delta_statement
+from ..taskQueries import task_filters, tasks_page_query, tasks_count_query
+from ..taskCoalescing import TaskUpdateRequest, batch_projects, locked_tasks_query, plan_updates, collect_results
+
+# Constraints de chave estrangeira de tasks e o 404 correspondente (modo FAST_WRITES)
+TASK_PARENTS = {
+    "tasks_project_id_fkey": "Projeto não encontrado",
+    "tasks_user_id_fkey": "Usuário não encontrado",
+}
+
+# Colunas de tarefa que compõem a chave do resumo project_task_stats
+STATS_COLUMNS = {"user_id", "state"}
+
+# Consulta de tarefas ordenada por task_number, paginada por cursor sobre o índice (project_id, task_number)
+def _tasks_stmt(after_task_number: Optional[int], limit: Optional[int], *criteria):
+    stmt = select(Tasks).where(*criteria).order_by(Tasks.task_number)
+    if after_task_number is not None:
+        stmt = stmt.where(Tasks.task_number > after_task_number)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+# Obter todas as tarefas associadas a um projeto específico
+async def get_tasks_by_project(project_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None):
+    tasks = (await db.scalars(_tasks_stmt(after_task_number, limit, Tasks.project_id == project_id))).all()
+    if not tasks and after_task_number is None:
+        raise HTTPException(status_code=404, detail="Projeto sem tarefas")
+    return tasks
+
+# ETag da mesma página de tarefas a partir só de (id, version), para responder If-None-Match sem montar a resposta
+async def get_tasks_etag_by_project(project_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None) -> str:
+    rows = (await db.execute(_tasks_stmt(after_task_number, limit, Tasks.project_id == project_id).with_only_columns(Tasks.id, Tasks.version))).all()
+    if not rows and after_task_number is None:
+        raise HTTPException(status_code=404, detail="Projeto sem tarefas")
+    return list_etag(rows)
+
+# Percorrer as tarefas de um projeto com cursor no servidor
+async def stream_tasks_by_project(project_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None):
+    stmt = _tasks_stmt(after_task_number, limit, Tasks.project_id == project_id).execution_options(yield_per=settings.stream_batch_size)
+    async for task in await db.stream_scalars(stmt):
+        yield task
+
+# Obter todas as tarefas de um membro específico em um projeto
+async def get_tasks_by_member(project_id: int, member_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None):
+    tasks = (await db.scalars(_tasks_stmt(after_task_number, limit, Tasks.project_id == project_id, Tasks.user_id == member_id))).all()
+    if not tasks and after_task_number is None:
+        raise HTTPException(status_code=404, detail="No tasks for this member in this project")
+    return tasks
+
+# ETag da mesma página de tarefas do membro a partir só de (id, version)
+async def get_tasks_etag_by_member(project_id: int, member_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None) -> str:
+    rows = (await db.execute(_tasks_stmt(after_task_number, limit, Tasks.project_id == project_id, Tasks.user_id == member_id).with_only_columns(Tasks.id, Tasks.version))).all()
+    if not rows and after_task_number is None:
+        raise HTTPException(status_code=404, detail="No tasks for this member in this project")
+    return list_etag(rows)
+
+# Percorrer as tarefas de um membro em um projeto com cursor no servidor
+async def stream_tasks_by_member(project_id: int, member_id: int, db: AsyncSession, after_task_number: Optional[int] = None, limit: Optional[int] = None):
+    stmt = _tasks_stmt(after_task_number, limit, Tasks.project_id == project_id, Tasks.user_id == member_id).execution_options(yield_per=settings.stream_batch_size)
+    async for task in await db.stream_scalars(stmt):
+        yield task
+
+# Consultar tarefas de todos os projetos (GET /tasks): filtros por projeto, responsável, estado, tarefas abertas
+# e faixa de task_number, ordenadas e paginadas por cursor
+async def query_tasks(db: AsyncSession, project_id: Optional[int] = None, assignee_id: Optional[int] = None, states: Optional[List[str]] = None,
+                      is_open: Optional[bool] = None, number_min: Optional[int] = None, number_max: Optional[int] = None,
+                      sort: str = "task_number", cursor: Optional[str] = None, limit: int = 100) -> List[Tasks]:
+    criteria = task_filters(project_id, assignee_id, states, is_open, number_min, number_max)
+    return (await db.scalars(tasks_page_query(criteria, sort, cursor, limit, single_project=project_id is not None))).all()
+
+# Total das tarefas que atendem aos mesmos filtros de query_tasks
+async def count_tasks(db: AsyncSession, project_id: Optional[int] = None, assignee_id: Optional[int] = None, states: Optional[List[str]] = None,
+                      is_open: Optional[bool] = None, number_min: Optional[int] = None, number_max: Optional[int] = None) -> int:
+    return (await db.execute(tasks_count_query(project_id, assignee_id, states, is_open, number_min, number_max))).scalar_one()
+
+# Reservar um bloco de `count` números de tarefa em um projeto com um único UPDATE ... RETURNING.
+# O contador fica travado na linha do projeto até o commit, então transações concorrentes
+# recebem blocos disjuntos, sem colisões nem novas tentativas; um rollback devolve o bloco
+async def allocate_task_numbers(project_id: int, count: int, db: AsyncSession) -> range:
+    stmt = (
+        update(Projects)
+        .where(Projects.id == project_id)
+        .values(task_counter=Projects.task_counter + count)
+        .returning(Projects.task_counter)
+        .execution_options(synchronize_session=False)
+    )
+    last_number = (await db.execute(stmt)).scalar_one_or_none()
+    if last_number is None:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return range(last_number - count + 1, last_number + 1)
+
+# Aplica as variações no resumo de tarefas (project_task_stats) dentro da transação corrente
+async def apply_stats(db: AsyncSession, deltas: Counter):
+    stmt = stats_delta_statement(db, deltas)
+    if stmt is not None:
+        await db.execute(stmt)
+
+# Criar uma nova tarefa em um projeto específico
+async def create_task_for_project(project_id: int, task: TaskBase, db: AsyncSession):
+    delta = Counter({stat_key(project_id, task.user_id, task.state): 1})
+    if settings.fast_writes:
+        if db.bind.dialect.name == 'postgresql':
+            stmt = insert_task_with_counter(project_id, task)
+        else:
+            task_number = (await allocate_task_numbers(project_id, 1, db))[0]
+            stmt = insert_returning(Tasks, task_number=task_number, name=task.name, description=task.description, state=task.state, user_id=task.user_id, project_id=project_id)
+        try:
+            row = (await db.execute(stmt)).one_or_none()
+            if row is None:
+                raise HTTPException(status_code=404, detail="Projeto não encontrado")
+            await apply_stats(db, delta)
+            publish(db, project_id, "task.created", task_serializer.jsonable(row))
+            await db.commit()
+        except IntegrityError as exc:
+            raise missing_parent(exc, TASK_PARENTS)
+        return row._asdict()
+
+    new_task_number = (await allocate_task_numbers(project_id, 1, db))[0]
+
+    db_task = Tasks(task_number=new_task_number, name=task.name, description=task.description, state=task.state, user_id=task.user_id, project_id=project_id)
+    db.add(db_task)
+    await apply_stats(db, delta)
+    await db.flush()
+    publish(db, project_id, "task.created", task_serializer.jsonable(db_task))
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+# Criar várias tarefas em um projeto em uma única transação: um bloco de task_number,
+# um INSERT multi-linha (executemany com RETURNING) e um commit. Itens com usuário inexistente
+# são reportados como erro e não impedem a criação dos demais
+async def create_tasks_batch(project_id: int, tasks: List[TaskBase], db: AsyncSession) -> dict:
+    existing_users = set()
+    for ids in chunked({task.user_id for task in tasks}):
+        existing_users.update(await db.scalars(select(Users.id).where(Users.id.in_(ids))))
+
+    results = [None] * len(tasks)
+    valid = []
+    for index, task in enumerate(tasks):
+        if task.user_id in existing_users:
+            valid.append(index)
+        else:
+            results[index] = {"index": index, "status": "error", "detail": "Usuário não encontrado"}
+
+    numbers = await allocate_task_numbers(project_id, len(valid), db)
+    if valid:
+        rows = [
+            dict(task_number=number, name=tasks[index].name, description=tasks[index].description, state=tasks[index].state, user_id=tasks[index].user_id, project_id=project_id)
+            for index, number in zip(valid, numbers)
+        ]
+        created_ids = (await db.scalars(insert(Tasks).returning(Tasks.id, sort_by_parameter_order=True), rows)).all()
+        for index, number, task_id in zip(valid, numbers, created_ids):
+            results[index] = {"index": index, "status": "created", "id": task_id, "task_number": number}
+        await apply_stats(db, Counter(stat_key(project_id, tasks[index].user_id, tasks[index].state) for index in valid))
+        # Um único evento para o lote: os task_number criados são consecutivos
+        publish(db, project_id, "tasks.created", {"count": len(valid), "first_task_number": numbers[0], "last_task_number": numbers[-1]})
+
+    await db.commit()
+    return {"results": results}
+
+# Atualizar informações de uma tarefa existente
+# (`expected_versions` vem do If-Match: a escrita só acontece se a versão atual da tarefa for uma delas)
+async def update_task(project_id: int, member_id: int, task_number: int, task: TaskUpdate, db: AsyncSession, expected_versions: Optional[Set[int]] = None):
+    if settings.fast_writes:
+        key = (Tasks.project_id == project_id, Tasks.user_id == member_id, Tasks.task_number == task_number)
+        criteria = (*key, *version_criteria(Tasks, expected_versions))
+        values = task.model_dump(exclude_unset=True)
+        try:
+            if not STATS_COLUMNS & values.keys():
+                row = (await db.execute(update_returning(Tasks, criteria, values))).one_or_none()
+                delta = Counter()
+            elif db.bind.dialect.name == 'postgresql':
+                # Responsável ou estado mudam: os valores anteriores vêm no mesmo UPDATE
+                row = (await db.execute(update_returning_previous(Tasks, criteria, values, ['user_id', 'state']))).one_or_none()
+                delta = row and move_delta(stat_key(project_id, row.previous_user_id, row.previous_state), stat_key(project_id, row.user_id, row.state))
+            else:
+                previous = (await db.execute(select(Tasks.user_id, Tasks.state).where(*criteria))).one_or_none()
+                row = previous and (await db.execute(update_returning(Tasks, criteria, values))).one_or_none()
+                delta = row and move_delta(stat_key(project_id, *previous), stat_key(project_id, row.user_id, row.state))
+            if row is None:
+                if expected_versions is not None and await db.scalar(select(Tasks.id).where(*key)) is not None:
+                    raise precondition_failed()
+                raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+            await apply_stats(db, delta)
+            publish(db, project_id, "task.updated", task_serializer.jsonable(row))
+            await db.commit()
+        except IntegrityError as exc:
+            raise missing_parent(exc, TASK_PARENTS)
+        return row._asdict()
+
+    db_task = await db.scalar(select(Tasks).where(Tasks.project_id == project_id, Tasks.user_id == member_id, Tasks.task_number == task_number))
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+    check_version(db_task.version, expected_versions)
+
+    old_key = stat_key(project_id, db_task.user_id, db_task.state)
+    for key, value in task.model_dump(exclude_unset=True).items():
+        setattr(db_task, key, value)
+
+    with stale_writes(expected_versions):
+        await db.flush()
+    await apply_stats(db, move_delta(old_key, stat_key(project_id, db_task.user_id, db_task.state)))
+    publish(db, project_id, "task.updated", task_serializer.jsonable(db_task))
+    await db.commit()
+    await db.refresh(db_task)
+    return db_task
+
+# Aplicar um lote de atualizações reunidas pelo modo TASK_UPDATE_COALESCING em uma só transação: as linhas são travadas
+# por um SELECT ... FOR UPDATE, alteradas por um único UPDATE de várias linhas e confirmadas por um único commit.
+# Devolve, na ordem do lote, a linha atualizada ou a exceção (404/412) de cada atualização
+async def update_tasks_coalesced(updates: List[TaskUpdateRequest], db: AsyncSession) -> list:
+    try:
+        results, changes, previous = plan_updates(updates, (await db.execute(locked_tasks_query(updates))).all())
+        updated = (await db.execute(update_many_returning(Tasks, changes, batch_projects(updates)))).all() if changes else []
+        await apply_stats(db, collect_results(results, previous, updated))
+        for row in updated:
+            publish(db, row.project_id, "task.updated", task_serializer.jsonable(row))
+        await db.commit()
+        return results
+    except IntegrityError:
+        # Um responsável inexistente derruba o lote inteiro: cada atualização é refeita na própria transação
+        await db.rollback()
+    return [await _update_task_alone(update, db) for update in updates]
+
+# Atualização isolada de um lote que falhou, com o erro devolvido em vez de levantado
+async def _update_task_alone(update: TaskUpdateRequest, db: AsyncSession):
+    try:
+        task = await update_task(update.project_id, update.member_id, update.task_number, update.task, db, expected_versions=update.expected_versions)
+    except HTTPException as exc:
+        await db.rollback()
+        return exc
+    except IntegrityError as exc:
+        await db.rollback()
+        return missing_parent(exc, TASK_PARENTS)
+    if isinstance(task, Tasks):
+        # Fora da sessão, a tarefa não expira com o rollback de uma atualização seguinte do lote
+        db.expunge(task)
+    return task
+
+# Deletar uma tarefa existente de um projeto
+async def delete_task(project_id: int, member_id: int, task_number: int, db: AsyncSession):
+    if settings.fast_writes:
+        criteria = (Tasks.project_id == project_id, Tasks.user_id == member_id, Tasks.task_number == task_number)
+        row = (await db.execute(delete_returning(Tasks, criteria, Tasks.user_id, Tasks.state))).one_or_none()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+        await apply_stats(db, Counter({stat_key(project_id, row.user_id, row.state): -1}))
+        publish(db, project_id, "task.deleted", {"task_number": task_number, "user_id": member_id})
+        await db.commit()
+        return {'message': f"Tarefa {task_number} no projeto {project_id} deletada com sucesso!"}
+
+    db_task = await db.scalar(select(Tasks).where(Tasks.project_id == project_id, Tasks.user_id == member_id, Tasks.task_number == task_number))
+    if not db_task:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada")
+
+    await db.delete(db_task)
+    with stale_writes():
+        await db.flush()
+    await apply_stats(db, Counter({stat_key(project_id, db_task.user_id, db_task.state): -1}))
+    publish(db, project_id, "task.deleted", {"task_number": task_number, "user_id": member_id})
+    await db.commit()
+    return {'message': f"Tarefa {task_number} no projeto {project_id} deletada com sucesso!"}
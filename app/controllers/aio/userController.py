@@ -0,0 +1,108 @@
+# __________________
+# Versão assíncrona (AsyncSession/asyncpg) do controlador de usuários
+# __________________
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Set
+from ...cache import project_cache, user_tag
+from ...config import settings
+from ...models.userModels import Users
+from ...versioning import version_criteria, check_version, precondition_failed, stale_writes
+from ...views.userView import UserBase, UserUpdate
+from ..fastWrites import insert_returning, update_returning, delete_returning
+from ..taskStats import delete_user_stats_statement
+
+# Consulta de usuários ordenada pela chave primária, com paginação por cursor (keyset)
+def _users_stmt(after_id: Optional[int], limit: Optional[int]):
+    stmt = select(Users).order_by(Users.id)
+    if after_id is not None:
+        stmt = stmt.where(Users.id > after_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+# Obter todos os usuários cadastrados no banco de dados
+async def get_all_users(db: AsyncSession, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[Users]:
+    result = (await db.scalars(_users_stmt(after_id, limit))).all()
+    if not result and after_id is None:
+        raise HTTPException(status_code=404, detail="Nenhum usuário encontrado")
+    return result
+
+# Percorrer os usuários com cursor no servidor, sem carregar a tabela inteira em memória
+async def stream_users(db: AsyncSession, after_id: Optional[int] = None, limit: Optional[int] = None):
+    stmt = _users_stmt(after_id, limit).execution_options(yield_per=settings.stream_batch_size)
+    async for user in await db.stream_scalars(stmt):
+        yield user
+
+# Criar um novo usuário no banco de dados
+async def create_new_user(user: UserBase, db: AsyncSession) -> Users:
+    if settings.fast_writes:
+        row = (await db.execute(insert_returning(Users, name=user.name, email=user.email))).one()
+        await db.commit()
+        return row._asdict()
+
+    db_user = Users(name=user.name, email=user.email)
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+# Criar vários usuários com um INSERT multi-linha (executemany com RETURNING) e um único commit
+async def create_users_batch(users: List[UserBase], db: AsyncSession) -> dict:
+    rows = [dict(name=user.name, email=user.email) for user in users]
+    created_ids = (await db.scalars(insert(Users).returning(Users.id, sort_by_parameter_order=True), rows)).all() if rows else []
+    await db.commit()
+    return {"results": [{"index": index, "status": "created", "id": user_id} for index, user_id in enumerate(created_ids)]}
+
+# Atualizar informações de um usuário existente
+# `expected_versions` vem do If-Match: a escrita só acontece se a versão atual for uma delas
+async def update_existing_user(user_id: int, user_data: UserUpdate, db: AsyncSession, expected_versions: Optional[Set[int]] = None) -> Users:
+    if settings.fast_writes:
+        criteria = (Users.id == user_id, *version_criteria(Users, expected_versions))
+        row = (await db.execute(update_returning(Users, criteria, user_data.model_dump(exclude_unset=True)))).one_or_none()
+        if row is None:
+            if expected_versions is not None and await db.scalar(select(Users.id).where(Users.id == user_id)) is not None:
+                raise precondition_failed()
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        await db.commit()
+        project_cache.delete_tags(user_tag(user_id))
+        return row._asdict()
+
+    db_user = await db.scalar(select(Users).where(Users.id == user_id))
+    if not db_user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    check_version(db_user.version, expected_versions)
+
+    for key, value in user_data.model_dump(exclude_unset=True).items():
+        setattr(db_user, key, value)
+
+    with stale_writes(expected_versions):
+        await db.flush()
+    await db.commit()
+    project_cache.delete_tags(user_tag(user_id))
+    await db.refresh(db_user)
+    return db_user
+
+# Deletar um usuário existente do banco de dados
+async def delete_existing_user(user_id: int, db: AsyncSession) -> dict:
+    if settings.fast_writes:
+        if (await db.execute(delete_returning(Users, (Users.id == user_id,)))).one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        await db.execute(delete_user_stats_statement(user_id))
+        await db.commit()
+        project_cache.delete_tags(user_tag(user_id))
+        return {"message": "Usuário apagado com sucesso"}
+
+    db_user = await db.scalar(select(Users).where(Users.id == user_id))
+    if not db_user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+
+    await db.delete(db_user)
+    with stale_writes():
+        await db.flush()
+    await db.execute(delete_user_stats_statement(user_id))
+    await db.commit()
+    project_cache.delete_tags(user_tag(user_id))
+    return {"message": "Usuário apagado com sucesso"}
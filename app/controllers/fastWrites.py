@@ -0,0 +1,110 @@
+# __________________
+# Comandos de escrita em uma única ida ao banco (INSERT/UPDATE/DELETE ... RETURNING), usados
+# pelos controladores síncronos e assíncronos no modo FAST_WRITES. A existência dos registros
+# pais não é consultada antes: a violação de chave estrangeira é convertida no mesmo 404
+# __________________
+
+from fastapi import HTTPException
+from sqlalchemy import case, delete, insert, literal, select, update, Integer, String
+from sqlalchemy.exc import IntegrityError
+from typing import Optional
+from ..models.userModels import Projects, Tasks
+
+FOREIGN_KEY_VIOLATION = '23503'
+
+# INSERT que devolve a linha inserida
+def insert_returning(model, **values):
+    table = model.__table__
+    return insert(table).values(**values).returning(*table.c)
+
+# Valores do UPDATE com o incremento da coluna version (o ORM faz o mesmo via version_id_col)
+def _with_version(table, values: dict) -> dict:
+    if 'version' in table.c:
+        return {**values, 'version': table.c.version + 1}
+    return values
+
+# UPDATE que devolve a linha atualizada (sem campos a alterar, apenas lê a linha)
+def update_returning(model, criteria: tuple, values: dict):
+    table = model.__table__
+    if not values:
+        return select(*table.c).where(*criteria)
+    return update(table).where(*criteria).values(**_with_version(table, values)).returning(*table.c)
+
+# Um único UPDATE para várias linhas, cada uma com os próprios valores: `changes` mapeia o id da linha para
+# os campos a alterar, e cada coluna recebe CASE id WHEN ... THEN ... ELSE <valor atual> END. `criteria` restringe
+# ainda mais o WHERE (ex.: os projetos das linhas, para ler só as partições deles). Devolve as linhas atualizadas
+def update_many_returning(model, changes: dict, *criteria):
+    table = model.__table__
+    columns = sorted({column for values in changes.values() for column in values})
+    values = {
+        column: case({row_id: values[column] for row_id, values in changes.items() if column in values}, value=table.c.id, else_=table.c[column])
+        for column in columns
+    }
+    return update(table).where(table.c.id.in_(list(changes)), *criteria).values(**_with_version(table, values)).returning(*table.c)
+
+# UPDATE que devolve a linha atualizada e também os valores anteriores das colunas `previous`
+# (como previous_<coluna>), lidos no mesmo comando por um subselect com FOR UPDATE.
+# Só no Postgres: o SQLite não permite tabelas do FROM no RETURNING. O subselect com FOR UPDATE não repassa
+# os filtros à tabela do UPDATE, que os recebe também: no layout particionado ele lê só a partição do projeto
+def update_returning_previous(model, criteria: tuple, values: dict, previous: list):
+    table = model.__table__
+    keys = list(table.primary_key.columns)
+    old = select(*keys, *(table.c[name] for name in previous)).where(*criteria).with_for_update().subquery('previous')
+    return (
+        update(table)
+        .where(*criteria, *(key == old.c[key.name] for key in keys))
+        .values(**_with_version(table, values))
+        .returning(*table.c, *(old.c[name].label(f'previous_{name}') for name in previous))
+    )
+
+# DELETE que devolve a chave primária da linha removida (nenhuma linha = não encontrado)
+# e as colunas adicionais pedidas em `extra`
+def delete_returning(model, criteria: tuple, *extra):
+    table = model.__table__
+    return delete(table).where(*criteria).returning(*table.primary_key.columns, *extra)
+
+# No Postgres, reserva o task_number e insere a tarefa no mesmo comando:
+# WITH counter AS (UPDATE projects ... RETURNING task_counter) INSERT INTO tasks SELECT ... RETURNING *.
+# Se o projeto não existir o CTE não devolve linhas e nada é inserido
+def insert_task_with_counter(project_id: int, task):
+    projects = Projects.__table__
+    tasks = Tasks.__table__
+    counter = (
+        update(projects)
+        .where(projects.c.id == project_id)
+        .values(task_counter=projects.c.task_counter + 1)
+        .returning(projects.c.task_counter)
+        .cte('counter')
+    )
+    values = select(
+        counter.c.task_counter,
+        literal(task.name, String),
+        literal(task.description, String),
+        literal(task.state, String),
+        literal(task.user_id, Integer),
+        literal(project_id, Integer),
+    )
+    columns = ['task_number', 'name', 'description', 'state', 'user_id', 'project_id']
+    return insert(tasks).from_select(columns, values).returning(*tasks.c)
+
+# Nome da constraint de chave estrangeira violada; '' quando o driver não informa (SQLite)
+# e None quando o erro não é de chave estrangeira
+def violated_foreign_key(exc: IntegrityError) -> Optional[str]:
+    orig = exc.orig
+    if getattr(orig, 'pgcode', None) == FOREIGN_KEY_VIOLATION:
+        diag = getattr(orig, 'diag', None)  # psycopg2
+        if diag is not None:
+            return diag.constraint_name or ''
+        return getattr(orig.__cause__, 'constraint_name', None) or ''  # asyncpg
+    if 'FOREIGN KEY constraint failed' in str(orig):
+        return ''
+    return None
+
+# Converte a violação de chave estrangeira no 404 do registro pai ausente.
+# `parents` mapeia o nome da constraint para a mensagem; sem o nome, junta as mensagens possíveis
+def missing_parent(exc: IntegrityError, parents: dict) -> HTTPException:
+    constraint = violated_foreign_key(exc)
+    if constraint is None:
+        raise exc
+    detail = parents.get(constraint) or " / ".join(dict.fromkeys(parents.values()))
+    return HTTPException(status_code=404, detail=detail)
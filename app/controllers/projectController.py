@@ -2,11 +2,21 @@
 # Controlador responsável pelas operações CRUD relacionadas aos projetos
 # __________________
 
+import time
 from fastapi import HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Set
+from ..cache import project_cache, project_key, user_tag
+from ..config import settings
+from ..events import publish
+from ..replicas import read_staleness
+from ..serialization import project_serializer, project_item_serializer
 from ..models.userModels import Projects, ProjectMembers, Users # Assuming models are in userModels for now
-from ..main import ProjectBase, ProjectUpdate, ProjectResponse # Import Pydantic models
+from ..versioning import project_etag, project_versions_query, project_version_rows, version_criteria, check_version, precondition_failed, stale_writes
+from ..views.userView import ProjectBase, ProjectUpdate, ProjectResponse # Import Pydantic models
+from .fastWrites import insert_returning, update_returning, delete_returning, missing_parent
 
 # Obter detalhes de um projeto específico pelo ID
 def get_project_by_id(project_id: int, db: Session) -> ProjectResponse:
@@ -17,14 +27,51 @@ def get_project_by_id(project_id: int, db: Session) -> ProjectResponse:
             joinedload(Projects.members).joinedload(ProjectMembers.user) # Eager load relations
         )
         .filter(Projects.id == project_id)
-        .first()
+        # Sem o LIMIT de first(): o filtro por id chega à junção com project_users, que lê só a partição do projeto
+        .one_or_none()
     )
     if not db_project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
     return db_project
 
+# Obter o detalhe do projeto já serializado (ProjectResponse em JSON) e sua ETag, passando pelo cache de leitura.
+# A entrada do cache guarda a ETag e o JSON separados por uma quebra de linha; o preenchimento é descartado
+# se o projeto foi invalidado depois do instante a que a leitura corresponde (início da leitura, menos o atraso da réplica)
+def get_project_detail(project_id: int, db: Session) -> tuple:
+    key = project_key(project_id)
+    cached = project_cache.get(key)
+    if cached is not None:
+        etag, _, payload = cached.partition(b"\n")
+        return payload, etag.decode()
+
+    since = time.monotonic() - read_staleness(db)
+    db_project = get_project_by_id(project_id, db)
+    payload = project_serializer.dump(db_project)
+    etag = project_etag(project_version_rows(db_project))
+    tags = [user_tag(db_project.owner_id)] + [user_tag(member.user_id) for member in db_project.members]
+    project_cache.set(key, etag.encode() + b"\n" + payload, tags, since=since)
+    return payload, etag
+
+# ETag do detalhe do projeto sem montar a resposta (If-None-Match): do cache ou da consulta só de versões
+def get_project_etag(project_id: int, db: Session) -> str:
+    cached = project_cache.get(project_key(project_id))
+    if cached is not None:
+        return cached.partition(b"\n")[0].decode()
+    rows = db.execute(project_versions_query(project_id)).all()
+    if not rows:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return project_etag(rows)
+
 # Criar um novo projeto no banco de dados
 def create_new_project(project: ProjectBase, db: Session) -> Projects:
+    if settings.fast_writes:
+        try:
+            row = db.execute(insert_returning(Projects, name=project.name, description=project.description, owner_id=project.owner_id)).one()
+            db.commit()
+        except IntegrityError as exc:
+            raise missing_parent(exc, {"projects_owner_id_fkey": f"Usuário proprietário com id {project.owner_id} não encontrado"})
+        return row._asdict()
+
      # Add validation if owner_id exists?
     db_owner = db.query(Users).filter(Users.id == project.owner_id).first()
     if not db_owner:
@@ -43,27 +90,60 @@ def create_new_project(project: ProjectBase, db: Session) -> Projects:
     return db_project
 
 # Atualizar informações de um projeto existente
-def update_existing_project(project_id: int, project_data: ProjectUpdate, db: Session) -> Projects:
+# `expected_versions` vem do If-Match: a escrita só acontece se a versão atual do projeto for uma delas
+def update_existing_project(project_id: int, project_data: ProjectUpdate, db: Session, expected_versions: Optional[Set[int]] = None) -> Projects:
+    if settings.fast_writes:
+        values = {key: value for key, value in project_data.model_dump(exclude_unset=True).items() if value != 'string'}
+        criteria = (Projects.id == project_id, *version_criteria(Projects, expected_versions))
+        row = db.execute(update_returning(Projects, criteria, values)).one_or_none()
+        if row is None:
+            if expected_versions is not None and db.scalar(select(Projects.id).where(Projects.id == project_id)) is not None:
+                raise precondition_failed()
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        publish(db, project_id, "project.updated", project_item_serializer.jsonable(row))
+        db.commit()
+        project_cache.delete(project_key(project_id))
+        return row._asdict()
+
     db_project = db.query(Projects).filter(Projects.id == project_id).first()
     if not db_project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    check_version(db_project.version, expected_versions)
 
     update_data = project_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
-        # Add validation if owner_id is being changed?
+        # Ignora o valor padrão enviado pela documentação interativa (Swagger)
+        if value == 'string':
+            continue
         setattr(db_project, key, value)
 
+    with stale_writes(expected_versions):
+        db.flush()
+    publish(db, project_id, "project.updated", project_item_serializer.jsonable(db_project))
     db.commit()
+    project_cache.delete(project_key(project_id))
     db.refresh(db_project)
     return db_project
 
 # Deletar um projeto existente do banco de dados
 def delete_existing_project(project_id: int, db: Session) -> dict:
+    if settings.fast_writes:
+        if db.execute(delete_returning(Projects, (Projects.id == project_id,))).one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Projeto não encontrado")
+        publish(db, project_id, "project.deleted", {"project_id": project_id})
+        db.commit()
+        project_cache.delete(project_key(project_id))
+        return {"message": "Projeto Apagado com Sucesso"}
+
     db_project = db.query(Projects).filter(Projects.id == project_id).first()
     if not db_project:
         raise HTTPException(status_code=404, detail="Projeto não encontrado")
 
     # Consider deleting related members and tasks or handle constraints
     db.delete(db_project)
+    with stale_writes():
+        db.flush()
+    publish(db, project_id, "project.deleted", {"project_id": project_id})
     db.commit()
-    return {"message": "Projeto apagado com sucesso"}
\ No newline at end of file
+    project_cache.delete(project_key(project_id))
+    return {"message": "Projeto Apagado com Sucesso"}
\ No newline at end of file
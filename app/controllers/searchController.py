@@ -0,0 +1,15 @@
+# __________________
+# Controlador da busca textual em tarefas e projetos
+# __________________
+
+from sqlalchemy.orm import Session
+from typing import Optional
+from .searchQueries import search_statement
+
+# Busca ranqueada em nome e descrição de tarefas e projetos, com filtros e paginação por offset
+def search(db: Session, q: str, project_id: Optional[int] = None, state: Optional[str] = None,
+           assignee_id: Optional[int] = None, kind: Optional[str] = None, limit: int = 20, offset: int = 0) -> list:
+    stmt = search_statement(db.bind.dialect.name, q, project_id, state, assignee_id, kind, limit, offset)
+    if stmt is None:
+        return []
+    return db.execute(stmt).all()
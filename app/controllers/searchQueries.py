@@ -0,0 +1,66 @@
+# __________________
+# Consultas da busca textual (GET /search) sobre o índice criado pela migração 0005, usadas
+# pelos controladores síncronos e assíncronos: tsvector + GIN no Postgres, FTS5 no SQLite
+# __________________
+
+import re
+from typing import Optional
+from sqlalchemy import text
+from ..models.userModels import SEARCH_COLUMN, SEARCH_CONFIG
+
+# Pesos do nome e da descrição no ranking do SQLite (bm25), equivalentes aos pesos A/B do Postgres
+FTS5_WEIGHTS = "1.0, 0.4"
+
+# Converte o texto do usuário em uma consulta FTS5 segura: cada palavra entre aspas, todas obrigatórias
+def fts5_query(q: str) -> str:
+    return " ".join(f'"{word}"' for word in re.findall(r"\w+", q))
+
+# Monta a consulta ranqueada de tarefas e projetos para o dialeto da sessão.
+# Filtros de estado e responsável só se aplicam a tarefas; com eles, projetos ficam de fora.
+# Devolve None quando não há o que buscar
+def search_statement(dialect: str, q: str, project_id: Optional[int], state: Optional[str],
+                     assignee_id: Optional[int], kind: Optional[str], limit: int, offset: int):
+    params = {"q": q, "project_id": project_id, "state": state, "assignee_id": assignee_id, "limit": limit, "offset": offset}
+    if dialect == 'postgresql':
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', :q)"
+        task_source = f"FROM tasks AS t, {query} AS query WHERE t.{SEARCH_COLUMN} @@ query"
+        task_rank = f"ts_rank(t.{SEARCH_COLUMN}, query)"
+        project_source = f"FROM projects AS p, {query} AS query WHERE p.{SEARCH_COLUMN} @@ query"
+        project_rank = f"ts_rank(p.{SEARCH_COLUMN}, query)"
+        null_int, null_str = "NULL::integer", "NULL::varchar"
+    else:
+        params["q"] = fts5_query(q)
+        if not params["q"]:
+            return None
+        task_source = "FROM tasks_fts JOIN tasks AS t ON t.id = tasks_fts.rowid WHERE tasks_fts MATCH :q"
+        task_rank = f"-bm25(tasks_fts, {FTS5_WEIGHTS})"
+        project_source = "FROM projects_fts JOIN projects AS p ON p.id = projects_fts.rowid WHERE projects_fts MATCH :q"
+        project_rank = f"-bm25(projects_fts, {FTS5_WEIGHTS})"
+        null_int, null_str = "NULL", "NULL"
+
+    parts = []
+    if kind in (None, "task"):
+        filters = ""
+        if project_id is not None:
+            filters += " AND t.project_id = :project_id"
+        if state is not None:
+            filters += " AND t.state = :state"
+        if assignee_id is not None:
+            filters += " AND t.user_id = :assignee_id"
+        parts.append(
+            "SELECT 'task' AS kind, t.id AS id, t.project_id AS project_id, t.task_number AS task_number, "
+            "t.name AS name, t.description AS description, t.state AS state, t.user_id AS user_id, "
+            f"{task_rank} AS rank {task_source}{filters}"
+        )
+    if kind in (None, "project") and state is None and assignee_id is None:
+        filters = " AND p.id = :project_id" if project_id is not None else ""
+        parts.append(
+            f"SELECT 'project' AS kind, p.id AS id, p.id AS project_id, {null_int} AS task_number, "
+            f"p.name AS name, p.description AS description, {null_str} AS state, p.owner_id AS user_id, "
+            f"{project_rank} AS rank {project_source}{filters}"
+        )
+    if not parts:
+        return None
+
+    sql = " UNION ALL ".join(parts) + " ORDER BY rank DESC, kind, id LIMIT :limit OFFSET :offset"
+    return text(sql).bindparams(**{key: value for key, value in params.items() if f":{key}" in sql})
@@ -0,0 +1,30 @@
+# __________________
+# Controlador das estatísticas de projetos, lidas da tabela de resumo project_task_stats
+# __________________
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List
+from ..database import chunked
+from ..models.userModels import Projects
+from .taskStats import stats_query, build_project_stats
+
+# Estatísticas de um projeto: contagem por estado e carga de cada membro
+def get_project_stats(project_id: int, db: Session) -> dict:
+    rows = db.execute(stats_query([project_id])).all()
+    if not rows and db.get(Projects, project_id) is None:
+        raise HTTPException(status_code=404, detail="Projeto não encontrado")
+    return build_project_stats([project_id], rows)[0]
+
+# Estatísticas de vários projetos, na ordem pedida; ids inexistentes ficam de fora
+def get_projects_stats(project_ids: List[int], db: Session) -> list:
+    project_ids = list(dict.fromkeys(project_ids))
+    existing = set()
+    for chunk in chunked(project_ids):
+        existing.update(db.scalars(select(Projects.id).where(Projects.id.in_(chunk))))
+    project_ids = [project_id for project_id in project_ids if project_id in existing]
+    rows = []
+    for chunk in chunked(project_ids):
+        rows.extend(db.execute(stats_query(chunk)).all())
+    return build_project_stats(project_ids, rows)
@@ -0,0 +1,63 @@
+# __________________
+# Lotes de atualizações de tarefa do modo TASK_UPDATE_COALESCING (app/coalescing.py), usados pelos controladores
+# síncronos e assíncronos: trava as linhas do lote, separa as atualizações que falham (404 e 412) e monta o
+# resultado de cada uma a partir das linhas devolvidas pelo UPDATE de várias linhas
+# __________________
+
+from collections import Counter
+from typing import NamedTuple, Optional, Set
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+from ..models.userModels import Tasks
+from ..versioning import precondition_failed
+from ..views.userView import TaskUpdate
+from .taskStats import stat_key, move_delta
+
+# Uma atualização de tarefa (PUT /projects/{project_id}/members/{member_id}/tasks/{task_number}) à espera do lote
+class TaskUpdateRequest(NamedTuple):
+    project_id: int
+    member_id: int
+    task_number: int
+    task: TaskUpdate
+    expected_versions: Optional[Set[int]] = None
+
+    @property
+    def key(self) -> tuple:
+        return (self.project_id, self.member_id, self.task_number)
+
+# Projetos do lote: o filtro por project_id deixa o Postgres ler só as partições deles no layout particionado
+def batch_projects(updates: list):
+    return Tasks.project_id.in_(sorted({update.project_id for update in updates}))
+
+# Linhas atuais das tarefas do lote, travadas (FOR UPDATE) sempre na ordem do id para que lotes concorrentes não se bloqueiem em ciclo
+def locked_tasks_query(updates: list):
+    columns = Tasks.__table__.c
+    key = tuple_(columns.project_id, columns.user_id, columns.task_number)
+    return select(*columns).where(batch_projects(updates), key.in_([update.key for update in updates])).order_by(columns.id).with_for_update()
+
+# Resultados já conhecidos (exceção ou linha sem campos a alterar) por posição no lote,
+# campos a alterar por id de tarefa e, para cada id, a posição no lote e a linha anterior
+def plan_updates(updates: list, rows: list) -> tuple:
+    current = {(row.project_id, row.user_id, row.task_number): row for row in rows}
+    results, changes, previous = [None] * len(updates), {}, {}
+    for position, update in enumerate(updates):
+        row = current.get(update.key)
+        if row is None:
+            results[position] = HTTPException(status_code=404, detail="Tarefa não encontrada")
+        elif update.expected_versions is not None and row.version not in update.expected_versions:
+            results[position] = precondition_failed()
+        elif values := update.task.model_dump(exclude_unset=True):
+            changes[row.id] = values
+            previous[row.id] = (position, row)
+        else:
+            results[position] = row._asdict()
+    return results, changes, previous
+
+# Completa os resultados com as linhas atualizadas e soma as variações do resumo project_task_stats
+def collect_results(results: list, previous: dict, updated: list) -> Counter:
+    deltas = Counter()
+    for row in updated:
+        position, old = previous[row.id]
+        deltas.update(move_delta(stat_key(old.project_id, old.user_id, old.state), stat_key(row.project_id, row.user_id, row.state)))
+        results[position] = row._asdict()
+    return deltas
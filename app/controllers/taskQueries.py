@@ -0,0 +1,88 @@
+# __________________
+# Consultas de GET /tasks (filtros, ordenação, paginação por cursor e total), usadas pelos controladores
+# síncronos e assíncronos. Cada combinação de filtros é atendida por um índice da migração 0008 na ordem
+# pedida, sem ordenar as linhas encontradas (conferido por app/taskQueryPlans.py)
+# __________________
+
+from typing import List, Optional
+from fastapi import HTTPException
+from sqlalchemy import func, not_, or_, select, tuple_
+from ..config import settings
+from ..models.userModels import ProjectTaskStats, Tasks, NO_ASSIGNEE, NO_STATE
+
+# Ordenações aceitas: coluna principal e sentido. Nas ordenações por task_number (que se repete entre projetos)
+# o id desempata e compõe o cursor
+SORTS = {
+    "task_number": (Tasks.task_number, False),
+    "-task_number": (Tasks.task_number, True),
+    "id": (Tasks.id, False),
+    "-id": (Tasks.id, True),
+}
+
+# Critérios comuns à listagem e ao total. Tarefas abertas são as que não estão em CLOSED_TASK_STATES
+# (tarefas sem estado contam como abertas, igual às estatísticas do projeto)
+def task_filters(project_id: Optional[int] = None, assignee_id: Optional[int] = None, states: Optional[List[str]] = None,
+                 is_open: Optional[bool] = None, number_min: Optional[int] = None, number_max: Optional[int] = None) -> list:
+    criteria = []
+    if project_id is not None:
+        criteria.append(Tasks.project_id == project_id)
+    if assignee_id is not None:
+        criteria.append(Tasks.user_id == assignee_id)
+    if states:
+        criteria.append(Tasks.state.in_(states))
+    if is_open is not None:
+        closed = Tasks.state.in_(settings.closed_task_states)
+        criteria.append(or_(Tasks.state.is_(None), not_(closed)) if is_open else closed)
+    if number_min is not None:
+        criteria.append(Tasks.task_number >= number_min)
+    if number_max is not None:
+        criteria.append(Tasks.task_number <= number_max)
+    return criteria
+
+# Valores do cursor: "<id>" nas ordenações por id, "<task_number>.<id>" nas ordenações por task_number
+def parse_cursor(sort: str, cursor: str) -> tuple:
+    parts = cursor.split(".")
+    if len(parts) != (1 if sort.lstrip("-") == "id" else 2) or not all(part.isdigit() for part in parts):
+        raise HTTPException(status_code=400, detail="Cursor inválido para esta ordenação")
+    return tuple(int(part) for part in parts)
+
+# Cursor da próxima página a partir da última tarefa da página
+def task_cursor(sort: str, task) -> str:
+    if sort.lstrip("-") == "id":
+        return str(task.id)
+    return f"{task.task_number}.{task.id}"
+
+# Página de tarefas: filtros, ordenação e continuação depois do cursor (comparação de linha sobre as colunas da ordenação).
+# Dentro de um projeto task_number já é único: o desempate pelo id fica de fora para que os índices iniciados
+# por project_id (que não terminam em id) entreguem as linhas na ordem
+def tasks_page_query(criteria: list, sort: str, cursor: Optional[str], limit: int, single_project: bool = False):
+    column, descending = SORTS[sort]
+    keys = (column,) if column is Tasks.id or single_project else (column, Tasks.id)
+    query = select(Tasks).where(*criteria)
+    if cursor is not None:
+        after = parse_cursor(sort, cursor)[:len(keys)]
+        position, after = (tuple_(*keys), tuple_(*after)) if len(keys) > 1 else (keys[0], after[0])
+        query = query.where(position < after if descending else position > after)
+    return query.order_by(*(key.desc() if descending else key for key in keys)).limit(limit)
+
+# Total das tarefas que atendem aos filtros. Sem faixa de task_number, a soma sai da tabela de resumo
+# project_task_stats (uma linha por projeto, responsável e estado), sem percorrer as tarefas
+def tasks_count_query(project_id: Optional[int] = None, assignee_id: Optional[int] = None, states: Optional[List[str]] = None,
+                      is_open: Optional[bool] = None, number_min: Optional[int] = None, number_max: Optional[int] = None):
+    # No resumo, estado nulo e estado vazio ocupam a mesma linha (NO_STATE) e tarefas sem responsável usam NO_ASSIGNEE:
+    # filtros por esses valores precisam das tarefas
+    if number_min is not None or number_max is not None or (states and NO_STATE in states) or assignee_id == NO_ASSIGNEE:
+        criteria = task_filters(project_id, assignee_id, states, is_open, number_min, number_max)
+        return select(func.count()).select_from(Tasks).where(*criteria)
+
+    criteria = []
+    if project_id is not None:
+        criteria.append(ProjectTaskStats.project_id == project_id)
+    if assignee_id is not None:
+        criteria.append(ProjectTaskStats.user_id == assignee_id)
+    if states:
+        criteria.append(ProjectTaskStats.state.in_(states))
+    if is_open is not None:
+        closed = ProjectTaskStats.state.in_(settings.closed_task_states)
+        criteria.append(not_(closed) if is_open else closed)
+    return select(func.coalesce(func.sum(ProjectTaskStats.task_count), 0)).where(*criteria)
@@ -0,0 +1,91 @@
+# __________________
+# Tabela de resumo project_task_stats: contagem de tarefas por projeto, responsável e estado.
+# Os controladores de tarefas aplicam as variações na mesma transação da escrita, e as leituras
+# de GET /projects/{id}/stats dependem só do número de membros e estados, não do número de tarefas.
+# As funções montam os comandos; a execução fica com os controladores síncronos e assíncronos
+# __________________
+
+from collections import Counter
+from typing import Iterable, Optional
+from sqlalchemy import delete, func, insert, select
+from ..config import settings
+from ..database import upsert_insert
+from ..models.userModels import ProjectTaskStats, Tasks, NO_ASSIGNEE, NO_STATE
+
+# Chave da linha de resumo de uma tarefa (responsável e estado ausentes viram os valores sentinela)
+def stat_key(project_id: int, user_id: Optional[int], state: Optional[str]) -> tuple:
+    return (project_id, NO_ASSIGNEE if user_id is None else user_id, NO_STATE if state is None else state)
+
+# Variações de uma tarefa que mudou de (responsável, estado); vazio quando a chave não mudou
+def move_delta(old_key: tuple, new_key: tuple) -> Counter:
+    if old_key == new_key:
+        return Counter()
+    return Counter({old_key: -1, new_key: 1})
+
+# UPSERT que soma as variações às contagens (ON CONFLICT DO UPDATE); None se não há o que aplicar.
+# As linhas vão ordenadas pela chave para que transações concorrentes travem na mesma ordem
+def stats_delta_statement(db, deltas: Counter):
+    rows = [
+        {"project_id": project_id, "user_id": user_id, "state": state, "task_count": amount}
+        for (project_id, user_id, state), amount in sorted(deltas.items()) if amount
+    ]
+    if not rows:
+        return None
+    stmt = upsert_insert(db, ProjectTaskStats).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProjectTaskStats.project_id, ProjectTaskStats.user_id, ProjectTaskStats.state],
+        set_={"task_count": ProjectTaskStats.task_count + stmt.excluded.task_count},
+    )
+
+# Remove as linhas de um usuário apagado (as tarefas dele somem pelo ON DELETE CASCADE)
+def delete_user_stats_statement(user_id: int):
+    return delete(ProjectTaskStats).where(ProjectTaskStats.user_id == user_id)
+
+# Contagens recalculadas a partir da tabela de tarefas (todas ou só dos projetos indicados)
+def recount_query(project_ids: Optional[Iterable[int]] = None):
+    user_id = func.coalesce(Tasks.user_id, NO_ASSIGNEE)
+    state = func.coalesce(Tasks.state, NO_STATE)
+    query = select(Tasks.project_id, user_id, state, func.count()).group_by(Tasks.project_id, user_id, state)
+    if project_ids is not None:
+        query = query.where(Tasks.project_id.in_(list(project_ids)))
+    return query
+
+# Comandos que reconstroem o resumo do zero: DELETE das linhas atuais + INSERT ... SELECT da contagem
+def rebuild_statements(project_ids: Optional[Iterable[int]] = None):
+    clear = delete(ProjectTaskStats)
+    if project_ids is not None:
+        project_ids = list(project_ids)
+        clear = clear.where(ProjectTaskStats.project_id.in_(project_ids))
+    columns = ["project_id", "user_id", "state", "task_count"]
+    return clear, insert(ProjectTaskStats).from_select(columns, recount_query(project_ids))
+
+# Linhas de resumo com contagem positiva dos projetos indicados
+def stats_query(project_ids: Iterable[int]):
+    return (
+        select(ProjectTaskStats.project_id, ProjectTaskStats.user_id, ProjectTaskStats.state, ProjectTaskStats.task_count)
+        .where(ProjectTaskStats.project_id.in_(list(project_ids)), ProjectTaskStats.task_count > 0)
+    )
+
+# Agrega as linhas de resumo no formato de ProjectStats: totais por estado e carga de cada membro.
+# Tarefas abertas são as que não estão em CLOSED_TASK_STATES
+def build_project_stats(project_ids: Iterable[int], rows) -> list:
+    closed = set(settings.closed_task_states)
+    stats = {
+        project_id: {"project_id": project_id, "total": 0, "open": 0, "by_state": {}, "members": {}}
+        for project_id in project_ids
+    }
+    for project_id, user_id, state, count in rows:
+        project = stats[project_id]
+        is_open = state not in closed
+        project["total"] += count
+        project["open"] += count if is_open else 0
+        project["by_state"][state] = project["by_state"].get(state, 0) + count
+        if user_id == NO_ASSIGNEE:
+            continue
+        member = project["members"].setdefault(user_id, {"user_id": user_id, "total": 0, "open": 0, "by_state": {}})
+        member["total"] += count
+        member["open"] += count if is_open else 0
+        member["by_state"][state] = count
+    for project in stats.values():
+        project["members"] = sorted(project["members"].values(), key=lambda member: (-member["open"], member["user_id"]))
+    return list(stats.values())
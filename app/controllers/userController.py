@@ -3,45 +3,104 @@
 # __________________
 
 from fastapi import HTTPException, Depends
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Set
+from ..cache import project_cache, user_tag
+from ..config import settings
 from ..models.userModels import Users
-from ..main import UserBase, UserUpdate
+from ..versioning import version_criteria, check_version, precondition_failed, stale_writes
+from ..views.userView import UserBase, UserUpdate
+from .fastWrites import insert_returning, update_returning, delete_returning
+from .taskStats import delete_user_stats_statement
+
+# Consulta de usuários ordenada pela chave primária, com paginação por cursor (keyset)
+def _users_query(db: Session, after_id: Optional[int], limit: Optional[int]):
+    query = db.query(Users).order_by(Users.id)
+    if after_id is not None:
+        query = query.filter(Users.id > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
 
 # Obter todos os usuários cadastrados no banco de dados
-def get_all_users(db: Session) -> List[Users]:
-    result = db.query(Users).all()
-    if not result:
+def get_all_users(db: Session, after_id: Optional[int] = None, limit: Optional[int] = None) -> List[Users]:
+    result = _users_query(db, after_id, limit).all()
+    if not result and after_id is None:
         raise HTTPException(status_code=404, detail="Nenhum usuário encontrado")
     return result
 
+# Percorrer os usuários com cursor no servidor, sem carregar a tabela inteira em memória
+def stream_users(db: Session, after_id: Optional[int] = None, limit: Optional[int] = None):
+    yield from _users_query(db, after_id, limit).yield_per(settings.stream_batch_size)
+
 # Criar um novo usuário no banco de dados
 def create_new_user(user: UserBase, db: Session) -> Users:
+    if settings.fast_writes:
+        row = db.execute(insert_returning(Users, name=user.name, email=user.email)).one()
+        db.commit()
+        return row._asdict()
+
     db_user = Users(name=user.name, email=user.email)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
     return db_user
 
+# Criar vários usuários com um INSERT multi-linha (executemany com RETURNING) e um único commit
+def create_users_batch(users: List[UserBase], db: Session) -> dict:
+    rows = [dict(name=user.name, email=user.email) for user in users]
+    created_ids = db.scalars(insert(Users).returning(Users.id, sort_by_parameter_order=True), rows).all() if rows else []
+    db.commit()
+    return {"results": [{"index": index, "status": "created", "id": user_id} for index, user_id in enumerate(created_ids)]}
+
 # Atualizar informações de um usuário existente
-def update_existing_user(user_id: int, user_data: UserUpdate, db: Session) -> Users:
+# `expected_versions` vem do If-Match: a escrita só acontece se a versão atual for uma delas
+def update_existing_user(user_id: int, user_data: UserUpdate, db: Session, expected_versions: Optional[Set[int]] = None) -> Users:
+    if settings.fast_writes:
+        criteria = (Users.id == user_id, *version_criteria(Users, expected_versions))
+        row = db.execute(update_returning(Users, criteria, user_data.model_dump(exclude_unset=True))).one_or_none()
+        if row is None:
+            if expected_versions is not None and db.scalar(select(Users.id).where(Users.id == user_id)) is not None:
+                raise precondition_failed()
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        db.commit()
+        project_cache.delete_tags(user_tag(user_id))
+        return row._asdict()
+
     db_user = db.query(Users).filter(Users.id == user_id).first()
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    check_version(db_user.version, expected_versions)
 
     for key, value in user_data.model_dump(exclude_unset=True).items():
         setattr(db_user, key, value)
 
+    with stale_writes(expected_versions):
+        db.flush()
     db.commit()
+    project_cache.delete_tags(user_tag(user_id))
     db.refresh(db_user)
     return db_user
 
 # Deletar um usuário existente do banco de dados
 def delete_existing_user(user_id: int, db: Session) -> dict:
+    if settings.fast_writes:
+        if db.execute(delete_returning(Users, (Users.id == user_id,))).one_or_none() is None:
+            raise HTTPException(status_code=404, detail="Usuário não encontrado")
+        db.execute(delete_user_stats_statement(user_id))
+        db.commit()
+        project_cache.delete_tags(user_tag(user_id))
+        return {"message": "Usuário apagado com sucesso"}
+
     db_user = db.query(Users).filter(Users.id == user_id).first()
     if not db_user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
     db.delete(db_user)
+    with stale_writes():
+        db.flush()
+    db.execute(delete_user_stats_statement(user_id))
     db.commit()
+    project_cache.delete_tags(user_tag(user_id))
     return {"message": "Usuário apagado com sucesso"}
\ No newline at end of file
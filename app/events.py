@@ -0,0 +1,275 @@
+# __________________
+# Feed de mudanças por projeto (GET /projects/{project_id}/events, server-sent events).
+# Os controladores registram os eventos na sessão (publish) e eles só são entregues depois do commit;
+# o barramento em memória distribui cada evento aos assinantes do projeto, cada um com um buffer limitado,
+# e guarda um histórico curto para que clientes reconectados retomem a partir do Last-Event-ID
+# __________________
+
+import asyncio
+import itertools
+import uuid
+from collections import deque
+from typing import List, NamedTuple, Optional
+import orjson
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+from .config import settings
+
+# Canal do LISTEN/NOTIFY no backend Postgres
+EVENT_CHANNEL = "project_events"
+
+# O Postgres recusa payloads de NOTIFY com 8000 bytes ou mais (e a transação da escrita falharia junto)
+NOTIFY_PAYLOAD_LIMIT = 7999
+
+# Chave em Session.info com os eventos pendentes da transação corrente
+PENDING_KEY = "pending_events"
+
+# Intervalo de reconexão sugerido ao EventSource (campo retry do SSE), em milissegundos
+RETRY_MS = 3000
+
+# Evento de mudança em um projeto; `id` é opaco e único entre os workers
+class ChangeEvent(NamedTuple):
+    id: str
+    project_id: int
+    type: str
+    data: dict
+
+    def to_json(self) -> str:
+        return orjson.dumps(self._asdict()).decode()
+
+    # Versão compacta do evento: só os campos escalares (ids, task_number, versão, contagens), sem textos,
+    # com `truncated` para que o cliente releia o registro
+    def compact(self) -> "ChangeEvent":
+        data = {key: value for key, value in self.data.items() if value is None or isinstance(value, (bool, int, float))}
+        return self._replace(data={**data, "truncated": True})
+
+    @classmethod
+    def from_json(cls, payload: str) -> "ChangeEvent":
+        return cls(**orjson.loads(payload))
+
+    # Mensagem no formato text/event-stream
+    def sse(self) -> bytes:
+        return f"id: {self.id}\nevent: {self.type}\ndata: ".encode() + orjson.dumps(self.data) + b"\n\n"
+
+# Assinatura de um cliente: fila limitada a `max_size` eventos. Quando o cliente não acompanha,
+# a fila para de crescer e a assinatura é encerrada; o cliente reconecta e retoma pelo histórico
+class Subscription:
+    def __init__(self, project_id: int, max_size: int):
+        self.project_id = project_id
+        self.max_size = max_size
+        self.events = deque()
+        self.overflowed = False
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    # Chamado no event loop pelo barramento
+    def push(self, change: ChangeEvent) -> None:
+        if len(self.events) >= self.max_size:
+            self.overflowed = True
+        else:
+            self.events.append(change)
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._wakeup.set()
+
+    # Eventos acumulados desde a última chamada; lista vazia se nada chegou em `timeout` segundos
+    async def drain(self, timeout: float) -> List[ChangeEvent]:
+        if not self.events and not self.overflowed and not self.closed:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._wakeup.clear()
+        events = list(self.events)
+        self.events.clear()
+        return events
+
+# Interface dos backends de entrega. O backend em memória entrega no próprio processo;
+# um backend compartilhado entre workers (ex: Postgres LISTEN/NOTIFY) implementa os mesmos métodos
+class EventBackend:
+    # Chamado antes do commit, ainda dentro da transação, com os eventos pendentes
+    def before_commit(self, session: Session, events: List[ChangeEvent]) -> None:
+        pass
+
+    # Chamado depois do commit com os eventos confirmados
+    def after_commit(self, bus: "EventBus", events: List[ChangeEvent]) -> None:
+        pass
+
+    # Prepara o recebimento dos eventos (chamado no event loop antes de cada assinatura)
+    async def start(self, bus: "EventBus") -> None:
+        pass
+
+# Entrega no próprio processo: adequado a um único worker
+class MemoryBackend(EventBackend):
+    def after_commit(self, bus: "EventBus", events: List[ChangeEvent]) -> None:
+        for change in events:
+            bus.deliver(change)
+
+# Payload do NOTIFY: o evento completo, ou a versão compacta quando ele passa do limite do Postgres
+# (ex.: tarefa com descrição longa)
+def notify_payload(change: ChangeEvent) -> str:
+    payload = change.to_json()
+    if len(payload.encode()) > NOTIFY_PAYLOAD_LIMIT:
+        payload = change.compact().to_json()
+    return payload
+
+# Entrega entre workers pelo Postgres: o NOTIFY é enviado na mesma transação da escrita (descartado no
+# rollback) e cada worker mantém uma conexão asyncpg em LISTEN que repassa os eventos ao barramento local.
+# O Postgres entrega as notificações na ordem de commit, igual para todos os workers
+class PostgresBackend(EventBackend):
+    def __init__(self, database_url: str):
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self._conn = None
+        self._lock = None
+
+    def before_commit(self, session: Session, events: List[ChangeEvent]) -> None:
+        for change in events:
+            session.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENT_CHANNEL, "payload": notify_payload(change)})
+
+    async def start(self, bus: "EventBus") -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._conn is not None and not self._conn.is_closed():
+                return
+            import asyncpg
+
+            # Sem a conexão de LISTEN os assinantes deixariam de receber eventos: são encerrados para reconectar
+            def on_terminate(conn):
+                self._conn = None
+                bus.close_all()
+
+            self._conn = await asyncpg.connect(self.dsn)
+            self._conn.add_termination_listener(on_terminate)
+            await self._conn.add_listener(EVENT_CHANNEL, lambda conn, pid, channel, payload: bus.deliver(ChangeEvent.from_json(payload)))
+
+# Barramento de eventos do processo: histórico recente e assinantes por projeto
+class EventBus:
+    def __init__(self, backend: EventBackend, history_size: int, buffer_size: int):
+        self.backend = backend
+        self.history = deque(maxlen=history_size)
+        self.buffer_size = buffer_size
+        self._subscribers = {}  # project_id -> conjunto de assinaturas
+        self._loop = None
+        self._ids = itertools.count(1)
+        self._prefix = uuid.uuid4().hex[:8]
+        self.published = 0
+        self.overflows = 0
+
+    def new_id(self) -> str:
+        return f"{self._prefix}-{next(self._ids)}"
+
+    # Entrega um evento confirmado; pode ser chamado de qualquer thread (controladores síncronos rodam no threadpool)
+    def deliver(self, change: ChangeEvent) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self._deliver(change)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._deliver(change)
+        else:
+            loop.call_soon_threadsafe(self._deliver, change)
+
+    def _deliver(self, change: ChangeEvent) -> None:
+        self.history.append(change)
+        self.published += 1
+        for subscription in self._subscribers.get(change.project_id, ()):
+            subscription.push(change)
+
+    # Registra a assinatura e devolve os eventos do histórico posteriores a `last_event_id`
+    # (None quando o id não está mais no histórico e o cliente precisa recarregar o estado)
+    def subscribe(self, project_id: int, last_event_id: Optional[str]):
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(project_id, self.buffer_size)
+        self._subscribers.setdefault(project_id, set()).add(subscription)
+        if last_event_id is None:
+            return subscription, []
+        history = list(self.history)
+        for index in range(len(history) - 1, -1, -1):
+            if history[index].id == last_event_id:
+                return subscription, [change for change in history[index + 1:] if change.project_id == project_id]
+        return subscription, None
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscribers = self._subscribers.get(subscription.project_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.project_id]
+
+    def close_all(self) -> None:
+        for subscribers in self._subscribers.values():
+            for subscription in subscribers:
+                subscription.close()
+
+    # Corpo text/event-stream de uma assinatura: histórico pendente, eventos ao vivo e comentários de keepalive.
+    # Termina quando o projeto é apagado, quando o buffer do cliente estoura ou quando o backend cai
+    async def stream(self, project_id: int, last_event_id: Optional[str]):
+        await self.backend.start(self)
+        subscription, backlog = self.subscribe(project_id, last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            if backlog is None:
+                yield b"event: reset\ndata: {}\n\n"
+                backlog = []
+            for change in backlog:
+                yield change.sse()
+            while True:
+                events = await subscription.drain(settings.events_keepalive)
+                for change in events:
+                    yield change.sse()
+                    if change.type == "project.deleted":
+                        return
+                # O que coube no buffer já foi enviado; o cliente retoma o restante pelo histórico
+                if subscription.overflowed:
+                    self.overflows += 1
+                    yield b"event: overflow\ndata: {}\n\n"
+                    return
+                if subscription.closed:
+                    return
+                if not events:
+                    yield b": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "overflows": self.overflows,
+            "history": len(self.history),
+        }
+
+# Registra um evento na transação da sessão; ele é entregue só se a transação for confirmada
+def publish(db, project_id: int, type: str, data: dict) -> None:
+    db.info.setdefault(PENDING_KEY, []).append(ChangeEvent(event_bus.new_id(), project_id, type, data))
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    events = session.info.get(PENDING_KEY)
+    if events:
+        event_bus.backend.before_commit(session, events)
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    events = session.info.pop(PENDING_KEY, None)
+    if events:
+        event_bus.backend.after_commit(event_bus, events)
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session):
+    session.info.pop(PENDING_KEY, None)
+
+# Barramento do processo (EVENTS_BACKEND=memory ou postgres)
+event_bus = EventBus(
+    PostgresBackend(settings.database_url) if settings.events_backend == "postgres" else MemoryBackend(),
+    settings.events_history_size,
+    settings.events_buffer_size,
+)
@@ -1,266 +1,401 @@
 # Importações necessárias para o funcionamento do FastAPI e interação com o banco de dados
-from fastapi import FastAPI, HTTPException, Depends
-from pydantic import BaseModel
-from typing import List, Annotated, Optional
+from fastapi import FastAPI, Body, Depends, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
+from typing import List, Annotated, Literal, Union, Optional
+from contextlib import asynccontextmanager
+import inspect
 from .models.userModels import *
-from .database import engine, SessionLocal
-from sqlalchemy.orm import Session, joinedload
-from .controllers import userController, projectController, memberController, taskController
+from .views.userView import *
+from .cache import project_cache
+from .events import event_bus
+from .replicas import ReadYourWritesMiddleware, STICKY_COOKIE, is_replica_failure, read_session, replica_router, session_replica
+from .versioning import etag_matches, if_match_versions, items_etag, not_modified, version_etag
+from .controllers.taskQueries import task_cursor
+from .controllers.taskCoalescing import TaskUpdateRequest
+from .config import settings
+from .serialization import (
+    user_serializer, user_list_serializer, project_item_serializer, task_serializer, task_list_serializer,
+    search_serializer, message_serializer, batch_serializer, member_sync_serializer, stats_serializer,
+    stats_list_serializer,
+)
+from .admission import AdmissionMiddleware, admission
+from .coalescing import WriteCoalescer, render as render_coalescers
+from .metrics import MetricsMiddleware, mark_handler_done, render_metrics, render_pool_stats
+from .database import SessionLocal, AsyncSessionLocal, engine_pools, primary_engines
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Seleção dos controladores de acordo com o modo de acesso ao banco (DB_ASYNC)
+if settings.db_async:
+    from .controllers.aio import userController, projectController, memberController, taskController, searchController, statsController
+else:
+    from .controllers import userController, projectController, memberController, taskController, searchController, statsController
+
+# Ciclo de vida de cada worker. A subida não acessa o banco: engines e conexões são abertos na primeira requisição
+# que precisa deles, e o esquema é aplicado antes dos workers por `python -m app.migrate`. Na saída, os pools são fechados
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    await primary_engines.dispose()
+    await replica_router.dispose()
 
 # Inicialização do aplicativo FastAPI
-app = FastAPI()
+# As rotas de dados devolvem o JSON já serializado (app/serialization.py); as demais respostas usam o orjson
+# O controle de admissão fica por dentro das métricas, que assim também contam os 503 de sobrecarga
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+if replica_router.enabled:
+    app.add_middleware(ReadYourWritesMiddleware)
 
-# Criação das tabelas no banco de dados com base nos modelos definidos
-Base.metadata.create_all(bind=engine)
-
-# __________________
-# Modelos Pydantic para validação dos dados recebidos nas requisições
-# Garantem que os dados estejam corretos antes de serem processados
-# __________________
-
-# Modelo base para usuário
-class UserBase(BaseModel):
-    name: str
-    email: str
-
-# Modelo para criação de usuário
-class UserCreate(UserBase):
-    pass
-
-# Modelo para atualização parcial de usuário
-class UserUpdate(BaseModel):
-    name: Optional[str] = None
-    email: Optional[str] = None
-
-# Modelo de resposta para usuário
-class UserResponse(UserBase):
-    id: int
-
-    class Config:
-        from_attributes = True
-
-# Modelo base para projeto
-class ProjectBase(BaseModel):
-    name: str
-    description: Optional[str] = None
-    owner_id: int
-
-# Modelo para criação de projeto
-class ProjectCreate(ProjectBase):
-    pass
-
-# Modelo para atualização parcial de projeto
-class ProjectUpdate(BaseModel):
-    name: Optional[str] = None
-    description: Optional[str] = None
-
-# Modelo para adicionar membro ao projeto
-class ProjectMemberCreate(BaseModel):
-    user_id: int
-    role: str = "sem funcao"
-
-# Modelo para atualização parcial de membro do projeto
-class ProjectMemberUpdate(BaseModel):
-    role: Optional[str] = None
-
-# Modelo de resposta para membro do projeto
-class ProjectMemberResponse(BaseModel):
-    user: UserResponse
-    role: str
-    joined_at: datetime
-
-    class Config:
-        from_attributes = True
-
-# Modelo de resposta para projeto
-class ProjectResponse(ProjectBase):
-    id: int
-    owner: UserResponse
-    members: List[ProjectMemberResponse]
-
-    class Config:
-        from_attributes = True
-
-# Modelo base para tarefa
-class TaskBase(BaseModel):
-    name: str
-    description: str
-    state: str
-    user_id: int
-    project_id: int
-
-# Modelo para criação de tarefa
-class TaskCreate(TaskBase):
-    pass
-
-# Modelo para atualização parcial de tarefa
-class TaskUpdate(BaseModel):
-    name: Optional[str] = None
-    description: Optional[str] = None
-    state: Optional[str] = None
-    user_id: Optional[int] = None
-
-# Modelo de resposta para tarefa
-class TaskResponse(TaskBase):
-    id: int
-    user: UserResponse
-    project: ProjectResponse
-    task_number: int
-
-    class Config:
-        from_attributes = True
+# O esquema do banco é criado e atualizado pelas migrações do Alembic (python -m app.migrate ou alembic upgrade head)
 
 # Função para obter uma sessão do banco de dados
 # Utilizada para realizar operações no banco
 
-def get_db():
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
-db_dependency = Annotated[Session, Depends(get_db)]
+# Sessão assíncrona utilizada quando DB_ASYNC está ativo
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+get_db = get_async_db if settings.db_async else get_sync_db
+
+db_dependency = Annotated[Union[AsyncSession, Session], Depends(get_db)]
+
+# Sessão das rotas GET de leitura: em uma réplica (DATABASE_REPLICA_URLS) escolhida pelo roteador,
+# ou no primário sem réplicas utilizáveis e logo depois de uma escrita do mesmo cliente (cookie read_primary)
+def get_sync_read_db(request: Request):
+    db = read_session(replica_router.choose(sticky=STICKY_COOKIE in request.cookies))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    async with read_session(replica_router.choose(sticky=STICKY_COOKIE in request.cookies)) as db:
+        yield db
+
+read_db_dependency = Annotated[Union[AsyncSession, Session], Depends(get_async_read_db if settings.db_async else get_sync_read_db)]
+
+# Executa um controlador sem bloquear o event loop:
+# controladores assíncronos são aguardados, os síncronos rodam no threadpool
+async def run_controller(func, *args, **kwargs):
+    if inspect.iscoroutinefunction(func):
+        result = await func(*args, **kwargs)
+    else:
+        result = await run_in_threadpool(func, *args, **kwargs)
+    mark_handler_done()
+    return result
+
+# Executa um controlador de leitura com a sessão de read_db_dependency. Se a réplica falhar (fora do ar,
+# conexão perdida, conflito com a recuperação), ela sai do rodízio e a leitura é refeita no primário
+async def run_reader(func, *args, db, **kwargs):
+    replica = session_replica(db)
+    try:
+        return await run_controller(func, *args, db=db, **kwargs)
+    except Exception as exc:
+        if replica is None or not is_replica_failure(exc):
+            raise
+        replica_router.mark_failed(replica, exc)
+    primary = read_session(None)
+    try:
+        return await run_controller(func, *args, db=primary, **kwargs)
+    finally:
+        if settings.db_async:
+            await primary.close()
+        else:
+            await run_in_threadpool(primary.close)
+
+# Aplica um lote de atualizações de tarefa (TASK_UPDATE_COALESCING) em uma sessão própria do primário
+async def flush_task_updates(updates: list) -> list:
+    if settings.db_async:
+        async with AsyncSessionLocal() as db:
+            return await taskController.update_tasks_coalesced(updates, db)
+
+    def flush():
+        with SessionLocal() as db:
+            return taskController.update_tasks_coalesced(updates, db)
+    return await run_in_threadpool(flush)
+
+task_update_coalescer = WriteCoalescer(
+    "task_update", flush_task_updates, settings.task_update_coalesce_window_ms / 1000, settings.task_update_coalesce_max_batch
+)
+
+# Corpo das rotas em lote, limitado a max_batch_size itens
+def batch_body(model):
+    return Annotated[List[model], Body(max_length=settings.max_batch_size)]
+
+# Parâmetro `limit` das rotas paginadas por cursor
+page_limit = Annotated[Optional[int], Query(ge=1, le=settings.max_page_size)]
+
+# Cabeçalho com o cursor da próxima página quando a página atual veio cheia
+def next_cursor(items: list, limit: Optional[int], attr: str) -> Optional[dict]:
+    if limit is not None and len(items) == limit:
+        return {"X-Next-Cursor": str(getattr(items[-1], attr))}
+    return None
+
+# Cabeçalhos condicionais: If-None-Match nas leituras (304) e If-Match nas rotas PUT (412)
+if_none_match_header = Annotated[Optional[str], Header()]
+if_match_header = Annotated[Optional[str], Header()]
+
+# Cabeçalho ETag com a versão da linha devolvida por POST/PUT (objeto ORM ou dict do modo FAST_WRITES)
+def version_header(item) -> dict:
+    version = item["version"] if isinstance(item, dict) else item.version
+    return {"ETag": version_etag(version)}
+
+# Resposta NDJSON (uma linha JSON por registro) a partir de um controlador de streaming.
+# A sessão é aberta pelo próprio gerador, pois a dependência get_db é encerrada antes do envio do corpo;
+# as linhas são enviadas em blocos de stream_batch_size para manter a memória constante.
+# `replica` é a réplica da sessão da rota (None lê no primário)
+def stream_ndjson(func, serializer, *args, replica=None, **kwargs):
+    batch_size = settings.stream_batch_size
+
+    if settings.db_async:
+        async def body():
+            async with read_session(replica) as db:
+                lines = []
+                async for item in func(*args, db=db, **kwargs):
+                    lines.append(serializer.dump(item))
+                    if len(lines) >= batch_size:
+                        yield b"\n".join(lines) + b"\n"
+                        lines = []
+                if lines:
+                    yield b"\n".join(lines) + b"\n"
+    else:
+        def body():
+            with read_session(replica) as db:
+                lines = []
+                for item in func(*args, db=db, **kwargs):
+                    lines.append(serializer.dump(item))
+                    if len(lines) >= batch_size:
+                        yield b"\n".join(lines) + b"\n"
+                        lines = []
+                if lines:
+                    yield b"\n".join(lines) + b"\n"
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
 
 # __________________
 # Rotas para operações CRUD relacionadas aos usuários
 # __________________
 
-# Obter todos os usuários
+# Obter todos os usuários (paginação por cursor com after_id/limit, ou NDJSON com stream=true)
 @app.get("/users/", response_model=List[UserResponse])
-async def read_users(db: db_dependency):
-    return userController.get_all_users(db)
+async def read_users(db: read_db_dependency, after_id: Optional[int] = None, limit: page_limit = None, stream: bool = False):
+    if stream:
+        return stream_ndjson(userController.stream_users, user_serializer, replica=session_replica(db), after_id=after_id, limit=limit)
+    users = await run_reader(userController.get_all_users, db=db, after_id=after_id, limit=limit)
+    return user_list_serializer.response(users, next_cursor(users, limit, "id"))
 
 # Criar um novo usuário
 @app.post("/users/", response_model=UserResponse)
 async def create_users(user: UserCreate, db: db_dependency):
-    return userController.create_new_user(user=user, db=db)
+    db_user = await run_controller(userController.create_new_user, user=user, db=db)
+    return user_serializer.response(db_user, version_header(db_user))
+
+# Criar vários usuários em uma única transação
+@app.post("/users:batch", response_model=BatchResponse, response_model_exclude_none=True)
+async def create_users_batch(users: batch_body(UserCreate), db: db_dependency):
+    return batch_serializer.response(await run_controller(userController.create_users_batch, users=users, db=db))
 
-# Atualizar um usuário existente
+# Atualizar um usuário existente (com If-Match, só se a versão atual for a informada)
 @app.put("/users/{user_id}", response_model=UserResponse)
-async def update_users(user_id: int, user_data: UserUpdate, db: db_dependency):
-    return userController.update_existing_user(user_id=user_id, user_data=user_data, db=db)
+async def update_users(user_id: int, user_data: UserUpdate, db: db_dependency, if_match: if_match_header = None):
+    db_user = await run_controller(userController.update_existing_user, user_id=user_id, user_data=user_data, db=db, expected_versions=if_match_versions(if_match))
+    return user_serializer.response(db_user, version_header(db_user))
 
 # Deletar um usuário existente
-@app.delete("/users/{user_id}", response_model=dict)
+@app.delete("/users/{user_id}", response_model=MessageResponse)
 async def delete_user(user_id: int, db: db_dependency):
-    return userController.delete_existing_user(user_id=user_id, db=db)
+    return message_serializer.response(await run_controller(userController.delete_existing_user, user_id=user_id, db=db))
 
 # __________________
 # Rotas para operações CRUD relacionadas aos projetos
 # __________________
 
-# Obter detalhes de um projeto específico
-@app.get("/projects/{project_id}")
-async def read_projects(project_id: int, db: db_dependency):
-    db_project = (
-        db.query(Projects)
-        .options(
-            joinedload(Projects.owner),
-            joinedload(Projects.members).joinedload(ProjectMembers.user)
-        )
-        .filter(Projects.id == project_id)
-        .first()
-    )
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    return db_project
+# Obter detalhes de um projeto específico (servido do cache quando disponível).
+# Com If-None-Match, a ETag é conferida pela consulta só de versões e a resposta é 304 se nada mudou
+@app.get("/projects/{project_id}", response_model=ProjectResponse)
+async def read_projects(project_id: int, db: read_db_dependency, if_none_match: if_none_match_header = None):
+    if if_none_match is not None:
+        etag = await run_reader(projectController.get_project_etag, project_id=project_id, db=db)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    payload, etag = await run_reader(projectController.get_project_detail, project_id=project_id, db=db)
+    return Response(content=payload, media_type="application/json", headers={"ETag": etag})
 
 # Criar um novo projeto
-@app.post("/projects/")
+@app.post("/projects/", response_model=ProjectItem)
 async def create_projects(project: ProjectBase, db: db_dependency):
-    db_project = Projects(
-        name=project.name,
-        description=project.description,
-        owner_id=project.owner_id
-    )
-    db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
-    return db_project
-
-# Atualizar um projeto existente
-@app.put("/projects/{project_id}")
-async def update_project(project_id: int, project_data: ProjectUpdate, db: db_dependency):
-    db_project = db.query(Projects).filter(Projects.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    for key, value in project_data.model_dump(exclude_unset=True).items():
-        if value == 'string':
-            continue
-        setattr(db_project, key, value)
-    
-    db.commit()
-    db.refresh(db_project)
-    return db_project
+    db_project = await run_controller(projectController.create_new_project, project=project, db=db)
+    return project_item_serializer.response(db_project, version_header(db_project))
+
+# Atualizar um projeto existente (If-Match aceita a ETag do PUT/POST ou a do GET /projects/{project_id})
+@app.put("/projects/{project_id}", response_model=ProjectItem)
+async def update_project(project_id: int, project_data: ProjectUpdate, db: db_dependency, if_match: if_match_header = None):
+    db_project = await run_controller(projectController.update_existing_project, project_id=project_id, project_data=project_data, db=db, expected_versions=if_match_versions(if_match))
+    return project_item_serializer.response(db_project, version_header(db_project))
 
 # Deletar um projeto existente
-@app.delete("/projects/{project_id}")
+@app.delete("/projects/{project_id}", response_model=MessageResponse)
 async def delete_project(project_id: int, db: db_dependency):
-    db_project = db.query(Projects).filter(Projects.id == project_id).first()
-    if not db_project:
-        raise HTTPException(status_code=404, detail="Projeto não encontrado")
-    
-    db.delete(db_project)
-    db.commit()
-    return {"message": "Projeto Apagado com Sucesso"}
+    return message_serializer.response(await run_controller(projectController.delete_existing_project, project_id=project_id, db=db))
+
+# Estatísticas do projeto (tarefas por estado e carga de cada membro), lidas da tabela de resumo
+@app.get("/projects/{project_id}/stats", response_model=ProjectStats)
+async def read_project_stats(project_id: int, db: read_db_dependency):
+    return stats_serializer.response(await run_reader(statsController.get_project_stats, project_id=project_id, db=db))
+
+# Estatísticas de vários projetos em uma chamada (?project_id=1&project_id=2); ids inexistentes são omitidos
+@app.get("/projects:stats", response_model=List[ProjectStats])
+async def read_projects_stats(db: read_db_dependency, project_id: Annotated[List[int], Query(min_length=1, max_length=settings.max_batch_size)]):
+    return stats_list_serializer.response(await run_reader(statsController.get_projects_stats, project_ids=project_id, db=db))
+
+# Feed de mudanças do projeto (server-sent events): tarefas, membros e o próprio projeto.
+# Clientes reconectados enviam Last-Event-ID e recebem os eventos perdidos que ainda estão no histórico
+# (ou um evento `reset` para recarregar o estado). A sessão do banco só é usada para checar o projeto
+@app.get("/projects/{project_id}/events", response_class=StreamingResponse)
+async def project_events(project_id: int, db: db_dependency, last_event_id: Annotated[Optional[str], Header()] = None):
+    await run_controller(projectController.get_project_detail, project_id=project_id, db=db)
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(event_bus.stream(project_id, last_event_id), media_type="text/event-stream", headers=headers)
 
 # __________________
 # Rotas para operações CRUD relacionadas aos membros dos projetos
 # __________________
 
 # Adicionar membro ao projeto
-@app.post("/projects/{project_id}/members/", response_model=dict)
+@app.post("/projects/{project_id}/members/", response_model=MessageResponse)
 async def add_member(project_id: int, member: ProjectMemberCreate, db: db_dependency):
-    return memberController.add_member_to_project(project_id=project_id, member=member, db=db)
+    return message_serializer.response(await run_controller(memberController.add_member_to_project, project_id=project_id, member=member, db=db))
+
+# Sincronizar a lista de membros do projeto (adiciona, atualiza o papel e remove os ausentes)
+@app.put("/projects/{project_id}/members:sync", response_model=MemberSyncResponse, response_model_exclude_none=True)
+async def sync_members(project_id: int, members: batch_body(ProjectMemberCreate), db: db_dependency):
+    return member_sync_serializer.response(await run_controller(memberController.sync_project_members, project_id=project_id, members=members, db=db))
 
-# Atualizar um membro do projeto
-@app.put("/projects/{project_id}/members/{member_id}", response_model=dict)
-async def update_member(project_id: int, member_id: int, member: ProjectMemberUpdate, db: db_dependency):
-    return memberController.update_project_member(project_id=project_id, member_id=member_id, member=member, db=db)
+# Atualizar um membro do projeto (If-Match com a versão do membro, campo `version` em GET /projects/{project_id})
+@app.put("/projects/{project_id}/members/{member_id}", response_model=MessageResponse)
+async def update_member(project_id: int, member_id: int, member: ProjectMemberUpdate, db: db_dependency, if_match: if_match_header = None):
+    return message_serializer.response(await run_controller(memberController.update_project_member, project_id=project_id, member_id=member_id, member=member, db=db, expected_versions=if_match_versions(if_match)))
 
 # Deletar um membro do projeto
-@app.delete("/projects/{project_id}/members/{member_id}", response_model=dict)
+@app.delete("/projects/{project_id}/members/{member_id}", response_model=MessageResponse)
 async def delete_member(project_id: int, member_id: int, db: db_dependency):
-    db_member = db.query(ProjectMembers).filter(ProjectMembers.project_id == project_id, ProjectMembers.user_id == member_id).first()
-    if not db_member:
-        raise HTTPException(status_code=404, detail="Membro não encontrado")
-    
-    db.delete(db_member)
-    db.commit()
-    return {"message": "Membro Apagado com Sucesso"}
+    return message_serializer.response(await run_controller(memberController.delete_project_member, project_id=project_id, member_id=member_id, db=db))
 
 # __________________
 # Rotas para operações CRUD relacionadas às tarefas dos projetos
 # __________________
 
-# Obter todas as tarefas de um projeto
-@app.get("/projects/{project_id}/tasks/")
-async def read_tasks(project_id: int, db: db_dependency):
-    return taskController.get_tasks_by_project(project_id, db)
+# Obter todas as tarefas de um projeto (paginação por cursor com after_task_number/limit, ou NDJSON com stream=true)
+# A página tem ETag (id e versão de cada tarefa); If-None-Match é conferido só com essas colunas
+@app.get("/projects/{project_id}/tasks/", response_model=List[TaskItem])
+async def read_tasks(project_id: int, db: read_db_dependency, after_task_number: Optional[int] = None, limit: page_limit = None, stream: bool = False,
+                     if_none_match: if_none_match_header = None):
+    if stream:
+        return stream_ndjson(taskController.stream_tasks_by_project, task_serializer, project_id, replica=session_replica(db), after_task_number=after_task_number, limit=limit)
+    if if_none_match is not None:
+        etag = await run_reader(taskController.get_tasks_etag_by_project, project_id, db=db, after_task_number=after_task_number, limit=limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    tasks = await run_reader(taskController.get_tasks_by_project, project_id, db=db, after_task_number=after_task_number, limit=limit)
+    return task_list_serializer.response(tasks, {"ETag": items_etag(tasks), **(next_cursor(tasks, limit, "task_number") or {})})
 
 # Criar uma nova tarefa em um projeto
-@app.post("/projects/{project_id}/tasks/")
+@app.post("/projects/{project_id}/tasks/", response_model=TaskItem)
 async def create_task(project_id: int, task: TaskBase, db: db_dependency):
-    return taskController.create_task_for_project(project_id, task, db)
-
-# Atualizar uma tarefa de um membro em um projeto
-@app.put("/projects/{project_id}/members/{member_id}/tasks/{task_number}")
-async def update_task(project_id: int, member_id: int, task_number: int, task: TaskUpdate, db: db_dependency):
-    return taskController.update_task(project_id, member_id, task_number, task, db)
+    db_task = await run_controller(taskController.create_task_for_project, project_id, task, db)
+    return task_serializer.response(db_task, version_header(db_task))
+
+# Criar várias tarefas em um projeto em uma única transação
+@app.post("/projects/{project_id}/tasks:batch", response_model=BatchResponse, response_model_exclude_none=True)
+async def create_tasks_batch(project_id: int, tasks: batch_body(TaskBase), db: db_dependency):
+    return batch_serializer.response(await run_controller(taskController.create_tasks_batch, project_id, tasks, db))
+
+# Atualizar uma tarefa de um membro em um projeto (com If-Match, só se a versão atual for a informada).
+# Com TASK_UPDATE_COALESCING, a atualização entra no lote da janela corrente em vez de fazer a própria transação
+@app.put("/projects/{project_id}/members/{member_id}/tasks/{task_number}", response_model=TaskItem)
+async def update_task(project_id: int, member_id: int, task_number: int, task: TaskUpdate, db: db_dependency, if_match: if_match_header = None):
+    if settings.task_update_coalescing:
+        update = TaskUpdateRequest(project_id, member_id, task_number, task, if_match_versions(if_match))
+        db_task = await task_update_coalescer.submit(update.key, update)
+        mark_handler_done()
+    else:
+        db_task = await run_controller(taskController.update_task, project_id, member_id, task_number, task, db, expected_versions=if_match_versions(if_match))
+    return task_serializer.response(db_task, version_header(db_task))
 
 # Deletar uma tarefa de um membro em um projeto
-@app.delete("/projects/{project_id}/members/{member_id}/tasks/{task_number}")
+@app.delete("/projects/{project_id}/members/{member_id}/tasks/{task_number}", response_model=MessageResponse)
 async def delete_task(project_id: int, member_id: int, task_number: int, db: db_dependency):
-    return taskController.delete_task(project_id, member_id, task_number, db)
+    return message_serializer.response(await run_controller(taskController.delete_task, project_id, member_id, task_number, db))
+
+# Obter todas as tarefas de um membro específico em um projeto (mesma paginação/streaming de read_tasks)
+@app.get("/projects/{project_id}/members/{member_id}/tasks/", response_model=List[TaskItem])
+async def read_tasks_per_member(project_id: int, member_id: int, db: read_db_dependency, after_task_number: Optional[int] = None, limit: page_limit = None,
+                                stream: bool = False, if_none_match: if_none_match_header = None):
+    if stream:
+        return stream_ndjson(taskController.stream_tasks_by_member, task_serializer, project_id, member_id, replica=session_replica(db), after_task_number=after_task_number, limit=limit)
+    if if_none_match is not None:
+        etag = await run_reader(taskController.get_tasks_etag_by_member, project_id, member_id, db=db, after_task_number=after_task_number, limit=limit)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    tasks = await run_reader(taskController.get_tasks_by_member, project_id, member_id, db=db, after_task_number=after_task_number, limit=limit)
+    return task_list_serializer.response(tasks, {"ETag": items_etag(tasks), **(next_cursor(tasks, limit, "task_number") or {})})
+
+# Consultar tarefas de todos os projetos: filtros por projeto, responsável, estado (repetível: ?state=a&state=b),
+# tarefas abertas (open=true, estados fora de CLOSED_TASK_STATES) e faixa de task_number; ordenação por task_number ou id.
+# A próxima página é pedida com cursor igual ao X-Next-Cursor; com count=true o total vai em X-Total-Count
+@app.get("/tasks", response_model=List[TaskItem])
+async def query_tasks(db: read_db_dependency, project_id: Optional[int] = None, assignee_id: Optional[int] = None,
+                      state: Annotated[Optional[List[str]], Query()] = None, is_open: Annotated[Optional[bool], Query(alias="open")] = None,
+                      task_number_min: Annotated[Optional[int], Query(ge=1)] = None, task_number_max: Annotated[Optional[int], Query(ge=1)] = None,
+                      sort: Literal["task_number", "-task_number", "id", "-id"] = "task_number", cursor: Optional[str] = None,
+                      limit: Annotated[int, Query(ge=1, le=settings.max_page_size)] = 100, count: bool = False):
+    filters = dict(project_id=project_id, assignee_id=assignee_id, states=state, is_open=is_open, number_min=task_number_min, number_max=task_number_max)
+    tasks = await run_reader(taskController.query_tasks, db=db, sort=sort, cursor=cursor, limit=limit, **filters)
+    headers = {"X-Next-Cursor": task_cursor(sort, tasks[-1])} if len(tasks) == limit else {}
+    if count:
+        headers["X-Total-Count"] = str(await run_reader(taskController.count_tasks, db=db, **filters))
+    return task_list_serializer.response(tasks, headers)
 
-# Obter todas as tarefas de um membro específico em um projeto
-@app.get("/projects/{project_id}/members/{member_id}/tasks/")
-async def read_tasks_per_member(project_id: int, member_id: int, db: db_dependency):
-    result = db.query(Tasks).filter(Tasks.project_id == project_id, Tasks.user_id == member_id).all()
+# __________________
+# Busca textual
+# __________________
 
-    if not result:
-        raise HTTPException(status_code=404, detail="No tasks for this member in this project")
-    
-    return result
+# Buscar tarefas e projetos por palavras do nome e da descrição, ordenados por relevância.
+# Filtros opcionais por projeto, estado e responsável (estes dois só retornam tarefas);
+# a próxima página é pedida com offset igual ao X-Next-Cursor da resposta
+@app.get("/search", response_model=List[SearchHit])
+async def search(db: read_db_dependency, q: Annotated[str, Query(min_length=1)], project_id: Optional[int] = None, state: Optional[str] = None,
+                 assignee_id: Optional[int] = None, kind: Optional[Literal["task", "project"]] = None,
+                 limit: Annotated[int, Query(ge=1, le=settings.max_page_size)] = 20, offset: Annotated[int, Query(ge=0)] = 0):
+    hits = await run_reader(searchController.search, q=q, db=db, project_id=project_id, state=state, assignee_id=assignee_id, kind=kind, limit=limit, offset=offset)
+    headers = {"X-Next-Cursor": str(offset + limit)} if len(hits) == limit else None
+    return search_serializer.response(hits, headers)
+
+# __________________
+# Rotas de observabilidade
+# __________________
+
+# Contadores do cache de projetos (acertos, falhas, remoções por tamanho/TTL e invalidações)
+@app.get("/cache/stats")
+async def read_cache_stats():
+    return {"project": project_cache.stats()}
+
+# Métricas por rota (consultas, tempo de banco, serialização e latência), dos pools de conexões, das réplicas,
+# do controle de admissão e do agrupamento de escritas em formato Prometheus
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    cache_lines = [f'cache_{key}{{cache="project"}} {int(value)}' for key, value in project_cache.stats().items()]
+    event_lines = [f'events_{key} {value}' for key, value in event_bus.stats().items()]
+    return render_metrics(render_pool_stats(engine_pools() | replica_router.pools()) + cache_lines + event_lines + replica_router.render() + admission.render() + render_coalescers())
@@ -0,0 +1,205 @@
+# __________________
+# Instrumentação por requisição: quantidade de consultas SQL, tempo de banco,
+# tempo de serialização e latência total, expostos em formato texto do Prometheus
+# __________________
+
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+
+# Erro lançado no modo QUERY_BUDGET_MODE=raise quando uma rota passa do orçamento de consultas
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+# Estatísticas acumuladas durante uma requisição
+class RequestStats:
+    __slots__ = ("queries", "db_time", "handler_done")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.handler_done = None
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+# Histograma com buckets cumulativos, rotulado por rota
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series = {}  # labels -> [contagens por bucket, soma, total]
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self, label_names: tuple):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                base = format_labels(label_names, labels)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{base},le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{base}}} {total}")
+                lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+# Contador monotônico, rotulado
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self, label_names: tuple):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{{{format_labels(label_names, labels)}}} {value}")
+        return lines
+
+def format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+
+ROUTE_LABELS = ("method", "route")
+POOL_LABELS = ("engine",)
+
+requests_total = Counter("http_requests_total", "Requisições atendidas por rota e status")
+request_latency = Histogram("http_request_duration_seconds", "Latência total da requisição", LATENCY_BUCKETS)
+db_time = Histogram("db_time_seconds", "Tempo gasto em consultas SQL por requisição", LATENCY_BUCKETS)
+serialization_time = Histogram("serialization_time_seconds", "Tempo entre o retorno do controlador e o início da resposta", LATENCY_BUCKETS)
+query_count = Histogram("db_queries_per_request", "Consultas SQL emitidas por requisição", QUERY_COUNT_BUCKETS)
+pool_checkout_wait = Histogram("db_pool_checkout_wait_seconds", "Espera para obter uma conexão do pool (inclui abrir conexões novas)", LATENCY_BUCKETS)
+pool_timeouts = Counter("db_pool_timeouts_total", "Checkouts que esgotaram o pool_timeout")
+
+# Registra os hooks de execução do SQLAlchemy em um engine síncrono
+# (para o engine assíncrono, passar async_engine.sync_engine)
+def instrument_engine(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        if stats is None:
+            return
+        stats.queries += 1
+        if settings.query_budget is not None and stats.queries > settings.query_budget and settings.query_budget_mode == "raise":
+            raise QueryBudgetExceeded(f"Orçamento de {settings.query_budget} consultas excedido: {statement}")
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request.get()
+        started = getattr(context, "_metrics_started", None)
+        if stats is not None and started is not None:
+            stats.db_time += time.perf_counter() - started
+
+# Subclasse da classe de pool que mede a espera de cada checkout, rotulada pelo engine ("sync"/"async")
+def timed_pool(pool_class, label: str):
+    labels = (label,)
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                pool_timeouts.inc(labels)
+                raise
+            finally:
+                pool_checkout_wait.observe(labels, time.perf_counter() - started)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+# Ocupação atual de cada pool (gauges); `pools` mapeia o rótulo do engine para o pool
+def render_pool_stats(pools: dict):
+    gauges = {
+        "db_pool_size": ("Conexões permanentes do pool (pool_size)", lambda pool: pool.size()),
+        "db_pool_capacity": ("Conexões máximas do pool (pool_size + max_overflow)", lambda pool: pool.size() + max(pool._max_overflow, 0)),
+        "db_pool_checked_out": ("Conexões emprestadas no momento", lambda pool: pool.checkedout()),
+        "db_pool_idle": ("Conexões ociosas no pool", lambda pool: pool.checkedin()),
+    }
+    lines = []
+    for name, (help_text, value) in gauges.items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for label, pool in pools.items():
+            lines.append(f"{name}{{{format_labels(POOL_LABELS, (label,))}}} {value(pool)}")
+    return lines
+
+# Marca o fim do controlador; o restante até o início da resposta é contado como serialização
+def mark_handler_done():
+    stats = current_request.get()
+    if stats is not None:
+        stats.handler_done = time.perf_counter()
+
+# Middleware ASGI que abre as estatísticas da requisição e registra as métricas ao final
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        response_started = None
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal response_started, status
+            if message["type"] == "http.response.start":
+                response_started = time.perf_counter()
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = scope.get("route")
+            labels = (scope["method"], route.path if route is not None else "unmatched")
+            requests_total.inc(labels + (status,))
+            request_latency.observe(labels, time.perf_counter() - started)
+            db_time.observe(labels, stats.db_time)
+            query_count.observe(labels, stats.queries)
+            if stats.handler_done is not None and response_started is not None:
+                serialization_time.observe(labels, max(0.0, response_started - stats.handler_done))
+            if settings.query_budget is not None and stats.queries > settings.query_budget:
+                logger.warning("Rota %s %s emitiu %d consultas (orçamento: %d)", labels[0], labels[1], stats.queries, settings.query_budget)
+
+# Conteúdo do endpoint /metrics; `extra` recebe linhas adicionais (ex: contadores do cache)
+def render_metrics(extra=()):
+    lines = requests_total.render(ROUTE_LABELS + ("status",))
+    for histogram in (request_latency, db_time, serialization_time, query_count):
+        lines += histogram.render(ROUTE_LABELS)
+    lines += pool_checkout_wait.render(POOL_LABELS)
+    lines += pool_timeouts.render(POOL_LABELS)
+    lines += list(extra)
+    return "\n".join(lines) + "\n"
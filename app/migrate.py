@@ -0,0 +1,102 @@
+# __________________
+# Aplicação das migrações antes da subida dos workers, uma vez por implantação (o app não altera o esquema ao subir):
+#   python -m app.migrate && uvicorn app.main:app --workers 16
+# No Postgres, um advisory lock serializa execuções simultâneas (vários contêineres subindo juntos): a primeira
+# aplica as migrações e as demais esperam por ela e encontram o banco já na última revisão, sem alterá-lo.
+#
+# Uso:
+#   python -m app.migrate            # alembic upgrade head, sob o advisory lock
+#   python -m app.migrate --check    # só confere se o banco está na última revisão (sai com código 1 se não estiver)
+# __________________
+
+import argparse
+import os
+import sys
+import time
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, pool, text
+from sqlalchemy.engine import Connection
+from .config import settings
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Chave do advisory lock das migrações, a mesma em todos os processos
+MIGRATION_LOCK_KEY = 7_130_001
+
+# Intervalo entre as tentativas de obter o lock, em segundos
+LOCK_POLL_INTERVAL = 0.5
+
+# Configuração do Alembic do repositório, independente do diretório atual
+def alembic_config() -> Config:
+    config = Config(os.path.join(ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "migrations"))
+    return config
+
+# Revisões aplicadas no banco e últimas revisões das migrações
+def revisions(conn: Connection, config: Config) -> tuple:
+    current = set(MigrationContext.configure(conn).get_current_heads())
+    heads = set(ScriptDirectory.from_config(config).get_heads())
+    return current, heads
+
+# Espera pelo advisory lock das migrações em uma conexão em autocommit. A espera é feita com tentativas, sem um
+# comando bloqueado no servidor: um comando em espera segura um snapshot, e o CREATE INDEX CONCURRENTLY das
+# migrações de quem tem o lock esperaria por ele (deadlock)
+def acquire_lock(lock_conn: Connection) -> None:
+    while not lock_conn.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY}).scalar():
+        time.sleep(LOCK_POLL_INTERVAL)
+
+# Leva o banco à última revisão; devolve as revisões de antes e de depois
+def migrate() -> tuple:
+    config = alembic_config()
+    engine = create_engine(settings.database_url, poolclass=pool.NullPool)
+    try:
+        with engine.connect() as conn:
+            before, heads = revisions(conn, config)
+            conn.rollback()
+            if before == heads:
+                return before, heads
+            lock_conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT") if conn.dialect.name == 'postgresql' else None
+            try:
+                if lock_conn is not None:
+                    acquire_lock(lock_conn)
+                    # Quem esperou pelo lock encontra o banco já migrado por outro processo
+                    before = revisions(conn, config)[0]
+                    conn.rollback()
+                # migrations/env.py usa esta conexão em vez de abrir outra
+                config.attributes["connection"] = conn
+                command.upgrade(config, "head")
+                conn.commit()
+                return before, revisions(conn, config)[0]
+            finally:
+                if lock_conn is not None:
+                    # Fechar a conexão também libera o lock, inclusive se a tentativa for interrompida
+                    lock_conn.close()
+    finally:
+        engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as migrações do Alembic (upgrade head) uma vez, antes dos workers")
+    parser.add_argument("--check", action="store_true", help="só confere se o banco está na última revisão")
+    args = parser.parse_args()
+
+    if args.check:
+        engine = create_engine(settings.database_url, poolclass=pool.NullPool)
+        with engine.connect() as conn:
+            current, heads = revisions(conn, alembic_config())
+        engine.dispose()
+        print(f"banco em {', '.join(sorted(current)) or 'nenhuma revisão'}; última revisão {', '.join(sorted(heads))}")
+        if current != heads:
+            sys.exit(1)
+        return
+
+    before, after = migrate()
+    if before == after:
+        print(f"banco já na última revisão ({', '.join(sorted(after))})")
+    else:
+        print(f"banco migrado de {', '.join(sorted(before)) or 'nenhuma revisão'} para {', '.join(sorted(after))}")
+
+if __name__ == "__main__":
+    main()
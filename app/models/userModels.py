@@ -2,43 +2,76 @@
 # Modelos SQLAlchemy que representam as tabelas do banco de dados
 # __________________
 
-from sqlalchemy import UniqueConstraint, Column, ForeignKey, Integer, String, DateTime
+from sqlalchemy import UniqueConstraint, Index, Column, ForeignKey, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from ..database import Base, engine
+from ..database import Base
+
+# Plano de índices: apenas os que servem às consultas dos controladores (chaves primárias,
+# colunas de chave estrangeira usadas pelo ON DELETE CASCADE e as buscas de tarefas).
+# Colunas de texto livre (nome, descrição) não são indexadas; o esquema é versionado em migrations/
+
+# Índice de busca textual sobre nome e descrição de tarefas e projetos (migração 0005): coluna tsvector
+# gerada + GIN no Postgres, tabelas FTS5 (<tabela>_fts) no SQLite. É específico de cada banco, por isso
+# fica fora dos modelos e o autogenerate do Alembic ignora esses objetos (migrations/env.py)
+SEARCH_COLUMN = 'search_vector'
+SEARCH_CONFIG = 'simple'
+SEARCH_TABLES = ('tasks_fts', 'projects_fts')
+
+# Versão de cada linha (coluna version), incrementada pelo ORM a cada UPDATE (version_id_col, que também
+# confere a versão lida no WHERE) e pelos UPDATEs diretos de app/controllers/fastWrites.py.
+# Alimenta as ETags das respostas e o If-Match das rotas PUT (app/versioning.py)
+def version_column():
+    return Column(Integer, nullable=False, server_default='1')
 
 # Modelo que representa a tabela de usuários
 class Users(Base):
     __tablename__ = 'users'
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    email = Column(String, index=True, nullable=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    email = Column(String, nullable=True)
+    version = version_column()
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relacionamentos com outras tabelas
-    owned_projects = relationship("Projects", back_populates="owner", cascade="all, delete-orphan")
-    projects_memberships = relationship("ProjectMembers", back_populates="user", cascade="all, delete-orphan")
-    user_tasks = relationship("Tasks", back_populates="assigned_user", cascade="all, delete-orphan")
+    # passive_deletes: a remoção dos filhos é feita pelo banco (ON DELETE CASCADE), sem carregá-los na sessão
+    owned_projects = relationship("Projects", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    projects_memberships = relationship("ProjectMembers", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    user_tasks = relationship("Tasks", back_populates="assigned_user", cascade="all, delete-orphan", passive_deletes=True)
 
 # Modelo que representa a tabela de projetos
 class Projects(Base):
     __tablename__ = 'projects'
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    description = Column(String, index=True)
-    owner_id = Column(Integer, ForeignKey('users.id'))
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+    description = Column(String)
+    owner_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), index=True)
+    # Último task_number entregue neste projeto; incrementado atomicamente (UPDATE ... RETURNING) a cada nova tarefa
+    task_counter = Column(Integer, nullable=False, default=0, server_default='0')
+    # A reserva de task_number (UPDATE de task_counter) não altera a versão: o contador não faz parte das respostas
+    version = version_column()
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relacionamentos com outras tabelas
     owner = relationship("Users", back_populates="owned_projects")
-    members = relationship("ProjectMembers", back_populates="project", cascade="all, delete-orphan")
-    tasks = relationship("Tasks", back_populates="project", cascade="all, delete-orphan")
+    # Membros em ordem de user_id: a mesma ordem da consulta de versões que calcula a ETag do detalhe
+    members = relationship("ProjectMembers", back_populates="project", cascade="all, delete-orphan", passive_deletes=True,
+                           order_by="ProjectMembers.user_id")
+    tasks = relationship("Tasks", back_populates="project", cascade="all, delete-orphan", passive_deletes=True)
 
 # Modelo que representa a tabela de membros dos projetos
 class ProjectMembers(Base):
     __tablename__ = 'project_users'
-    project_id = Column(Integer, ForeignKey('projects.id'), primary_key=True)
-    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
-    joined_at = Column(DateTime, default=datetime.now(timezone.utc), index=True)
-    role = Column(String, default="sem funcao", index=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True, index=True)
+    # Data em UTC sem fuso (coluna TIMESTAMP WITHOUT TIME ZONE), calculada a cada inserção
+    joined_at = Column(DateTime, default=lambda: datetime.now(timezone.utc).replace(tzinfo=None))
+    role = Column(String, default="sem funcao")
+    version = version_column()
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relacionamentos com outras tabelas
     project = relationship("Projects", back_populates="members")
@@ -47,20 +80,52 @@ class ProjectMembers(Base):
 # Modelo que representa a tabela de tarefas
 class Tasks(Base):
     __tablename__ = 'tasks'
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     task_number = Column(Integer, nullable=False)
-    project_id = Column(Integer, ForeignKey('projects.id'), index=True)
-    user_id = Column(Integer, ForeignKey('users.id'), index=True)
-    name = Column(String, index=True)
-    description = Column(String, index=True)
-    state = Column(String, index=True)
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    name = Column(String)
+    description = Column(String)
+    state = Column(String)
+    version = version_column()
+
+    # Para o ORM a linha é identificada por (id, project_id): os UPDATE/DELETE/refresh por chave levam project_id
+    # e, no layout particionado (app/partitionTables.py), leem uma única partição
+    __mapper_args__ = {"version_id_col": version, "primary_key": [id, project_id]}
 
-    # Restrição única para garantir que cada tarefa tenha um número único dentro do mesmo projeto
     __table_args__ = (
+        # Restrição única para garantir que cada tarefa tenha um número único dentro do mesmo projeto;
+        # também atende a listagem por projeto ordenada por task_number
         UniqueConstraint('project_id', 'task_number', name='uq_project_task_number'),
+        # Busca de update_task/delete_task e listagem das tarefas de um membro no projeto
+        Index('ix_tasks_project_user_number', 'project_id', 'user_id', 'task_number'),
+        # GET /tasks: tarefas de um responsável em todos os projetos (também usado pelo ON DELETE CASCADE de users),
+        # de um estado em todos os projetos e de um estado em um projeto, já na ordem de (task_number, id)
+        Index('ix_tasks_user_number', 'user_id', 'task_number', 'id'),
+        Index('ix_tasks_state_number', 'state', 'task_number', 'id'),
+        Index('ix_tasks_project_state_number', 'project_id', 'state', 'task_number'),
     )
 
     # Relacionamentos com outras tabelas
     project = relationship("Projects", back_populates="tasks")
     assigned_user = relationship("Users", back_populates="user_tasks")
 
+# Valores usados no resumo de tarefas para tarefas sem responsável ou sem estado (colunas da chave primária)
+NO_ASSIGNEE = 0
+NO_STATE = ''
+
+# Modelo que representa o resumo de tarefas por projeto, responsável e estado (GET /projects/{id}/stats).
+# Mantido pelos controladores de tarefas na mesma transação da escrita; reconstruído por app/reconcileStats.py.
+# user_id não tem chave estrangeira (NO_ASSIGNEE não é um usuário): ao apagar um usuário suas linhas são removidas
+# pelo controlador de usuários
+class ProjectTaskStats(Base):
+    __tablename__ = 'project_task_stats'
+    project_id = Column(Integer, ForeignKey('projects.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, primary_key=True)
+    state = Column(String, primary_key=True)
+    task_count = Column(Integer, nullable=False, default=0, server_default='0')
+
+    __table_args__ = (
+        # Totais de GET /tasks por responsável e remoção das linhas de um usuário apagado
+        Index('ix_project_task_stats_user_state', 'user_id', 'state'),
+    )
@@ -0,0 +1,160 @@
+# __________________
+# Layout particionado (só Postgres): reconstrói tasks e project_users como tabelas particionadas por hash de project_id.
+# As consultas dos controladores filtram por project_id e leem uma única partição (conferido por
+# benchmarks/partition_plans.py); vacuum, manutenção de índices e a remoção em cascata de um projeto trabalham
+# só na partição dele, em vez da tabela inteira.
+#
+# A conversão roda em uma única transação, com as tabelas travadas: copia as linhas para a nova tabela ainda sem
+# índices, remove a antiga e recria com os mesmos nomes as restrições, os índices e os triggers lidos do catálogo.
+# Chaves primárias e únicas ganham project_id, exigência do Postgres para tabelas particionadas; --revert volta
+# ao layout das migrações, com as chaves dos modelos. Permissões (GRANT) das tabelas não são copiadas.
+#
+# Uso (janela de manutenção: leituras e escritas nas tabelas ficam bloqueadas durante a cópia):
+#   python -m app.partitionTables --partitions 16     # particiona tasks e project_users em 16 partições cada
+#   python -m app.partitionTables --status            # partições atuais de cada tabela (0 = tabela comum)
+#   python -m app.partitionTables --revert            # volta às tabelas comuns
+# __________________
+
+import argparse
+import sys
+import time
+from sqlalchemy import Table, UniqueConstraint, text
+from sqlalchemy.engine import Connection
+from .database import get_engine
+from .models.userModels import ProjectMembers, Tasks
+
+PARTITION_KEY = 'project_id'
+PARTITIONED_TABLES = (Tasks.__table__, ProjectMembers.__table__)
+
+# Nome de uma partição criada por este módulo (<tabela>_p<n>)
+def is_partition(name: str) -> bool:
+    parent, _, remainder = name.rpartition('_p')
+    return remainder.isdigit() and parent in {table.name for table in PARTITIONED_TABLES}
+
+# Partições atuais de cada tabela: 0 quando é uma tabela comum
+def partition_layout(conn: Connection) -> dict:
+    rows = conn.execute(text(
+        "SELECT c.relname, c.relkind, (SELECT count(*) FROM pg_inherits i WHERE i.inhparent = c.oid) FROM pg_class c "
+        "WHERE c.relname = ANY(:names) AND c.relnamespace = CAST(current_schema() AS regnamespace)"
+    ), {"names": [table.name for table in PARTITIONED_TABLES]})
+    return {name: count if kind == 'p' else 0 for name, kind, count in rows}
+
+# Colunas de uma chave primária ou única no novo layout: com partições, a chave de partição entra no fim;
+# sem partições, as colunas da restrição no modelo (as do catálogo se o modelo não a declara)
+def key_columns(table: Table, name: str, contype: str, columns: list, partitions: int) -> list:
+    if partitions:
+        return columns if PARTITION_KEY in columns else columns + [PARTITION_KEY]
+    if contype == 'p':
+        return [column.name for column in table.primary_key.columns]
+    for constraint in table.constraints:
+        if isinstance(constraint, UniqueConstraint) and constraint.name == name:
+            return [column.name for column in constraint.columns]
+    return columns
+
+# Restrições, índices, triggers, colunas copiáveis e sequências da tabela atual, lidos do catálogo
+def table_definition(conn: Connection, table: Table) -> dict:
+    params = {"table": table.name}
+    referencing = conn.scalars(text("SELECT conname FROM pg_constraint WHERE confrelid = CAST(:table AS regclass)"), params).all()
+    if referencing:
+        raise RuntimeError(f"{table.name} é referenciada por {', '.join(referencing)}: remova essas chaves estrangeiras antes")
+    constraints = conn.execute(text(
+        "SELECT conname, contype, pg_get_constraintdef(oid), "
+        "ARRAY(SELECT a.attname FROM unnest(conkey) WITH ORDINALITY AS k(attnum, position) "
+        "JOIN pg_attribute a ON a.attrelid = conrelid AND a.attnum = k.attnum ORDER BY k.position) "
+        "FROM pg_constraint WHERE conrelid = CAST(:table AS regclass) AND contype IN ('p', 'u', 'f', 'c') "
+        "ORDER BY contype IN ('f', 'c'), conname"
+    ), params).all()
+    indexes = conn.scalars(text(
+        "SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i WHERE i.indrelid = CAST(:table AS regclass) "
+        "AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid) "
+        "ORDER BY i.indexrelid"
+    ), params).all()
+    triggers = conn.scalars(text(
+        "SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = CAST(:table AS regclass) AND NOT tgisinternal AND tgparentid = 0"
+    ), params).all()
+    columns = conn.execute(text(
+        "SELECT attname, pg_get_serial_sequence(:table, attname) FROM pg_attribute "
+        "WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped AND attgenerated = '' ORDER BY attnum"
+    ), params).all()
+    return {
+        "constraints": constraints,
+        "indexes": indexes,
+        "triggers": triggers,
+        "columns": [name for name, _ in columns],
+        "sequences": {name: sequence for name, sequence in columns if sequence},
+    }
+
+# Reconstrói a tabela com `partitions` partições por hash de project_id (0 = tabela comum) na transação de `conn`
+def rebuild_table(conn: Connection, table: Table, partitions: int) -> dict:
+    name, new = table.name, f"{table.name}_rebuild"
+    started = time.perf_counter()
+    conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+    definition = table_definition(conn, table)
+
+    partition_by = f" PARTITION BY HASH ({PARTITION_KEY})" if partitions else ""
+    conn.execute(text(f"CREATE TABLE {new} (LIKE {name} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS){partition_by}"))
+    for remainder in range(partitions):
+        conn.execute(text(f"CREATE TABLE {new}_p{remainder} PARTITION OF {new} FOR VALUES WITH (MODULUS {partitions}, REMAINDER {remainder})"))
+
+    # Cópia antes dos índices: cada índice é construído uma vez sobre os dados, sem manutenção linha a linha.
+    # Em ordem de chave primária, as linhas ficam na ordem de inserção do layout comum, da qual o planejador depende
+    columns = ", ".join(definition["columns"])
+    order = ", ".join(column.name for column in table.primary_key.columns)
+    rows = conn.execute(text(f"INSERT INTO {new} ({columns}) SELECT {columns} FROM {name} ORDER BY {order}")).rowcount
+    for column, sequence in definition["sequences"].items():
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {new}.{column}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    conn.execute(text(f"ALTER TABLE {new} RENAME TO {name}"))
+    for remainder in range(partitions):
+        conn.execute(text(f"ALTER TABLE {new}_p{remainder} RENAME TO {name}_p{remainder}"))
+
+    for constraint, contype, definition_sql, key in definition["constraints"]:
+        if contype in ('p', 'u'):
+            kind = "PRIMARY KEY" if contype == 'p' else "UNIQUE"
+            definition_sql = f"{kind} ({', '.join(key_columns(table, constraint, contype, list(key), partitions))})"
+        conn.execute(text(f"ALTER TABLE {name} ADD CONSTRAINT {constraint} {definition_sql}"))
+    for index in definition["indexes"]:
+        # Índices de uma tabela particionada aparecem como "ON ONLY <tabela>" no catálogo
+        conn.execute(text(index.replace(" ON ONLY ", " ON ", 1)))
+    for trigger in definition["triggers"]:
+        conn.execute(text(trigger))
+    return {"table": name, "partitions": partitions, "rows": rows, "seconds": round(time.perf_counter() - started, 2)}
+
+# Converte tasks e project_users para `partitions` partições (0 = tabelas comuns) em uma transação
+def convert(partitions: int) -> list:
+    engine = get_engine()
+    if engine.dialect.name != 'postgresql':
+        raise RuntimeError("O layout particionado só existe no Postgres")
+    with engine.begin() as conn:
+        report = [rebuild_table(conn, table, partitions) for table in PARTITIONED_TABLES]
+    # Estatísticas e mapa de visibilidade das novas tabelas (sem ele o planejador evita os index-only scans)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in PARTITIONED_TABLES:
+            conn.execute(text(f"VACUUM ANALYZE {table.name}"))
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Particiona tasks e project_users por hash de project_id (Postgres)")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--partitions", type=int, help="quantidade de partições de cada tabela")
+    group.add_argument("--revert", action="store_true", help="volta às tabelas comuns")
+    group.add_argument("--status", action="store_true", help="só mostra as partições atuais")
+    args = parser.parse_args()
+
+    if args.status:
+        with get_engine().connect() as conn:
+            for table, partitions in partition_layout(conn).items():
+                print(f"{table}: {partitions or 'sem'} partições")
+        return
+    if args.partitions is not None and args.partitions < 2:
+        parser.error("--partitions precisa ser pelo menos 2")
+    try:
+        report = convert(0 if args.revert else args.partitions)
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        sys.exit(1)
+    for entry in report:
+        print(f"{entry['table']}: {entry['rows']} linhas em {entry['partitions'] or 'nenhuma'} partição(ões), {entry['seconds']}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# __________________
+# Reconciliação da tabela de resumo project_task_stats: recalcula as contagens a partir de tasks,
+# informa as diferenças encontradas e reconstrói o resumo em uma única transação.
+#
+# Uso:
+#   python -m app.reconcileStats                      # reconstrói todos os projetos
+#   python -m app.reconcileStats --project-id 1 2     # só os projetos indicados
+#   python -m app.reconcileStats --check              # só informa as diferenças (sai com código 1 se houver)
+# __________________
+
+import argparse
+import sys
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from .database import SessionLocal
+from .models.userModels import ProjectTaskStats
+from .controllers.taskStats import recount_query, rebuild_statements
+
+# Diferenças entre o resumo atual e a recontagem: {(projeto, responsável, estado): (atual, esperado)}
+def find_drift(db: Session, project_ids: Optional[List[int]] = None) -> dict:
+    current_query = select(ProjectTaskStats.project_id, ProjectTaskStats.user_id, ProjectTaskStats.state, ProjectTaskStats.task_count)
+    if project_ids is not None:
+        current_query = current_query.where(ProjectTaskStats.project_id.in_(project_ids))
+    current = {(project_id, user_id, state): count for project_id, user_id, state, count in db.execute(current_query)}
+    expected = {(project_id, user_id, state): count for project_id, user_id, state, count in db.execute(recount_query(project_ids))}
+    return {
+        key: (current.get(key, 0), expected.get(key, 0))
+        for key in current.keys() | expected.keys()
+        if current.get(key, 0) != expected.get(key, 0)
+    }
+
+# Reconstrói o resumo (todo ou dos projetos indicados) e devolve as diferenças corrigidas
+def reconcile(db: Session, project_ids: Optional[List[int]] = None, check_only: bool = False) -> dict:
+    drift = find_drift(db, project_ids)
+    if not check_only:
+        for stmt in rebuild_statements(project_ids):
+            db.execute(stmt)
+        db.commit()
+    return drift
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrói a tabela de resumo project_task_stats a partir de tasks")
+    parser.add_argument("--project-id", type=int, nargs="+", help="reconcilia só estes projetos")
+    parser.add_argument("--check", action="store_true", help="só informa as diferenças, sem alterar o banco")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        drift = reconcile(db, args.project_id, check_only=args.check)
+    for (project_id, user_id, state), (current, expected) in sorted(drift.items()):
+        print(f"projeto {project_id}, responsável {user_id}, estado {state!r}: {current} -> {expected}")
+    print(f"{len(drift)} diferença(s) {'encontrada(s)' if args.check else 'corrigida(s)'}")
+    if args.check and drift:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
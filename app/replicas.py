@@ -0,0 +1,214 @@
+# __________________
+# Roteamento das leituras para réplicas do banco (DATABASE_REPLICA_URLS).
+# As rotas GET de leitura abrem a sessão em uma réplica utilizável escolhida em rodízio; uma thread mede a saúde
+# e o atraso de cada réplica. A leitura fica no primário quando não há réplica utilizável e durante a janela de
+# leitura das próprias escritas (cookie devolvido pelas escritas), e é refeita no primário se a réplica falhar
+# __________________
+
+import itertools
+import math
+import threading
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, SQLAlchemyError
+from .config import settings
+from .database import SessionLocal, AsyncSessionLocal, LazyEngines
+from .metrics import Counter, format_labels
+
+# Cookie que mantém as leituras do cliente no primário logo depois de uma escrita
+STICKY_COOKIE = "read_primary"
+
+# Chave em Session.info com a réplica em que a sessão foi aberta (None no primário)
+REPLICA_KEY = "replica"
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Atraso da réplica em segundos. É 0 em um banco que não é standby e em um standby que recebe o WAL por streaming
+# e já aplicou tudo o que recebeu (com o primário ocioso, o horário da última transação aplicada envelhece sem atraso real);
+# fica NULL (réplica não utilizável) quando o standby ainda não aplicou nenhuma transação
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+        "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+        "AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') THEN 0 "
+        "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+    ),
+}
+
+REPLICA_LABELS = ("replica",)
+READ_LABELS = ("target", "reason")
+
+reads_total = Counter("db_reads_total", "Sessões de leitura por destino (réplica ou primário) e motivo")
+
+# Uma réplica: engines próprios, criados no primeiro uso (pools rotulados com o nome da réplica nas métricas),
+# e o último estado medido
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engines = LazyEngines(url, name, settings.replica_connect_timeout)
+        self.lag_query = text(LAG_QUERIES.get(make_url(url).get_backend_name(), "SELECT 0"))
+        self.healthy = False
+        self.lag = None
+        self.checked_at = None
+        self.failures = 0
+        self.error = None
+
+    @property
+    def engine(self):
+        return self.engines.get("sync")
+
+    # Engine assíncrono da réplica (None fora do modo assíncrono)
+    @property
+    def async_engine(self):
+        return self.engines.get("async") if settings.db_async else None
+
+    # Saudável, com atraso dentro do limite e medida recente (uma medição travada não mantém a réplica no rodízio)
+    def usable(self) -> bool:
+        if not self.healthy or self.lag is None or self.lag > settings.replica_max_lag:
+            return False
+        max_age = 3 * settings.replica_check_interval + settings.replica_connect_timeout
+        return time.monotonic() - self.checked_at <= max_age
+
+    # Mede saúde e atraso com o engine síncrono (executado pela thread de monitoramento)
+    def check(self) -> None:
+        try:
+            with self.engine.connect() as conn:
+                lag = conn.execute(self.lag_query).scalar()
+        except (SQLAlchemyError, OSError) as exc:
+            self.healthy, self.lag, self.error = False, None, str(exc).splitlines()[0]
+        else:
+            self.healthy, self.lag, self.error = True, None if lag is None else float(lag), None
+        self.checked_at = time.monotonic()
+
+    def mark_failed(self, exc: Exception) -> None:
+        self.healthy = False
+        self.failures += 1
+        self.error = str(exc).splitlines()[0]
+
+# Escolha da réplica de cada leitura: rodízio entre as utilizáveis, primário como alternativa
+class ReplicaRouter:
+    def __init__(self, urls):
+        self.replicas = [Replica(f"replica{index}", url) for index, url in enumerate(urls)]
+        self._turn = itertools.count()
+        self._monitor = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    # Quanto uma leitura na réplica pode estar atrasada: atraso máximo aceito mais o intervalo entre medições.
+    # É também a duração da janela de leitura das próprias escritas
+    def staleness_window(self) -> float:
+        return settings.replica_max_lag + settings.replica_check_interval
+
+    # Réplica para a próxima leitura, ou None para ler no primário
+    def choose(self, sticky: bool) -> Optional[Replica]:
+        if not self.replicas:
+            return None
+        self.start()
+        if sticky:
+            reads_total.inc(("primary", "sticky"))
+            return None
+        usable = [replica for replica in self.replicas if replica.usable()]
+        if not usable:
+            reads_total.inc(("primary", "unavailable"))
+            return None
+        replica = usable[next(self._turn) % len(usable)]
+        reads_total.inc((replica.name, "replica"))
+        return replica
+
+    # Tira a réplica do rodízio até a próxima medição bem-sucedida
+    def mark_failed(self, replica: Replica, exc: Exception) -> None:
+        replica.mark_failed(exc)
+        reads_total.inc(("primary", "fallback"))
+
+    # Inicia a thread de monitoramento na primeira leitura
+    def start(self) -> None:
+        if self._monitor is not None:
+            return
+        with self._lock:
+            if self._monitor is None:
+                self._monitor = threading.Thread(target=self._watch, name="replica-monitor", daemon=True)
+                self._monitor.start()
+
+    def _watch(self) -> None:
+        while True:
+            for replica in self.replicas:
+                replica.check()
+            time.sleep(settings.replica_check_interval)
+
+    # Pools com fila das réplicas já criados, no formato de database.engine_pools
+    def pools(self) -> dict:
+        pools = {}
+        for replica in self.replicas:
+            pools.update(replica.engines.pools())
+        return pools
+
+    # Fecha as conexões dos pools das réplicas (saída do worker)
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engines.dispose()
+
+    # Gauges de saúde e atraso de cada réplica e o contador de leituras, em formato Prometheus
+    def render(self) -> list:
+        lines = reads_total.render(READ_LABELS)
+        gauges = {
+            "db_replica_healthy": ("Réplica respondeu à última medição", lambda replica: int(replica.healthy)),
+            "db_replica_usable": ("Réplica está no rodízio de leituras", lambda replica: int(replica.usable())),
+            "db_replica_lag_seconds": ("Atraso medido da réplica (-1 quando desconhecido)", lambda replica: -1 if replica.lag is None else replica.lag),
+            "db_replica_failures_total": ("Leituras refeitas no primário por falha da réplica", lambda replica: replica.failures),
+        }
+        for name, (help_text, value) in gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for replica in self.replicas:
+                lines.append(f"{name}{{{format_labels(REPLICA_LABELS, (replica.name,))}}} {value(replica)}")
+        return lines
+
+# Sessão de leitura (síncrona ou assíncrona, conforme DB_ASYNC) na réplica indicada, ou no primário com None
+def read_session(replica: Optional[Replica]):
+    if settings.db_async:
+        db = AsyncSessionLocal(bind=replica.async_engine) if replica is not None else AsyncSessionLocal()
+    else:
+        db = SessionLocal(bind=replica.engine) if replica is not None else SessionLocal()
+    db.info[REPLICA_KEY] = replica
+    return db
+
+# Réplica em que a sessão foi aberta (None no primário ou em sessões de escrita)
+def session_replica(db) -> Optional[Replica]:
+    return db.info.get(REPLICA_KEY)
+
+# Atraso máximo dos dados lidos pela sessão em relação ao primário, em segundos
+def read_staleness(db) -> float:
+    return replica_router.staleness_window() if session_replica(db) is not None else 0.0
+
+# Erros de conexão ou de execução na réplica (ex: réplica fora do ar, conflito com a recuperação) que justificam refazer no primário
+def is_replica_failure(exc: Exception) -> bool:
+    if isinstance(exc, (OperationalError, InterfaceError, OSError)):
+        return True
+    return isinstance(exc, DBAPIError) and exc.connection_invalidated
+
+# Middleware ASGI que, após uma escrita bem-sucedida, devolve o cookie que mantém as leituras do cliente
+# no primário enquanto as réplicas podem não ter recebido a escrita (leitura das próprias escritas)
+class ReadYourWritesMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        cookie = f"{STICKY_COOKIE}=1; Max-Age={math.ceil(replica_router.staleness_window())}; Path=/; HttpOnly; SameSite=Lax".encode()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie)]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+# Roteador do processo (sem DATABASE_REPLICA_URLS, todas as leituras vão ao primário)
+replica_router = ReplicaRouter(settings.database_replica_urls)
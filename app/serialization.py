@@ -0,0 +1,44 @@
+# __________________
+# Serialização das respostas com TypeAdapters pré-compilados: o retorno dos controladores
+# (objetos ORM, Rows ou dicts) é validado contra o modelo de resposta e convertido em bytes JSON
+# direto no pydantic-core, sem passar pelo jsonable_encoder genérico do FastAPI
+# __________________
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from typing import List, Optional
+from .views.userView import (
+    UserResponse, ProjectItem, ProjectResponse, TaskItem, SearchHit, ProjectStats,
+    MessageResponse, BatchResponse, MemberSyncResponse,
+)
+
+# Serializador de um modelo de resposta (o TypeAdapter é montado uma única vez, na importação)
+class ModelSerializer:
+    def __init__(self, model, exclude_none: bool = False):
+        self.adapter = TypeAdapter(model)
+        self.exclude_none = exclude_none
+
+    # Bytes JSON do valor validado contra o modelo
+    def dump(self, value) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(value, from_attributes=True), exclude_none=self.exclude_none)
+
+    # Valor validado em tipos JSON (dicts e listas), para payloads montados fora das respostas
+    def jsonable(self, value):
+        return self.adapter.dump_python(self.adapter.validate_python(value, from_attributes=True), mode="json", exclude_none=self.exclude_none)
+
+    # Resposta HTTP com o JSON já serializado
+    def response(self, value, headers: Optional[dict] = None) -> Response:
+        return Response(self.dump(value), media_type="application/json", headers=headers)
+
+user_serializer = ModelSerializer(UserResponse)
+user_list_serializer = ModelSerializer(List[UserResponse])
+project_serializer = ModelSerializer(ProjectResponse)
+project_item_serializer = ModelSerializer(ProjectItem)
+task_serializer = ModelSerializer(TaskItem)
+task_list_serializer = ModelSerializer(List[TaskItem])
+search_serializer = ModelSerializer(List[SearchHit])
+stats_serializer = ModelSerializer(ProjectStats)
+stats_list_serializer = ModelSerializer(List[ProjectStats])
+message_serializer = ModelSerializer(MessageResponse)
+batch_serializer = ModelSerializer(BatchResponse, exclude_none=True)
+member_sync_serializer = ModelSerializer(MemberSyncResponse, exclude_none=True)
@@ -0,0 +1,91 @@
+# __________________
+# Conferência dos planos de GET /tasks: para cada combinação de filtros, o plano da consulta montada por
+# app/controllers/taskQueries.py precisa usar o índice previsto na migração 0008, sem percorrer a tabela
+# tasks inteira e sem ordenar as linhas encontradas. Usada por benchmarks/task_query_plans.py e pelos testes
+# __________________
+
+from sqlalchemy import UniqueConstraint, text
+from .controllers.taskQueries import task_filters, tasks_count_query, tasks_page_query
+from .models.userModels import Tasks
+
+# Casos conferidos: nome, consulta e índice esperado. `uses_tasks=False` exige que o plano nem leia a tabela tasks
+def cases(project_id: int, user_id: int, member_id: int):
+    def page(sort="task_number", cursor=None, **filters):
+        return tasks_page_query(task_filters(**filters), sort, cursor, 100, single_project="project_id" in filters)
+
+    return [
+        ("tarefas abertas de um responsável", page(assignee_id=user_id, is_open=True), "ix_tasks_user_number", True),
+        ("estado de um responsável, decrescente com cursor", page("-task_number", "3000.1000000", assignee_id=user_id, states=["done"]), "ix_tasks_user_number", True),
+        ("um estado em todos os projetos", page(states=["open"]), "ix_tasks_state_number", True),
+        ("um estado, decrescente com cursor", page("-task_number", "3000.1000000", states=["in progress"]), "ix_tasks_state_number", True),
+        ("um estado em um projeto", page(project_id=project_id, states=["done"]), "ix_tasks_project_state_number", True),
+        ("um membro em um projeto", page(project_id=project_id, assignee_id=member_id), "ix_tasks_project_user_number", True),
+        ("faixa de task_number em um projeto", page(project_id=project_id, number_min=100, number_max=400), "uq_project_task_number", True),
+        ("total de abertas de um responsável", tasks_count_query(assignee_id=user_id, is_open=True), "ix_project_task_stats_user_state", False),
+        ("total de uma faixa em um projeto", tasks_count_query(project_id=project_id, number_min=100, number_max=400), "uq_project_task_number", True),
+    ]
+
+# No layout particionado (app/partitionTables.py) os planos citam as partições e os índices delas: volta aos nomes da tabela e do índice pai
+def postgres_parents(conn) -> dict:
+    return dict(conn.execute(text(
+        "SELECT child.relname, parent.relname FROM pg_inherits i "
+        "JOIN pg_class child ON child.oid = i.inhrelid JOIN pg_class parent ON parent.oid = i.inhparent"
+    )).all())
+
+# Plano no Postgres: índices usados, tabelas lidas sem índice e se há etapa de ordenação
+def postgres_plan(conn, sql: str) -> dict:
+    plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()
+    parents = postgres_parents(conn)
+    nodes, pending = [], [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending += node.get("Plans", [])
+    name = lambda node, key: parents.get(node[key], node[key])
+    return {
+        "indexes": sorted({name(node, "Index Name") for node in nodes if "Index Name" in node}),
+        "tables": sorted({name(node, "Relation Name") for node in nodes if "Relation Name" in node}),
+        "full_scans": sorted({name(node, "Relation Name") for node in nodes if node["Node Type"] == "Seq Scan"}),
+        "sorts": any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes),
+    }
+
+# No SQLite o índice de uma restrição UNIQUE se chama sqlite_autoindex_<tabela>_<n>: volta ao nome da restrição pelas colunas
+def sqlite_index_name(conn, name: str) -> str:
+    if not name.startswith("sqlite_autoindex_"):
+        return name
+    columns = tuple(row[2] for row in conn.execute(text(f"PRAGMA index_info('{name}')")))
+    for constraint in Tasks.__table__.constraints:
+        if isinstance(constraint, UniqueConstraint) and tuple(constraint.columns.keys()) == columns:
+            return constraint.name
+    return name
+
+# Plano no SQLite (EXPLAIN QUERY PLAN): "SEARCH tasks USING INDEX ..." e "USE TEMP B-TREE FOR ORDER BY"
+def sqlite_plan(conn, sql: str) -> dict:
+    details = [row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql))]
+    words = [detail.split() for detail in details]
+    return {
+        "indexes": sorted({sqlite_index_name(conn, parts[parts.index("INDEX") + 1]) for parts in words if "INDEX" in parts}),
+        "tables": sorted({parts[1] for parts in words if parts[0] in ("SCAN", "SEARCH")}),
+        "full_scans": sorted({parts[1] for parts in words if parts[0] == "SCAN" and "INDEX" not in parts}),
+        "sorts": any("TEMP B-TREE" in detail for detail in details),
+    }
+
+# Confere os planos de todos os casos em um projeto, um responsável e um membro desse projeto; cada entrada
+# do relatório traz o plano, `ok` e os problemas encontrados
+def check(conn, project_id: int, user_id: int, member_id: int) -> list:
+    explain = postgres_plan if conn.dialect.name == 'postgresql' else sqlite_plan
+    report = []
+    for name, stmt, index, uses_tasks in cases(project_id, user_id, member_id):
+        sql = str(stmt.compile(conn, compile_kwargs={"literal_binds": True}))
+        plan = explain(conn, sql)
+        problems = []
+        if index not in plan["indexes"]:
+            problems.append(f"não usa {index}")
+        if plan["full_scans"]:
+            problems.append(f"percorre {', '.join(plan['full_scans'])} inteira")
+        if plan["sorts"] and uses_tasks:
+            problems.append("ordena as linhas")
+        if not uses_tasks and "tasks" in plan["tables"]:
+            problems.append("lê a tabela tasks")
+        report.append({"case": name, "expected_index": index, **plan, "ok": not problems, "problems": problems})
+    return report
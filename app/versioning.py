@@ -0,0 +1,112 @@
+# __________________
+# Versões de linha (coluna version) nas respostas e pré-condições HTTP: ETags fortes,
+# If-None-Match respondido com 304 a partir de consultas só de versões e If-Match (412) nas rotas PUT
+# __________________
+
+import hashlib
+from contextlib import contextmanager
+from typing import Iterable, Optional, Set
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.exc import StaleDataError
+from .models.userModels import Projects, ProjectMembers, Users
+
+# ETag de uma única linha (respostas de POST/PUT e valor do If-Match): a própria versão
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+# Resumo (hash) das tuplas de versões que compõem uma resposta
+def _digest(rows: Iterable[tuple]) -> str:
+    digest = hashlib.blake2b(digest_size=12)
+    for row in rows:
+        digest.update(repr(tuple(row)).encode())
+    return digest.hexdigest()
+
+# ETag de uma listagem a partir de (id, versão) de cada item, na ordem da resposta
+def list_etag(rows: Iterable[tuple]) -> str:
+    return f'"{_digest(rows)}"'
+
+# ETag da listagem já carregada (objetos ORM com id e version)
+def items_etag(items: list) -> str:
+    return list_etag((item.id, item.version) for item in items)
+
+# ETag do detalhe do projeto: versão do projeto seguida do resumo das versões do dono, dos membros e
+# dos usuários membros. O prefixo com a versão permite usar a mesma ETag no If-Match do PUT /projects/{id}
+def project_etag(rows: list) -> str:
+    return f'"{rows[0][0]}.{_digest(rows)}"'
+
+# Consulta só de versões do detalhe do projeto: uma linha por membro (ou uma só, sem membros), em ordem de user_id
+def project_versions_query(project_id: int):
+    owner = aliased(Users)
+    member_user = aliased(Users)
+    return (
+        select(Projects.version, owner.version, ProjectMembers.user_id, ProjectMembers.version, member_user.version)
+        .select_from(Projects)
+        .outerjoin(owner, owner.id == Projects.owner_id)
+        .outerjoin(ProjectMembers, ProjectMembers.project_id == Projects.id)
+        .outerjoin(member_user, member_user.id == ProjectMembers.user_id)
+        .where(Projects.id == project_id)
+        .order_by(ProjectMembers.user_id)
+    )
+
+# As mesmas tuplas de project_versions_query a partir do projeto já carregado (members vem ordenado por user_id)
+def project_version_rows(db_project: Projects) -> list:
+    owner_version = db_project.owner.version if db_project.owner is not None else None
+    if not db_project.members:
+        return [(db_project.version, owner_version, None, None, None)]
+    return [
+        (db_project.version, owner_version, member.user_id, member.version, member.user.version)
+        for member in db_project.members
+    ]
+
+# O If-None-Match casa com a ETag? (comparação fraca: aceita W/, listas separadas por vírgula e *)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+# Resposta 304 sem corpo, repetindo a ETag
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
+
+# Versões aceitas pelo If-Match: None sem o cabeçalho (ou com *), senão as versões das ETags informadas.
+# ETags fracas ou em outro formato não casam com nenhuma versão
+def if_match_versions(if_match: Optional[str]) -> Optional[Set[int]]:
+    if if_match is None:
+        return None
+    versions = set()
+    for tag in if_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return None
+        if len(tag) >= 2 and tag[0] == tag[-1] == '"':
+            version = tag[1:-1].split(".", 1)[0]
+            if version.isdigit():
+                versions.add(int(version))
+    return versions
+
+# Critério extra dos UPDATEs diretos quando há If-Match
+def version_criteria(model, expected: Optional[Set[int]]) -> tuple:
+    return () if expected is None else (model.version.in_(expected),)
+
+def precondition_failed() -> HTTPException:
+    return HTTPException(status_code=412, detail="A versão atual não corresponde ao If-Match")
+
+# Falha o If-Match quando a versão lida não é uma das esperadas
+def check_version(version: int, expected: Optional[Set[int]]) -> None:
+    if expected is not None and version not in expected:
+        raise precondition_failed()
+
+# Flush das escritas pelo ORM (UPDATE e DELETE). Com version_id_col, o ORM inclui a versão lida no WHERE e levanta
+# StaleDataError quando a linha mudou ou foi removida por outra requisição entre a leitura e a escrita: vira 412
+# com If-Match (`expected`), senão 409. O flush dentro do bloco leva o erro para antes do commit, onde viraria um 500
+@contextmanager
+def stale_writes(expected: Optional[Set[int]] = None):
+    try:
+        yield
+    except StaleDataError:
+        if expected is not None:
+            raise precondition_failed()
+        raise HTTPException(status_code=409, detail="Registro alterado por outra requisição; tente novamente")
@@ -0,0 +1,172 @@
+# __________________
+# Modelos Pydantic para validação dos dados recebidos nas requisições
+# Garantem que os dados estejam corretos antes de serem processados
+# __________________
+
+from pydantic import BaseModel
+from typing import Dict, List, Optional
+from datetime import datetime
+
+# Modelo base para usuário
+class UserBase(BaseModel):
+    name: str
+    email: str
+
+# Modelo para criação de usuário
+class UserCreate(UserBase):
+    pass
+
+# Modelo para atualização parcial de usuário
+class UserUpdate(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+# Modelo de resposta para usuário
+class UserResponse(UserBase):
+    id: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+# Modelo base para projeto
+class ProjectBase(BaseModel):
+    name: str
+    description: Optional[str] = None
+    owner_id: int
+
+# Modelo para criação de projeto
+class ProjectCreate(ProjectBase):
+    pass
+
+# Modelo para atualização parcial de projeto
+class ProjectUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+# Modelo de resposta para projeto sem relacionamentos (criação e atualização)
+class ProjectItem(ProjectBase):
+    id: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+# Modelo para adicionar membro ao projeto
+class ProjectMemberCreate(BaseModel):
+    user_id: int
+    role: str = "sem funcao"
+
+# Modelo para atualização parcial de membro do projeto
+class ProjectMemberUpdate(BaseModel):
+    role: Optional[str] = None
+
+# Modelo de resposta para membro do projeto
+class ProjectMemberResponse(BaseModel):
+    user: UserResponse
+    role: str
+    joined_at: datetime
+    version: int
+
+    class Config:
+        from_attributes = True
+
+# Modelo de resposta para projeto
+class ProjectResponse(ProjectBase):
+    id: int
+    version: int
+    owner: UserResponse
+    members: List[ProjectMemberResponse]
+
+    class Config:
+        from_attributes = True
+
+# Modelo base para tarefa
+class TaskBase(BaseModel):
+    name: str
+    description: str
+    state: str
+    user_id: int
+    project_id: int
+
+# Modelo para criação de tarefa
+class TaskCreate(TaskBase):
+    pass
+
+# Modelo para atualização parcial de tarefa
+class TaskUpdate(BaseModel):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    state: Optional[str] = None
+    user_id: Optional[int] = None
+
+# Modelo de resposta para tarefa nas listagens (sem relacionamentos aninhados)
+class TaskItem(TaskBase):
+    id: int
+    task_number: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+# Modelo de resposta para tarefa
+class TaskResponse(TaskBase):
+    id: int
+    user: UserResponse
+    project: ProjectResponse
+    task_number: int
+
+    class Config:
+        from_attributes = True
+
+# Resultado da busca textual: uma tarefa ou um projeto, com a relevância calculada pelo banco.
+# user_id é o responsável da tarefa ou o dono do projeto; task_number e state só existem em tarefas
+class SearchHit(BaseModel):
+    kind: str  # "task" ou "project"
+    id: int
+    project_id: int
+    task_number: Optional[int] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    state: Optional[str] = None
+    user_id: Optional[int] = None
+    rank: float
+
+    class Config:
+        from_attributes = True
+
+# Carga de um membro no projeto: tarefas atribuídas, abertas e contagem por estado
+class MemberWorkload(BaseModel):
+    user_id: int
+    total: int
+    open: int
+    by_state: Dict[str, int]
+
+# Estatísticas de um projeto lidas da tabela de resumo project_task_stats.
+# Tarefas sem estado aparecem em by_state com a chave ""; membros em ordem de tarefas abertas
+class ProjectStats(BaseModel):
+    project_id: int
+    total: int
+    open: int
+    by_state: Dict[str, int]
+    members: List[MemberWorkload]
+
+# Resposta das rotas que apenas confirmam a operação
+class MessageResponse(BaseModel):
+    message: str
+
+# Resultado de um item de uma operação em lote
+class BatchItemResult(BaseModel):
+    index: int
+    status: str  # "created", "updated" ou "error"
+    id: Optional[int] = None
+    task_number: Optional[int] = None
+    detail: Optional[str] = None
+
+# Resposta das rotas em lote, com um resultado por item na ordem recebida
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+
+# Resposta da sincronização de membros, incluindo os usuários removidos do projeto
+class MemberSyncResponse(BatchResponse):
+    removed: List[int]
@@ -0,0 +1,93 @@
+# __________________
+# Micro-benchmark do custo de serialização por rota, sem banco: monta objetos ORM em memória
+# (projeto com N membros e lista de N tarefas) e compara, por chamada,
+#   - jsonable_encoder:  caminho antigo do FastAPI para rotas sem response_model
+#   - response_model:    validação + serialização do FastAPI + JSONResponse
+#   - TypeAdapter:       ModelSerializer de app/serialization.py (bytes JSON direto do pydantic-core)
+#
+# Uso:
+#   python benchmarks/serialization.py --sizes 10 1000 10000
+# __________________
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.userModels import Users, Projects, ProjectMembers, Tasks
+from app.serialization import project_serializer, task_list_serializer
+from app.views.userView import ProjectResponse, TaskItem
+
+# Projeto com `size` membros, com dono e usuários carregados (como o joinedload do controlador)
+def build_project(size: int) -> Projects:
+    owner = Users(id=1, name="dono", email="dono@example.com")
+    project = Projects(id=1, name="projeto", description="benchmark", owner_id=1, task_counter=0)
+    project.owner = owner
+    project.members = [
+        ProjectMembers(project_id=1, user_id=i, role="dev", joined_at=datetime(2025, 1, 1),
+                       user=Users(id=i, name=f"usuário {i}", email=f"u{i}@example.com"))
+        for i in range(2, size + 2)
+    ]
+    return project
+
+# Lista de `size` tarefas sem relacionamentos carregados (como a listagem paginada)
+def build_tasks(size: int) -> list:
+    return [
+        Tasks(id=i, task_number=i, project_id=1, user_id=1, name=f"tarefa {i}", description="benchmark", state="open")
+        for i in range(1, size + 1)
+    ]
+
+# Mediana do tempo de `func` em milissegundos
+def measure(func, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000
+
+def legacy_encoder(value):
+    return JSONResponse(jsonable_encoder(value)).body
+
+loop = asyncio.new_event_loop()
+
+def fastapi_response_model(field, value):
+    content = loop.run_until_complete(serialize_response(field=field, response_content=value))
+    return JSONResponse(content).body
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    routes = {
+        "GET /projects/{id}": (build_project, ProjectResponse, project_serializer),
+        "GET /projects/{id}/tasks/": (build_tasks, List[TaskItem], task_list_serializer),
+    }
+    print(f"{'rota':<28}{'itens':>8}{'jsonable_encoder':>20}{'response_model':>18}{'TypeAdapter':>16}  (ms por chamada)")
+    for route, (build, model, serializer) in routes.items():
+        field = create_model_field(name="Response", type_=model, mode="serialization")
+        for size in args.sizes:
+            value = build(size)
+            try:
+                legacy = f"{measure(lambda: legacy_encoder(value), args.repeat):.2f}"
+            except RecursionError:  # o encoder genérico segue os relacionamentos em ciclo (projeto <-> membros)
+                legacy = "recursão"
+            declared = measure(lambda: fastapi_response_model(field, value), args.repeat)
+            adapter = measure(lambda: serializer.dump(value), args.repeat)
+            print(f"{route:<28}{size:>8}{legacy:>20}{declared:>18.2f}{adapter:>16.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# __________________
+# Ambiente do Alembic: usa a URL de app.config e os modelos de app.models como alvo do autogenerate
+# __________________
+
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.config import settings
+from app.database import Base
+from app.models import userModels  # registra as tabelas em Base.metadata
+from app.partitionTables import is_partition
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+# Objetos do índice de busca textual (migração 0005) e partições do layout particionado (app/partitionTables.py),
+# que não existem nos modelos
+def include_object(obj, name, type_, reflected, compare_to):
+    if reflected and compare_to is None:
+        if type_ == 'table' and is_partition(name):
+            return False
+        if type_ == 'column' and name == userModels.SEARCH_COLUMN:
+            return False
+        if type_ == 'index' and name.endswith(f'_{userModels.SEARCH_COLUMN}'):
+            return False
+        if type_ == 'table' and name.startswith(userModels.SEARCH_TABLES):
+            return False
+    return True
+
+# Gera o SQL sem conectar ao banco (alembic upgrade head --sql)
+def run_migrations_offline():
+    context.configure(
+        url=settings.database_url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=True,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations(connection):
+    context.configure(connection=connection, target_metadata=target_metadata, render_as_batch=True, include_object=include_object)
+    with context.begin_transaction():
+        context.run_migrations()
+
+# Aplica as migrações conectado ao banco de DATABASE_URL, ou na conexão recebida de app/migrate.py
+def run_migrations_online():
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        run_migrations(connection)
+        return
+    connectable = create_engine(settings.database_url, poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        run_migrations(connection)
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,74 @@
+"""Esquema inicial, como criado por Base.metadata.create_all antes das migrações
+
+Bancos já existentes devem ser marcados com `alembic stamp 0001` antes do primeiro upgrade.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('email', sa.String(), nullable=True),
+    )
+    op.create_index('ix_users_id', 'users', ['id'])
+    op.create_index('ix_users_name', 'users', ['name'])
+    op.create_index('ix_users_email', 'users', ['email'])
+
+    op.create_table(
+        'projects',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String()),
+        sa.Column('description', sa.String()),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.id', name='projects_owner_id_fkey')),
+    )
+    op.create_index('ix_projects_id', 'projects', ['id'])
+    op.create_index('ix_projects_name', 'projects', ['name'])
+    op.create_index('ix_projects_description', 'projects', ['description'])
+
+    op.create_table(
+        'project_users',
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', name='project_users_project_id_fkey'), primary_key=True),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', name='project_users_user_id_fkey'), primary_key=True),
+        sa.Column('joined_at', sa.DateTime()),
+        sa.Column('role', sa.String()),
+    )
+    op.create_index('ix_project_users_joined_at', 'project_users', ['joined_at'])
+    op.create_index('ix_project_users_role', 'project_users', ['role'])
+
+    op.create_table(
+        'tasks',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('task_number', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), sa.ForeignKey('projects.id', name='tasks_project_id_fkey')),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', name='tasks_user_id_fkey')),
+        sa.Column('name', sa.String()),
+        sa.Column('description', sa.String()),
+        sa.Column('state', sa.String()),
+        sa.UniqueConstraint('project_id', 'task_number', name='uq_project_task_number'),
+    )
+    op.create_index('ix_tasks_id', 'tasks', ['id'])
+    op.create_index('ix_tasks_project_id', 'tasks', ['project_id'])
+    op.create_index('ix_tasks_user_id', 'tasks', ['user_id'])
+    op.create_index('ix_tasks_name', 'tasks', ['name'])
+    op.create_index('ix_tasks_description', 'tasks', ['description'])
+    op.create_index('ix_tasks_state', 'tasks', ['state'])
+
+
+def downgrade():
+    op.drop_table('tasks')
+    op.drop_table('project_users')
+    op.drop_table('projects')
+    op.drop_table('users')
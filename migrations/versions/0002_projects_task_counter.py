@@ -0,0 +1,30 @@
+"""Contador de task_number por projeto (projects.task_counter)
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.add_column(sa.Column('task_counter', sa.Integer(), nullable=False, server_default='0'))
+
+    # Continua a numeração a partir da maior tarefa já existente em cada projeto
+    op.execute(
+        "UPDATE projects SET task_counter = COALESCE("
+        "(SELECT max(tasks.task_number) FROM tasks WHERE tasks.project_id = projects.id), 0)"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('projects') as batch_op:
+        batch_op.drop_column('task_counter')
@@ -0,0 +1,68 @@
+"""Chaves estrangeiras com ON DELETE CASCADE e índices nas colunas filhas usadas pelo cascade
+
+No Postgres as constraints são recriadas como NOT VALID e validadas depois do commit,
+evitando manter um lock exclusivo durante a varredura das tabelas; os índices são criados
+com CONCURRENTLY. No SQLite as tabelas são recriadas pelo modo batch do Alembic.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+from app.database import NAMING_CONVENTION
+
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+# (tabela, coluna, tabela referenciada)
+FOREIGN_KEYS = [
+    ('projects', 'owner_id', 'users'),
+    ('project_users', 'project_id', 'projects'),
+    ('project_users', 'user_id', 'users'),
+    ('tasks', 'project_id', 'projects'),
+    ('tasks', 'user_id', 'users'),
+]
+
+# Índices que o cascade ao apagar usuários precisa e que o esquema inicial não tinha
+CASCADE_INDEXES = [
+    ('ix_projects_owner_id', 'projects', 'owner_id'),
+    ('ix_project_users_user_id', 'project_users', 'user_id'),
+]
+
+
+def replace_foreign_keys(ondelete):
+    if op.get_bind().dialect.name == 'postgresql':
+        for table, column, referent in FOREIGN_KEYS:
+            name = f'{table}_{column}_fkey'
+            op.drop_constraint(name, table, type_='foreignkey')
+            op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete, postgresql_not_valid=True)
+        with op.get_context().autocommit_block():
+            for table, column, _ in FOREIGN_KEYS:
+                op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_{column}_fkey')
+        return
+
+    for table in dict.fromkeys(table for table, _, _ in FOREIGN_KEYS):
+        with op.batch_alter_table(table, recreate='always', naming_convention=NAMING_CONVENTION) as batch_op:
+            for fk_table, column, referent in FOREIGN_KEYS:
+                if fk_table == table:
+                    name = f'{table}_{column}_fkey'
+                    batch_op.drop_constraint(name, type_='foreignkey')
+                    batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    replace_foreign_keys('CASCADE')
+    with op.get_context().autocommit_block():
+        for name, table, column in CASCADE_INDEXES:
+            op.create_index(name, table, [column], postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in CASCADE_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    replace_foreign_keys(None)
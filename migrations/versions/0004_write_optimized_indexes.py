@@ -0,0 +1,55 @@
+"""Plano de índices derivado das consultas dos controladores
+
+Remove os índices B-tree sobre colunas de texto livre e colunas que nenhuma consulta filtra
+(eles só custavam escrita e espaço), o índice redundante sobre cada chave primária e o de
+tasks.project_id (coberto por uq_project_task_number). Cria o índice composto usado por
+update_task/delete_task e pela listagem de tarefas de um membro.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# (índice, tabela, colunas)
+UNUSED_INDEXES = [
+    ('ix_users_id', 'users', ['id']),
+    ('ix_users_name', 'users', ['name']),
+    ('ix_users_email', 'users', ['email']),
+    ('ix_projects_id', 'projects', ['id']),
+    ('ix_projects_name', 'projects', ['name']),
+    ('ix_projects_description', 'projects', ['description']),
+    ('ix_project_users_joined_at', 'project_users', ['joined_at']),
+    ('ix_project_users_role', 'project_users', ['role']),
+    ('ix_tasks_id', 'tasks', ['id']),
+    ('ix_tasks_project_id', 'tasks', ['project_id']),
+    ('ix_tasks_name', 'tasks', ['name']),
+    ('ix_tasks_description', 'tasks', ['description']),
+    ('ix_tasks_state', 'tasks', ['state']),
+]
+
+NEW_INDEXES = [
+    ('ix_tasks_project_user_number', 'tasks', ['project_id', 'user_id', 'task_number']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in UNUSED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in UNUSED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,82 @@
+"""Índice de busca textual sobre nome e descrição de tarefas e projetos
+
+No Postgres cada tabela ganha a coluna gerada search_vector (tsvector, nome com peso A e
+descrição com peso B), mantida pelo próprio banco a cada escrita, e um índice GIN criado com
+CONCURRENTLY. No SQLite são criadas tabelas FTS5 de conteúdo externo (tasks_fts, projects_fts)
+mantidas por triggers.
+
+Atenção (SQLite): recriar tasks ou projects em modo batch descarta os triggers; uma migração
+que faça isso precisa recriá-los (create_sqlite_index abaixo).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+from app.models.userModels import SEARCH_COLUMN, SEARCH_CONFIG
+
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+TABLES = ['tasks', 'projects']
+
+
+def create_postgres_index(table):
+    op.execute(
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {SEARCH_COLUMN} tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')) STORED"
+    )
+
+
+def create_sqlite_index(table):
+    fts = f'{table}_fts'
+    op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(name, description, content='{table}', content_rowid='id')")
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF name, description ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+        f"INSERT INTO {fts}(rowid, name, description) VALUES (new.id, new.name, new.description); END"
+    )
+    # Indexa as linhas já existentes
+    op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in TABLES:
+            create_postgres_index(table)
+        with op.get_context().autocommit_block():
+            for table in TABLES:
+                op.create_index(f'ix_{table}_{SEARCH_COLUMN}', table, [SEARCH_COLUMN], postgresql_using='gin',
+                                postgresql_concurrently=True, if_not_exists=True)
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            create_sqlite_index(table)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table in TABLES:
+                op.drop_index(f'ix_{table}_{SEARCH_COLUMN}', table_name=table, postgresql_concurrently=True, if_exists=True)
+        for table in TABLES:
+            op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS {SEARCH_COLUMN}")
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_{trigger}")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
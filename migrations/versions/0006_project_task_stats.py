@@ -0,0 +1,38 @@
+"""Resumo de tarefas por projeto, responsável e estado (project_task_stats)
+
+A tabela é preenchida a partir das tarefas existentes; a partir daí os controladores de
+tarefas mantêm as contagens na mesma transação de cada escrita.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'project_task_stats',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('state', sa.String(), nullable=False),
+        sa.Column('task_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], name='project_task_stats_project_id_fkey', ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('project_id', 'user_id', 'state', name='project_task_stats_pkey'),
+    )
+    op.execute(
+        "INSERT INTO project_task_stats (project_id, user_id, state, task_count) "
+        "SELECT project_id, COALESCE(user_id, 0), COALESCE(state, ''), count(*) FROM tasks "
+        "GROUP BY project_id, COALESCE(user_id, 0), COALESCE(state, '')"
+    )
+
+
+def downgrade():
+    op.drop_table('project_task_stats')
@@ -0,0 +1,33 @@
+"""Contador de versão (version) em usuários, projetos, membros e tarefas
+
+Cada escrita incrementa a versão da linha (version_id_col do ORM e os UPDATEs diretos);
+as linhas existentes começam na versão 1. As colunas são adicionadas com ALTER TABLE, sem
+recriar as tabelas no SQLite, para preservar os triggers da busca textual (migração 0005).
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+TABLES = ['users', 'projects', 'project_users', 'tasks']
+
+
+def upgrade():
+    for table in TABLES:
+        op.add_column(table, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for table in TABLES:
+        if op.get_bind().dialect.name == 'sqlite':
+            op.execute(f"ALTER TABLE {table} DROP COLUMN version")
+        else:
+            op.drop_column(table, 'version')
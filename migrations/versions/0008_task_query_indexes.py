@@ -0,0 +1,46 @@
+"""Índices compostos das consultas de GET /tasks
+
+Cria os índices que atendem aos filtros por responsável, por estado e por estado dentro de um
+projeto já na ordem de (task_number, id), e o índice por responsável do resumo project_task_stats
+(totais por responsável e remoção das linhas de um usuário). ix_tasks_user_id fica coberto pelo
+prefixo de ix_tasks_user_number e é removido.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+# (índice, tabela, colunas)
+NEW_INDEXES = [
+    ('ix_tasks_user_number', 'tasks', ['user_id', 'task_number', 'id']),
+    ('ix_tasks_state_number', 'tasks', ['state', 'task_number', 'id']),
+    ('ix_tasks_project_state_number', 'tasks', ['project_id', 'state', 'task_number']),
+    ('ix_project_task_stats_user_state', 'project_task_stats', ['user_id', 'state']),
+]
+
+REPLACED_INDEXES = [
+    ('ix_tasks_user_id', 'tasks', ['user_id']),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REPLACED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in REPLACED_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,75 @@
+"""tasks.project_id obrigatório
+
+Toda tarefa pertence a um projeto (as rotas de escrita são aninhadas em /projects/{project_id}), e o
+layout particionado por project_id (app/partitionTables.py) exige a coluna na chave primária. No
+Postgres a verificação roda em um CHECK NOT VALID confirmado antes e validado fora da transação da
+migração, sem travar escritas durante a leitura da tabela; o SET NOT NULL seguinte aproveita o CHECK
+validado e não lê a tabela de novo. Falha se houver tarefas sem projeto. No SQLite a tabela é recriada
+em modo batch e os triggers da busca textual (migração 0005) são recriados.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+import importlib.util
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+CHECK_NAME = 'ck_tasks_project_id_not_null'
+
+
+# Funções da migração 0005 (o diretório de versões não é um pacote importável)
+def full_text_search_migration():
+    path = os.path.join(os.path.dirname(__file__), '0005_full_text_search.py')
+    spec = importlib.util.spec_from_file_location('full_text_search_0005', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def project_id_nullable():
+    columns = sa.inspect(op.get_bind()).get_columns('tasks')
+    return next(column['nullable'] for column in columns if column['name'] == 'project_id')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if not project_id_nullable():
+        return
+    if dialect == 'postgresql':
+        # Uma execução anterior que falhou na validação pode ter deixado o CHECK confirmado
+        op.execute(f"ALTER TABLE tasks DROP CONSTRAINT IF EXISTS {CHECK_NAME}")
+        op.execute(f"ALTER TABLE tasks ADD CONSTRAINT {CHECK_NAME} CHECK (project_id IS NOT NULL) NOT VALID")
+        # O bloco confirma o CHECK NOT VALID antes (liberando o ACCESS EXCLUSIVE), e cada passo seguinte é sua própria
+        # transação: o VALIDATE lê a tabela com SHARE UPDATE EXCLUSIVE, que não bloqueia escritas
+        with op.get_context().autocommit_block():
+            op.execute(f"ALTER TABLE tasks VALIDATE CONSTRAINT {CHECK_NAME}")
+            op.alter_column('tasks', 'project_id', nullable=False)
+            op.drop_constraint(CHECK_NAME, 'tasks', type_='check')
+    elif dialect == 'sqlite':
+        with op.batch_alter_table('tasks', recreate='always') as batch:
+            batch.alter_column('project_id', existing_type=sa.Integer(), nullable=False)
+        full_text_search_migration().create_sqlite_index('tasks')
+    else:
+        op.alter_column('tasks', 'project_id', existing_type=sa.Integer(), nullable=False)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # Sem efeito no layout particionado, em que project_id faz parte da chave primária
+        op.execute("ALTER TABLE tasks ALTER COLUMN project_id DROP NOT NULL")
+    elif dialect == 'sqlite':
+        with op.batch_alter_table('tasks', recreate='always') as batch:
+            batch.alter_column('project_id', existing_type=sa.Integer(), nullable=True)
+        full_text_search_migration().create_sqlite_index('tasks')
+    else:
+        op.alter_column('tasks', 'project_id', existing_type=sa.Integer(), nullable=True)
@@ -0,0 +1,66 @@
+# __________________
+# Configuração dos testes: banco SQLite descartável, migrado com app.migrate antes do primeiro teste,
+# e cliente da API em modo síncrono (DB_ASYNC=false), sem depender de um Postgres
+#
+# Uso:
+#   pip install -r tests/requirements.txt && python -m pytest -q
+# __________________
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# As configurações são lidas na importação de app.config: o banco dos testes precisa estar no ambiente antes dela
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(prefix="tasks-tests-"), "tests.db")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DATABASE_PATH}",
+    "DATABASE_REPLICA_URLS": "[]",
+    "DB_ASYNC": "false",
+    "FAST_WRITES": "false",
+    "TASK_UPDATE_COALESCING": "false",
+    "EVENTS_BACKEND": "memory",
+})
+
+import itertools
+import pytest
+from fastapi.testclient import TestClient
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app
+from app.migrate import migrate
+
+unique = itertools.count(1)
+
+@pytest.fixture(scope="session")
+def client():
+    migrate()
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+# Os controladores leem FAST_WRITES a cada chamada: os testes parametrizados passam pelos dois caminhos de escrita
+@pytest.fixture(params=[False, True], ids=["orm", "fast_writes"])
+def fast_writes(request, monkeypatch):
+    monkeypatch.setattr(settings, "fast_writes", request.param)
+    return request.param
+
+# Usuário novo com um projeto próprio, do qual já é membro; devolve (user_id, project_id)
+@pytest.fixture(scope="session")
+def make_project(client):
+    def make(user_id=None):
+        if user_id is None:
+            n = next(unique)
+            user_id = client.post("/users/", json={"name": f"teste {n}", "email": f"teste{n}@example.com"}).json()["id"]
+        project = client.post("/projects/", json={"name": "teste", "description": "teste", "owner_id": user_id})
+        assert project.status_code == 200, project.text
+        project_id = project.json()["id"]
+        member = client.post(f"/projects/{project_id}/members/", json={"user_id": user_id})
+        assert member.status_code == 200, member.text
+        return user_id, project_id
+    return make
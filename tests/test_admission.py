@@ -0,0 +1,103 @@
+# __________________
+# Controle de admissão (app/admission.py) com capacidade 1: a vaga ocupada faz as requisições esperarem na fila,
+# quem passa do prazo ou encontra a fila cheia recebe 503 com Retry-After e, quando a vaga é liberada, escritas e
+# leituras passam na frente das leituras em massa
+# __________________
+
+import asyncio
+
+import httpx
+import pytest
+import app.admission as admission_module
+from app.admission import build_controller
+from app.config import settings
+from app.main import app
+
+READ_TIMEOUT = 0.1
+WRITE_TIMEOUT = 5.0
+
+@pytest.fixture
+def controller(monkeypatch):
+    for name, value in {
+        "admission_capacity": 1, "admission_write_limit": 1, "admission_read_limit": 1, "admission_bulk_limit": 1,
+        "admission_queue_timeout": READ_TIMEOUT, "admission_write_queue_timeout": WRITE_TIMEOUT,
+        "admission_max_queue": 1, "admission_retry_after": 7,
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    controller = build_controller()
+    monkeypatch.setattr(admission_module, "admission", controller)
+    return controller
+
+def api_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://admission")
+
+def assert_overloaded(response) -> None:
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "7"
+    assert response.json()["detail"] == "Servidor sobrecarregado; tente novamente"
+
+# Com a vaga ocupada, a leitura na fila desiste no prazo dela; a escrita, com prazo maior, fica com a vaga liberada
+def test_queued_read_times_out_while_write_gets_the_slot(client, controller):
+    async def run():
+        async with api_client() as http:
+            assert await controller.acquire("read")
+            read = asyncio.create_task(http.get("/users/", params={"limit": 1}))
+            await asyncio.sleep(0.01)
+            write = asyncio.create_task(http.post("/users/", json={"name": "admissão", "email": "admissao@example.com"}))
+            read_response = await read
+            assert controller.queues["write"]
+            controller.release("read")
+            return read_response, await write
+
+    read_response, write_response = asyncio.run(run())
+    assert_overloaded(read_response)
+    assert write_response.status_code == 200, write_response.text
+    assert controller.active == {"write": 0, "read": 0, "bulk": 0}
+
+def test_full_queue_rejects_immediately(client, controller):
+    async def run():
+        async with api_client() as http:
+            assert await controller.acquire("write")
+            waiting = asyncio.create_task(http.post("/users/", json={"name": "fila", "email": "fila@example.com"}))
+            await asyncio.sleep(0.01)
+            rejected = await http.post("/users/", json={"name": "fila cheia", "email": "fila.cheia@example.com"})
+            controller.release("write")
+            return rejected, await waiting
+
+    rejected, waiting = asyncio.run(run())
+    assert_overloaded(rejected)
+    assert waiting.status_code == 200
+
+# Rotas de observabilidade não passam pelo controle, mesmo com a vaga ocupada
+def test_metrics_are_exempt(client, controller):
+    async def run():
+        async with api_client() as http:
+            assert await controller.acquire("read")
+            return await http.get("/metrics")
+
+    assert asyncio.run(run()).status_code == 200
+
+# Na liberação da vaga, a leitura em massa mais antiga espera escritas e leituras que chegaram depois dela
+def test_bulk_reads_go_last(controller, monkeypatch):
+    monkeypatch.setattr(controller, "max_queue", 10)
+    monkeypatch.setattr(controller, "timeouts", {"write": WRITE_TIMEOUT, "read": WRITE_TIMEOUT, "bulk": WRITE_TIMEOUT})
+
+    async def run():
+        order = []
+
+        async def request(cls):
+            assert await controller.acquire(cls)
+            order.append(cls)
+            await asyncio.sleep(0)
+            controller.release(cls)
+
+        assert await controller.acquire("read")
+        waiting = []
+        for cls in ("bulk", "read", "write"):
+            waiting.append(asyncio.create_task(request(cls)))
+            await asyncio.sleep(0.001)
+        controller.release("read")
+        await asyncio.gather(*waiting)
+        return order
+
+    assert asyncio.run(run()) == ["read", "write", "bulk"]
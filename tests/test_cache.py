@@ -0,0 +1,110 @@
+# __________________
+# Cache de leitura (app/cache.py): TTL, limites de entradas e de bytes, invalidação por chave e por tag e a marca
+# que descarta o preenchimento com dados lidos antes de uma invalidação. Pela API, as escritas em membros e
+# usuários tiram do cache o detalhe dos projetos afetados
+# __________________
+
+import time
+
+import pytest
+from app.cache import CacheBackend, LRUCache, project_cache, project_key
+
+def cache(max_entries: int = 100, max_bytes: int = 1_000, ttl: float = 60.0) -> LRUCache:
+    return LRUCache(max_entries, max_bytes, ttl)
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+def test_hit_and_miss():
+    lru = cache()
+    assert lru.get("a") is None
+    lru.set("a", b"1")
+    assert lru.get("a") == b"1"
+    assert (lru.stats()["hits"], lru.stats()["misses"], lru.stats()["entries"], lru.stats()["bytes"]) == (1, 1, 1, 1)
+
+def test_ttl():
+    lru = cache(ttl=0.05)
+    lru.set("a", b"1")
+    time.sleep(0.1)
+    assert lru.get("a") is None
+    assert lru.stats()["expirations"] == 1
+    assert lru.stats()["entries"] == 0
+
+def test_evicts_least_recently_used_entry():
+    lru = cache(max_entries=2)
+    lru.set("a", b"1")
+    lru.set("b", b"2")
+    assert lru.get("a") == b"1"
+    lru.set("c", b"3")
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (b"1", None, b"3")
+    assert lru.stats()["evictions"] == 1
+
+def test_evicts_by_size():
+    lru = cache(max_bytes=10)
+    lru.set("a", b"123456")
+    lru.set("b", b"654321")
+    assert (lru.get("a"), lru.get("b")) == (None, b"654321")
+    assert lru.stats()["bytes"] == 6
+    # Um valor maior que o limite inteiro nem entra
+    lru.set("c", b"x" * 11)
+    assert lru.get("c") is None
+    assert lru.get("b") == b"654321"
+
+def test_replacing_a_key_keeps_byte_count():
+    lru = cache()
+    lru.set("a", b"1234", tags=["t"])
+    lru.set("a", b"12", tags=["u"])
+    assert lru.stats()["bytes"] == 2
+    lru.delete_tags("t")
+    assert lru.get("a") == b"12"
+
+def test_delete_and_tags():
+    lru = cache()
+    lru.set("k1", b"1", tags=["user:1"])
+    lru.set("k2", b"2", tags=["user:1", "user:2"])
+    lru.set("k3", b"3", tags=["user:2"])
+    lru.delete_tags("user:1")
+    assert (lru.get("k1"), lru.get("k2"), lru.get("k3")) == (None, None, b"3")
+    lru.delete("k3", "inexistente")
+    assert lru.get("k3") is None
+    assert lru.stats()["invalidations"] == 3
+    # A tag removida não guarda referências a chaves apagadas
+    lru.set("k1", b"1", tags=["user:1"])
+    lru.delete_tags("user:2")
+    assert lru.get("k1") == b"1"
+
+# Dados lidos antes de uma invalidação (since anterior a ela) não voltam ao cache; lidos depois, voltam
+@pytest.mark.parametrize("invalidate", [lambda lru: lru.delete("k"), lambda lru: lru.delete_tags("user:1")], ids=["key", "tag"])
+def test_fence_blocks_stale_fill(invalidate):
+    lru = cache()
+    read_at = time.monotonic()
+    time.sleep(0.001)
+    invalidate(lru)
+    lru.set("k", b"antigo", tags=["user:1"], since=read_at)
+    assert lru.get("k") is None
+    assert lru.stats()["stale_fills"] == 1
+
+    time.sleep(0.001)
+    lru.set("k", b"novo", tags=["user:1"], since=time.monotonic())
+    assert lru.get("k") == b"novo"
+
+# Detalhe do projeto no cache depois de um GET, e fora dele depois da escrita
+def assert_invalidates(client, project_id: int, write) -> None:
+    assert client.get(f"/projects/{project_id}").status_code == 200
+    assert project_cache.get(project_key(project_id)) is not None
+    response = write()
+    assert response.status_code == 200, response.text
+    assert project_cache.get(project_key(project_id)) is None
+
+def test_member_and_user_writes_invalidate_project(client, make_project, fast_writes):
+    owner_id, project_id = make_project()
+    other_id, _ = make_project()
+    assert_invalidates(client, project_id, lambda: client.post(f"/projects/{project_id}/members/", json={"user_id": other_id}))
+    assert_invalidates(client, project_id, lambda: client.put(f"/projects/{project_id}/members/{other_id}", json={"role": "qa"}))
+    # Usuário membro (tag do usuário) e dono do projeto
+    assert_invalidates(client, project_id, lambda: client.put(f"/users/{other_id}", json={"name": f"membro {fast_writes}"}))
+    assert_invalidates(client, project_id, lambda: client.put(f"/users/{owner_id}", json={"name": f"dono {fast_writes}"}))
+    assert client.get(f"/projects/{project_id}").json()["owner"]["name"] == f"dono {fast_writes}"
+    assert_invalidates(client, project_id, lambda: client.delete(f"/projects/{project_id}/members/{other_id}"))
+    assert other_id not in [member["user"]["id"] for member in client.get(f"/projects/{project_id}").json()["members"]]
@@ -0,0 +1,168 @@
+# __________________
+# Feed de mudanças (app/events.py) com o backend em memória: as escritas pela API chegam a GET /projects/{id}/events,
+# o Last-Event-ID retoma logo depois do último evento recebido e um assinante que não acompanha perde o excedente do
+# buffer (evento overflow) sem segurar quem publica. O feed não termina sozinho, então os testes chamam o app ASGI
+# direto, leem o corpo mensagem a mensagem e desconectam no fim
+# __________________
+
+import asyncio
+
+import httpx
+import orjson
+from app.events import ChangeEvent, event_bus
+from app.main import app
+
+# Prazo para cada mensagem do feed
+TIMEOUT = 5.0
+
+# Uma conexão ao feed do projeto; as mensagens chegam em `messages` (None quando o servidor encerra o corpo)
+class Feed:
+    def __init__(self, project_id: int, last_event_id: str = None):
+        headers = [(b"host", b"events")]
+        if last_event_id is not None:
+            headers.append((b"last-event-id", last_event_id.encode()))
+        path = f"/projects/{project_id}/events"
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+            "path": path, "raw_path": path.encode(), "root_path": "", "query_string": b"", "headers": headers,
+            "client": ("testclient", 50000), "server": ("events", 80),
+        }
+        self.status = None
+        self.messages = asyncio.Queue()
+        self._requested = False
+        self._disconnected = asyncio.Event()
+        self._task = asyncio.create_task(app(scope, self._receive, self._send))
+
+    async def _receive(self) -> dict:
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self._disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message: dict) -> None:
+        if message["type"] == "http.response.start":
+            self.status = message["status"]
+        elif message["type"] == "http.response.body":
+            if message.get("body"):
+                await self.messages.put(message["body"].decode())
+            if not message.get("more_body", False):
+                await self.messages.put(None)
+
+    # Próximos `count` eventos (mensagens com `event:`), como dicionários com os campos do SSE
+    async def events(self, count: int) -> list:
+        events = []
+        while len(events) < count:
+            message = await asyncio.wait_for(self.messages.get(), TIMEOUT)
+            assert message is not None, f"feed encerrado depois de {events}"
+            fields = dict(line.split(": ", 1) for line in message.strip().splitlines() if not line.startswith(":"))
+            if "event" in fields:
+                events.append(fields)
+        return events
+
+    # Espera o servidor encerrar o corpo
+    async def ended(self) -> None:
+        while await asyncio.wait_for(self.messages.get(), TIMEOUT) is not None:
+            pass
+
+    async def close(self) -> None:
+        self._disconnected.set()
+        await asyncio.wait_for(self._task, TIMEOUT)
+
+def api_client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://events")
+
+def new_task(user_id: int, project_id: int, name: str) -> dict:
+    return {"name": name, "description": "feed", "state": "open", "user_id": user_id, "project_id": project_id}
+
+def test_task_mutation_reaches_feed(client, make_project):
+    user_id, project_id = make_project()
+    other_user_id, other_project_id = make_project()
+
+    async def run():
+        async with api_client() as http:
+            feed = Feed(project_id)
+            # Mensagem inicial (retry): a assinatura já está registrada
+            assert await asyncio.wait_for(feed.messages.get(), TIMEOUT) == "retry: 3000\n\n"
+            assert feed.status == 200
+            # Escrita em outro projeto não chega a este feed
+            response = await http.post(f"/projects/{other_project_id}/tasks/", json=new_task(other_user_id, other_project_id, "outro"))
+            assert response.status_code == 200, response.text
+            created = await http.post(f"/projects/{project_id}/tasks/", json=new_task(user_id, project_id, "nova"))
+            assert created.status_code == 200, created.text
+            task_number = created.json()["task_number"]
+            updated = await http.put(f"/projects/{project_id}/members/{user_id}/tasks/{task_number}", json={"state": "done"})
+            assert updated.status_code == 200, updated.text
+            events = await feed.events(2)
+            await feed.close()
+            return task_number, events
+
+    task_number, events = asyncio.run(run())
+    assert [event["event"] for event in events] == ["task.created", "task.updated"]
+    created, updated = (orjson.loads(event["data"]) for event in events)
+    assert (created["task_number"], created["name"]) == (task_number, "nova")
+    assert (updated["task_number"], updated["state"]) == (task_number, "done")
+    assert events[0]["id"] != events[1]["id"]
+    assert event_bus.stats()["subscribers"] == 0
+
+def test_last_event_id_resumes_after_that_event(client, make_project):
+    user_id, project_id = make_project()
+    other_user_id, other_project_id = make_project()
+
+    async def run():
+        async with api_client() as http:
+            feed = Feed(project_id)
+            await asyncio.wait_for(feed.messages.get(), TIMEOUT)
+            for name in ("primeira", "segunda", "terceira"):
+                response = await http.post(f"/projects/{project_id}/tasks/", json=new_task(user_id, project_id, name))
+                assert response.status_code == 200, response.text
+                # Eventos de outro projeto entre eles ficam fora da retomada
+                response = await http.post(f"/projects/{other_project_id}/tasks/", json=new_task(other_user_id, other_project_id, name))
+                assert response.status_code == 200, response.text
+            received = await feed.events(3)
+            await feed.close()
+
+            # Reconexão depois do primeiro evento: recebe só os dois seguintes, na ordem
+            resumed = Feed(project_id, last_event_id=received[0]["id"])
+            backlog = await resumed.events(2)
+            await resumed.close()
+
+            # Id fora do histórico: o cliente é avisado para recarregar o estado
+            unknown = Feed(project_id, last_event_id="desconhecido-1")
+            reset = await unknown.events(1)
+            await unknown.close()
+            return received, backlog, reset
+
+    received, backlog, reset = asyncio.run(run())
+    assert [event["id"] for event in backlog] == [event["id"] for event in received[1:]]
+    assert [orjson.loads(event["data"])["name"] for event in backlog] == ["segunda", "terceira"]
+    assert reset == [{"event": "reset", "data": "{}"}]
+
+# Buffer de 2 eventos: cinco entregas seguidas não esperam pelo cliente; o feed envia o que coube, avisa com
+# overflow e termina, e o cliente retoma o restante pelo Last-Event-ID
+def test_bounded_buffer_drops_instead_of_blocking(client, make_project, monkeypatch):
+    _, project_id = make_project()
+    monkeypatch.setattr(event_bus, "buffer_size", 2)
+
+    async def run():
+        feed = Feed(project_id)
+        await asyncio.wait_for(feed.messages.get(), TIMEOUT)
+        overflows = event_bus.stats()["overflows"]
+        changes = [ChangeEvent(event_bus.new_id(), project_id, "task.updated", {"task_number": n}) for n in range(5)]
+        # Todas no mesmo passo do event loop, sem o feed ler nada entre elas
+        for change in changes:
+            event_bus.deliver(change)
+        received = await feed.events(3)
+        await feed.ended()
+        await feed.close()
+
+        resumed = Feed(project_id, last_event_id=received[1]["id"])
+        backlog = await resumed.events(3)
+        await resumed.close()
+        return changes, received, backlog, event_bus.stats()["overflows"] - overflows
+
+    changes, received, backlog, overflows = asyncio.run(run())
+    assert [event["id"] for event in received[:2]] == [change.id for change in changes[:2]]
+    assert received[2] == {"event": "overflow", "data": "{}"}
+    assert overflows == 1
+    assert [event["id"] for event in backlog] == [change.id for change in changes[2:]]
@@ -0,0 +1,133 @@
+# __________________
+# Leituras em réplicas (app/replicas.py) com dois bancos locais: o SQLite dos testes como primário e cópias dele
+# como réplicas. Como DATABASE_REPLICA_URLS é lida na importação do app, cada teste troca o replica_router do
+# processo por um roteador sobre as cópias e envolve o app com o ReadYourWritesMiddleware, como faz app/main.py
+# quando há réplicas configuradas. O que é gravado no primário depois da cópia só aparece nas leituras do primário
+# __________________
+
+import itertools
+import sqlite3
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.engine import make_url
+import app.main
+import app.replicas
+from app.config import settings
+from app.main import app as application
+from app.replicas import STICKY_COOKIE, ReadYourWritesMiddleware, ReplicaRouter
+
+# Intervalo da thread de monitoramento nos testes: depois da primeira medição ela não volta a mexer nas réplicas
+CHECK_INTERVAL = 60.0
+
+emails = (f"replica{n}@example.com" for n in itertools.count())
+
+# Cópia consistente do banco primário (backup do SQLite)
+def copy_primary(path) -> str:
+    source = sqlite3.connect(make_url(settings.database_url).database)
+    target = sqlite3.connect(path)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+    return f"sqlite:///{path}"
+
+# Roteador com `count` réplicas copiadas do primário agora, já medidas pela thread de monitoramento,
+# e cliente da API com o cookie de leitura das próprias escritas
+@pytest.fixture
+def replicas(client, tmp_path, monkeypatch):
+    def build(count: int, prepare=None):
+        urls = []
+        for index in range(count):
+            path = tmp_path / f"replica{index}.db"
+            urls.append(copy_primary(path))
+            if prepare is not None:
+                with sqlite3.connect(path) as conn:
+                    prepare(conn)
+        monkeypatch.setattr(settings, "replica_check_interval", CHECK_INTERVAL)
+        router = ReplicaRouter(urls)
+        monkeypatch.setattr(app.main, "replica_router", router)
+        monkeypatch.setattr(app.replicas, "replica_router", router)
+        router.start()
+        deadline = time.monotonic() + 10
+        while not all(replica.checked_at for replica in router.replicas):
+            assert time.monotonic() < deadline, "réplicas não medidas"
+            time.sleep(0.01)
+        return router, TestClient(ReadYourWritesMiddleware(application))
+    return build
+
+def new_user(client) -> int:
+    response = client.post("/users/", json={"name": "réplica", "email": next(emails)})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+# Ids dos usuários a partir de user_id no banco que atendeu a leitura
+def users_from(reader, user_id: int) -> list:
+    response = reader.get("/users/", params={"after_id": user_id - 1})
+    assert response.status_code == 200, response.text
+    return [user["id"] for user in response.json()]
+
+def reads(client) -> dict:
+    values = {}
+    for line in client.get("/metrics").text.splitlines():
+        if line.startswith("db_reads_total{"):
+            labels, value = line[len("db_reads_total{"):].split("} ")
+            target, reason = (part.split("=")[1].strip('"') for part in labels.split(","))
+            values[(target, reason)] = float(value)
+    return values
+
+def delta(before: dict, after: dict) -> dict:
+    return {key: after[key] - before.get(key, 0) for key in after if after[key] != before.get(key, 0)}
+
+def test_reads_use_replicas_in_turn(client, replicas):
+    router, reader = replicas(2)
+    user_id = new_user(client)
+    before = reads(client)
+    # Réplicas copiadas antes do usuário: nenhuma leitura o encontra
+    assert [users_from(reader, user_id) for _ in range(4)] == [[]] * 4
+    assert delta(before, reads(client)) == {("replica0", "replica"): 2, ("replica1", "replica"): 2}
+
+def test_write_keeps_reads_on_primary(client, replicas):
+    router, reader = replicas(1)
+    before = reads(client)
+    response = reader.post("/users/", json={"name": "réplica", "email": next(emails)})
+    assert response.status_code == 200
+    assert STICKY_COOKIE in response.cookies
+    user_id = response.json()["id"]
+    # Com o cookie a leitura vai ao primário e já vê a própria escrita
+    assert users_from(reader, user_id) == [user_id]
+    reader.cookies.clear()
+    assert users_from(reader, user_id) == []
+    assert delta(before, reads(client)) == {("primary", "sticky"): 1, ("replica0", "replica"): 1}
+
+    # Escritas que falham não prendem o cliente ao primário
+    response = reader.put("/users/999999999", json={"name": "ninguém"})
+    assert response.status_code == 404
+    assert STICKY_COOKIE not in response.cookies
+
+def test_unusable_replicas_fall_back_to_primary(client, replicas, monkeypatch):
+    router, reader = replicas(2)
+    user_id = new_user(client)
+    # Atraso máximo negativo: nenhuma réplica fica utilizável
+    monkeypatch.setattr(settings, "replica_max_lag", -1.0)
+    assert not any(replica.usable() for replica in router.replicas)
+    before = reads(client)
+    assert users_from(reader, user_id) == [user_id]
+    assert delta(before, reads(client)) == {("primary", "unavailable"): 1}
+
+def test_replica_failure_retries_on_primary(client, replicas):
+    # Réplica sem a tabela users: a leitura falha com OperationalError e é refeita no primário
+    router, reader = replicas(1, prepare=lambda conn: conn.execute("DROP TABLE users"))
+    replica = router.replicas[0]
+    assert replica.usable()
+    user_id = new_user(client)
+    before = reads(client)
+    assert users_from(reader, user_id) == [user_id]
+    assert delta(before, reads(client)) == {("replica0", "replica"): 1, ("primary", "fallback"): 1}
+    assert replica.failures == 1
+    assert not replica.usable()
+
+    # Fora do rodízio até a próxima medição: a leitura seguinte já vai direto ao primário
+    assert users_from(reader, user_id) == [user_id]
+    assert delta(before, reads(client))[("primary", "unavailable")] == 1
@@ -0,0 +1,150 @@
+# __________________
+# Agrupamento das atualizações de tarefa (TASK_UPDATE_COALESCING, app/coalescing.py e
+# app/controllers/taskCoalescing.py): PUTs simultâneos pela API, no mesmo event loop, entram no mesmo lote;
+# escritas na mesma tarefa vão em lotes separados, uma atualização que falha não derruba as outras do lote
+# e o resumo project_task_stats continua igual à contagem das tarefas
+# __________________
+
+import asyncio
+
+import httpx
+import pytest
+from app.coalescing import WriteCoalescer
+from app.config import settings
+from app.database import SessionLocal
+from app.main import app, task_update_coalescer
+from app.reconcileStats import find_drift
+
+# Janela larga o bastante para que os PUTs disparados juntos cheguem ao mesmo lote
+WINDOW = 0.2
+
+@pytest.fixture
+def coalescing(monkeypatch):
+    monkeypatch.setattr(settings, "task_update_coalescing", True)
+    monkeypatch.setattr(task_update_coalescer, "window", WINDOW)
+
+# Projeto com `count` tarefas abertas de um membro; devolve (projeto, membro, outro membro, tarefas)
+@pytest.fixture
+def project_tasks(client, make_project):
+    def make(count: int):
+        user_id, project_id = make_project()
+        other_id, _ = make_project()
+        assert client.post(f"/projects/{project_id}/members/", json={"user_id": other_id}).status_code == 200
+        task = {"name": "lote", "description": "teste", "state": "open", "user_id": user_id, "project_id": project_id}
+        response = client.post(f"/projects/{project_id}/tasks:batch", json=[task] * count)
+        assert response.status_code == 200, response.text
+        tasks = client.get(f"/projects/{project_id}/tasks/").json()
+        return project_id, user_id, other_id, tasks
+    return make
+
+# PUTs disparados juntos; cada um é (url, corpo, cabeçalhos). Respostas na mesma ordem
+def concurrent_puts(requests: list) -> list:
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://coalescing") as client:
+            return await asyncio.gather(*(client.put(url, json=body, headers=headers) for url, body, headers in requests))
+    return asyncio.run(run())
+
+def task_url(project_id: int, member_id: int, task_number: int) -> str:
+    return f"/projects/{project_id}/members/{member_id}/tasks/{task_number}"
+
+# (lotes, itens) aplicados até agora pelo agrupador das atualizações de tarefa
+def coalescer_totals(client) -> tuple:
+    values = {}
+    for line in client.get("/metrics").text.splitlines():
+        for name in ("write_coalescer_batches_total", "write_coalescer_items_total"):
+            if line.startswith(f'{name}{{coalescer="task_update"}} '):
+                values[name] = float(line.split()[-1])
+    return values.get("write_coalescer_batches_total", 0), values.get("write_coalescer_items_total", 0)
+
+def assert_no_drift(project_id: int) -> None:
+    with SessionLocal() as db:
+        assert find_drift(db, [project_id]) == {}
+
+def test_concurrent_if_match_one_wins(client, coalescing, project_tasks):
+    project_id, user_id, _, tasks = project_tasks(1)
+    task = tasks[0]
+    url = task_url(project_id, user_id, task["task_number"])
+    if_match = {"If-Match": f'"{task["version"]}"'}
+    responses = concurrent_puts([(url, {"state": "doing"}, if_match), (url, {"state": "done"}, if_match)])
+    assert sorted(response.status_code for response in responses) == [200, 412]
+    winner = next(response for response in responses if response.status_code == 200)
+    assert winner.json()["version"] == task["version"] + 1
+    assert winner.headers["ETag"] == f'"{task["version"] + 1}"'
+    assert_no_drift(project_id)
+
+def test_same_task_goes_in_separate_batches(client, coalescing, project_tasks):
+    project_id, user_id, _, tasks = project_tasks(3)
+    repeated, others = tasks[0], tasks[1:]
+    requests = [(task_url(project_id, user_id, repeated["task_number"]), {"state": f"s{i}"}, {}) for i in range(4)]
+    requests += [(task_url(project_id, user_id, task["task_number"]), {"state": "done"}, {}) for task in others]
+    batches, items = coalescer_totals(client)
+    responses = concurrent_puts(requests)
+    assert [response.status_code for response in responses] == [200] * len(requests)
+
+    # Cada escrita na tarefa repetida viu a anterior: versões seguidas, sem atualização perdida
+    versions = sorted(response.json()["version"] for response in responses[:4])
+    assert versions == [repeated["version"] + i for i in range(1, 5)]
+    last = max(responses[:4], key=lambda response: response.json()["version"])
+    current = client.get("/tasks", params={"project_id": project_id, "task_number_min": repeated["task_number"],
+                                           "task_number_max": repeated["task_number"]}).json()[0]
+    assert (current["state"], current["version"]) == (last.json()["state"], last.json()["version"])
+
+    after_batches, after_items = coalescer_totals(client)
+    assert after_items - items == len(requests)
+    assert after_batches - batches >= 4
+    assert_no_drift(project_id)
+
+def test_failed_update_fails_alone(client, coalescing, project_tasks):
+    project_id, user_id, other_id, tasks = project_tasks(5)
+    requests = [
+        (task_url(project_id, user_id, tasks[0]["task_number"]), {"state": "done"}, {}),
+        (task_url(project_id, user_id, tasks[1]["task_number"]), {"state": "doing"}, {}),
+        (task_url(project_id, user_id, tasks[2]["task_number"]), {"user_id": other_id, "state": "review"}, {}),
+        (task_url(project_id, user_id, tasks[3]["task_number"]), {"name": "versão antiga"}, {"If-Match": '"999"'}),
+        (task_url(project_id, user_id, 999_999), {"state": "done"}, {}),
+        (task_url(project_id, user_id, tasks[4]["task_number"]), {}, {}),
+    ]
+    batches, items = coalescer_totals(client)
+    responses = concurrent_puts(requests)
+    assert [response.status_code for response in responses] == [200, 200, 200, 412, 404, 200]
+    assert responses[4].json()["detail"] == "Tarefa não encontrada"
+    assert responses[2].json()["user_id"] == other_id
+    # Sem campos a alterar a tarefa volta como está, sem nova versão
+    assert responses[5].json()["version"] == tasks[4]["version"]
+    # Tudo em um único lote
+    assert coalescer_totals(client) == (batches + 1, items + len(requests))
+    assert_no_drift(project_id)
+
+# O agrupador em si, com um flush que registra os lotes: chaves repetidas vão para lotes seguintes,
+# na ordem de chegada, e uma exceção devolvida pelo flush vale só para o próprio item
+def test_write_coalescer_splits_duplicate_keys():
+    batches = []
+
+    async def flush(items):
+        batches.append(items)
+        return [ValueError(item) if item == "falha" else item.upper() for item in items]
+
+    async def run():
+        coalescer = WriteCoalescer("teste", flush, window=0.01, max_batch=10)
+        submits = [("a", "a1"), ("b", "b1"), ("a", "a2"), ("c", "falha"), ("a", "a3"), ("b", "b2")]
+        return await asyncio.gather(*(coalescer.submit(key, item) for key, item in submits), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert batches == [["a1", "b1", "falha"], ["a2", "b2"], ["a3"]]
+    assert results[:3] == ["A1", "B1", "A2"] and results[4:] == ["A3", "B2"]
+    assert isinstance(results[3], ValueError)
+
+def test_write_coalescer_flushes_full_batches_without_waiting():
+    batches = []
+
+    async def flush(items):
+        batches.append(items)
+        return items
+
+    async def run():
+        # Janela longa: só o max_batch dispara os lotes a tempo
+        coalescer = WriteCoalescer("teste", flush, window=60, max_batch=2)
+        return await asyncio.wait_for(asyncio.gather(*(coalescer.submit(key, key) for key in "abcd")), 5)
+
+    assert asyncio.run(run()) == list("abcd")
+    assert batches == [["a", "b"], ["c", "d"]]
@@ -0,0 +1,78 @@
+# __________________
+# Alocação de task_number (Projects.task_counter), como benchmarks/task_number_stress.py em escala menor:
+# criações pela API, lotes e blocos reservados em paralelo terminam com cada projeto numerado 1..N,
+# sem lacunas nem números repetidos
+# __________________
+
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.main import taskController
+from app.models.userModels import Tasks
+
+TASKS = 30
+BATCHES = 4
+BATCH_SIZE = 5
+BLOCKS = 6
+BLOCK_SIZE = 3
+
+def task_body(user_id: int, project_id: int) -> dict:
+    return {"name": "contador", "description": "teste", "state": "open", "user_id": user_id, "project_id": project_id}
+
+# Reserva um bloco e confirma a transação
+def reserve_block(project_id: int, count: int) -> range:
+    with SessionLocal() as db:
+        block = taskController.allocate_task_numbers(project_id, count, db)
+        db.commit()
+        return block
+
+def test_task_numbers_without_gaps_or_duplicates(client, db, make_project, fast_writes):
+    user_id, first = make_project()
+    _, second = make_project(user_id)
+    project_ids = (first, second)
+    blocks = defaultdict(list)
+
+    def create_task(project_id):
+        response = client.post(f"/projects/{project_id}/tasks/", json=task_body(user_id, project_id))
+        assert response.status_code == 200, response.text
+
+    def create_batch(project_id):
+        response = client.post(f"/projects/{project_id}/tasks:batch", json=[task_body(user_id, project_id)] * BATCH_SIZE)
+        assert response.status_code == 200, response.text
+        assert [item["status"] for item in response.json()["results"]] == ["created"] * BATCH_SIZE
+
+    def create_block(project_id):
+        blocks[project_id].append(reserve_block(project_id, BLOCK_SIZE))
+
+    jobs = [(create_task, project_id) for project_id in project_ids for _ in range(TASKS)]
+    jobs += [(create_batch, project_id) for project_id in project_ids for _ in range(BATCHES)]
+    jobs += [(create_block, project_id) for project_id in project_ids for _ in range(BLOCKS)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        for future in [pool.submit(job, project_id) for job, project_id in jobs]:
+            future.result()
+
+    rows = db.execute(select(Tasks.project_id, Tasks.task_number).where(Tasks.project_id.in_(project_ids))).all()
+    numbers = defaultdict(list)
+    for project_id, task_number in rows:
+        numbers[project_id].append(task_number)
+    expected = TASKS + BATCHES * BATCH_SIZE + BLOCKS * BLOCK_SIZE
+    for project_id in project_ids:
+        taken = numbers[project_id] + [n for block in blocks[project_id] for n in block]
+        assert sorted(taken) == list(range(1, expected + 1))
+
+# Um rollback devolve o bloco reservado: o próximo recebe os mesmos números
+def test_rolled_back_block_is_reused(client, make_project):
+    _, project_id = make_project()
+    with SessionLocal() as db:
+        first = taskController.allocate_task_numbers(project_id, 4, db)
+        db.rollback()
+    assert reserve_block(project_id, 4) == first
+
+def test_allocate_in_missing_project(client):
+    with SessionLocal() as db, pytest.raises(HTTPException) as error:
+        taskController.allocate_task_numbers(10**9, 1, db)
+    assert error.value.status_code == 404
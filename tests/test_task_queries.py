@@ -0,0 +1,125 @@
+# __________________
+# GET /tasks: paginação por cursor (X-Next-Cursor) em todas as ordenações, cursores inválidos
+# e total (count=true, X-Total-Count) igual ao COUNT(*) das tarefas com os mesmos filtros
+# __________________
+
+import pytest
+from sqlalchemy import func, select
+from app.controllers.taskQueries import SORTS, task_filters
+from app.models.userModels import Tasks
+
+STATES = ["open", "doing", "done", ""]
+
+# Tarefas de um responsável em dois projetos, com os estados em rodízio; devolve (user_id, projetos, tarefas)
+@pytest.fixture
+def assignee_tasks(client, make_project):
+    user_id, first = make_project()
+    _, second = make_project(user_id)
+    tasks = []
+    for i in range(23):
+        project_id = (first, second)[i % 2]
+        response = client.post(f"/projects/{project_id}/tasks/", json={
+            "name": f"tarefa {i}", "description": "teste", "state": STATES[i % len(STATES)],
+            "user_id": user_id, "project_id": project_id,
+        })
+        assert response.status_code == 200, response.text
+        tasks.append(response.json())
+    return user_id, (first, second), tasks
+
+# Segue X-Next-Cursor até a última página, devolvendo os ids na ordem recebida
+def walk(client, params: dict, limit: int) -> list:
+    ids, cursor = [], None
+    while True:
+        response = client.get("/tasks", params={**params, "limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        page = response.json()
+        # Uma tarefa repetida indica cursor que não avança (e um laço sem fim)
+        assert not {task["id"] for task in page} & set(ids), "cursor não avança"
+        ids += [task["id"] for task in page]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert len(page) < limit
+            return ids
+
+def expected_order(tasks: list, sort: str) -> list:
+    column, descending = SORTS[sort]
+    key = (lambda task: task["id"]) if column is Tasks.id else (lambda task: (task["task_number"], task["id"]))
+    return [task["id"] for task in sorted(tasks, key=key, reverse=descending)]
+
+@pytest.mark.parametrize("sort", list(SORTS))
+@pytest.mark.parametrize("limit", [1, 5, 23, 100])
+def test_cursor_round_trip(client, assignee_tasks, sort, limit):
+    user_id, projects, tasks = assignee_tasks
+    assert walk(client, {"assignee_id": user_id, "sort": sort}, limit) == expected_order(tasks, sort)
+    # Um projeto só: task_number é único no projeto e o cursor continua trazendo o id
+    in_project = [task for task in tasks if task["project_id"] == projects[1]]
+    assert walk(client, {"project_id": projects[1], "sort": sort}, limit) == expected_order(in_project, sort)
+
+def test_cursor_with_filters(client, assignee_tasks):
+    user_id, _, tasks = assignee_tasks
+    params = {"assignee_id": user_id, "state": ["open", "done"], "task_number_min": 3, "sort": "-task_number"}
+    expected = [task for task in tasks if task["state"] in ("open", "done") and task["task_number"] >= 3]
+    assert walk(client, params, 4) == expected_order(expected, "-task_number")
+
+@pytest.mark.parametrize("sort, cursor", [
+    ("task_number", "abc"),
+    ("task_number", "7"),
+    ("task_number", "7.x"),
+    ("task_number", "1.2.3"),
+    ("-task_number", "-1.2"),
+    ("id", "7.8"),
+    ("-id", ""),
+    ("id", "1e3"),
+])
+def test_invalid_cursor(client, sort, cursor):
+    response = client.get("/tasks", params={"sort": sort, "cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cursor inválido para esta ordenação"
+
+# Combinações de filtros do total: as que somam project_task_stats e as que contam as tarefas (faixa de task_number,
+# estado vazio, sem responsável)
+def count_filters(user_id: int, projects: tuple) -> list:
+    return [
+        {},
+        {"project_id": projects[0]},
+        {"assignee_id": user_id},
+        {"project_id": projects[1], "assignee_id": user_id},
+        {"assignee_id": user_id, "state": ["doing"]},
+        {"assignee_id": user_id, "state": ["open", "done", "s3"]},
+        {"project_id": projects[0], "open": True},
+        {"project_id": projects[0], "open": False},
+        {"assignee_id": user_id, "task_number_min": 2, "task_number_max": 7},
+        {"project_id": projects[1], "state": [""]},
+        {"project_id": projects[0], "assignee_id": 0},
+    ]
+
+def database_count(db, params: dict) -> int:
+    criteria = task_filters(params.get("project_id"), params.get("assignee_id"), params.get("state"), params.get("open"),
+                            params.get("task_number_min"), params.get("task_number_max"))
+    return db.scalar(select(func.count()).select_from(Tasks).where(*criteria))
+
+def assert_totals(client, db, user_id: int, projects: tuple) -> None:
+    for params in count_filters(user_id, projects):
+        response = client.get("/tasks", params={**params, "count": "true", "limit": 1})
+        assert response.status_code == 200, response.text
+        assert int(response.headers["X-Total-Count"]) == database_count(db, params), params
+
+# O resumo por projeto, responsável e estado acompanha criações, mudanças de estado e de responsável e remoções
+def test_total_count_matches_count(client, db, assignee_tasks, make_project, fast_writes):
+    user_id, projects, tasks = assignee_tasks
+    other_id, _ = make_project()
+    for project_id in projects:
+        assert client.post(f"/projects/{project_id}/members/", json={"user_id": other_id}).status_code == 200
+    assert_totals(client, db, user_id, projects)
+
+    for i, task in enumerate(tasks[:12]):
+        change = {"state": ("s3", "done", "", "open")[i % 4]} if i % 3 else {"user_id": other_id}
+        response = client.put(f"/projects/{task['project_id']}/members/{task['user_id']}/tasks/{task['task_number']}", json=change)
+        assert response.status_code == 200, response.text
+    for task in tasks[12:18]:
+        response = client.delete(f"/projects/{task['project_id']}/members/{task['user_id']}/tasks/{task['task_number']}")
+        assert response.status_code == 200, response.text
+    assert_totals(client, db, user_id, projects)
+
+    # Sem o parâmetro count o total não é calculado
+    assert "X-Total-Count" not in client.get("/tasks", params={"assignee_id": user_id}).headers
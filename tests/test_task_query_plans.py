@@ -0,0 +1,51 @@
+# __________________
+# Planos de GET /tasks (app/taskQueryPlans.py) no SQLite dos testes: com alguns milhares de tarefas e estatísticas
+# atualizadas (ANALYZE), cada combinação de filtros usa o índice previsto, sem percorrer nem ordenar a tabela tasks
+# __________________
+
+import pytest
+from sqlalchemy import text
+from app.database import get_engine
+from app.taskQueryPlans import check, sqlite_plan
+
+PROJECTS = 4
+MEMBERS = 20
+TASKS_PER_PROJECT = 1_000
+STATES = ["open", "in progress", "review", "done"]
+
+# Projetos com membros e tarefas espalhadas entre eles e entre os estados (MEMBERS responsáveis, como em
+# benchmarks/seed.py, para que um responsável tenha bem menos tarefas que um estado); devolve (projeto, responsável, membro)
+@pytest.fixture(scope="module")
+def seeded(client, make_project):
+    owner_id, _ = make_project()
+    members = [make_project()[0] for _ in range(MEMBERS)]
+    projects = []
+    for _ in range(PROJECTS):
+        _, project_id = make_project(owner_id)
+        for user_id in members:
+            assert client.post(f"/projects/{project_id}/members/", json={"user_id": user_id}).status_code == 200
+        tasks = [
+            {"name": f"plano {i}", "description": "teste", "state": STATES[i % len(STATES)],
+             "user_id": members[i % MEMBERS], "project_id": project_id}
+            for i in range(TASKS_PER_PROJECT)
+        ]
+        response = client.post(f"/projects/{project_id}/tasks:batch", json=tasks)
+        assert response.status_code == 200, response.text
+        projects.append(project_id)
+    return projects[0], members[0], members[1]
+
+def test_task_query_plans(seeded):
+    project_id, user_id, member_id = seeded
+    # As estatísticas são carregadas por conexão: o ANALYZE vai na mesma conexão que confere os planos
+    with get_engine().connect() as conn:
+        conn.execute(text("ANALYZE"))
+        report = check(conn, project_id, user_id, member_id)
+    assert len(report) == 9
+    assert [(entry["case"], entry["indexes"], entry["problems"]) for entry in report if not entry["ok"]] == []
+
+# A leitura do plano reconhece tanto o uso de índice quanto a varredura e a ordenação que o teste acima proíbe
+def test_sqlite_plan_reports_scans_and_sorts(seeded):
+    with get_engine().connect() as conn:
+        plan = sqlite_plan(conn, "SELECT * FROM tasks WHERE description = 'teste' ORDER BY name")
+    assert plan["full_scans"] == ["tasks"]
+    assert plan["sorts"]
@@ -0,0 +1,94 @@
+# __________________
+# Versões de linha (app/versioning.py) pela API: ETag e If-None-Match (304) no detalhe do projeto, If-Match (412)
+# nas rotas PUT e escritas pelo ORM que encontram a linha já alterada por outra requisição (409, ou 412 com If-Match)
+# __________________
+
+import pytest
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+from app.database import get_engine
+
+# Durante o teste, outra "requisição" altera a linha logo antes do flush das escritas pendentes da sessão
+@pytest.fixture
+def concurrent_change():
+    def bump(session, flush_context, instances):
+        for obj in list(session.deleted) + list(session.dirty):
+            state = inspect(obj)
+            criteria = [column == value for column, value in zip(state.mapper.primary_key, state.identity)]
+            with get_engine().begin() as conn:
+                conn.execute(update(type(obj)).where(*criteria).values(version=type(obj).version + 1))
+
+    event.listen(Session, "before_flush", bump)
+    yield
+    event.remove(Session, "before_flush", bump)
+
+@pytest.fixture
+def project(client, make_project):
+    user_id, project_id = make_project()
+    task = {"name": "versão", "description": "teste", "state": "open", "user_id": user_id, "project_id": project_id}
+    response = client.post(f"/projects/{project_id}/tasks/", json=task)
+    assert response.status_code == 200, response.text
+    return user_id, project_id, response.json()["task_number"]
+
+def test_project_not_modified(client, project, make_project):
+    user_id, project_id, _ = project
+    response = client.get(f"/projects/{project_id}")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"outra", {etag}', "*"):
+        response = client.get(f"/projects/{project_id}", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304, if_none_match
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+    assert client.get(f"/projects/{project_id}", headers={"If-None-Match": '"outra"'}).status_code == 200
+
+    # Um novo membro muda a ETag: a antiga volta a receber o detalhe completo
+    other_id, _ = make_project()
+    assert client.post(f"/projects/{project_id}/members/", json={"user_id": other_id}).status_code == 200
+    response = client.get(f"/projects/{project_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+@pytest.mark.parametrize("route", ["project", "user", "member", "task"])
+def test_stale_if_match(client, project, fast_writes, route):
+    user_id, project_id, task_number = project
+    url, body = {
+        "project": (f"/projects/{project_id}", lambda n: {"name": f"nome {n}"}),
+        "user": (f"/users/{user_id}", lambda n: {"name": f"nome {n}"}),
+        "member": (f"/projects/{project_id}/members/{user_id}", lambda n: {"role": f"papel {n}"}),
+        "task": (f"/projects/{project_id}/members/{user_id}/tasks/{task_number}", lambda n: {"state": f"estado {n}"}),
+    }[route]
+    response = client.put(url, json=body(0), headers={"If-Match": '"999"'})
+    assert response.status_code == 412
+    assert response.json()["detail"] == "A versão atual não corresponde ao If-Match"
+    assert client.put(url, json=body(1), headers={"If-Match": "*"}).status_code == 200
+    if route == "member":
+        return
+
+    # A ETag devolvida pela escrita é o If-Match da próxima; depois dela, a mesma ETag já está vencida
+    etag = client.put(url, json=body(2)).headers["ETag"]
+    assert client.put(url, json=body(3), headers={"If-Match": etag}).status_code == 200
+    assert client.put(url, json=body(4), headers={"If-Match": etag}).status_code == 412
+
+# Caminho pelo ORM (sem FAST_WRITES): a linha muda entre a leitura e o flush do DELETE
+@pytest.mark.parametrize("route", ["task", "member", "project", "user"])
+def test_stale_orm_delete(client, project, concurrent_change, route):
+    user_id, project_id, task_number = project
+    url = {
+        "task": f"/projects/{project_id}/members/{user_id}/tasks/{task_number}",
+        "member": f"/projects/{project_id}/members/{user_id}",
+        "project": f"/projects/{project_id}",
+        "user": f"/users/{user_id}",
+    }[route]
+    response = client.delete(url)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Registro alterado por outra requisição; tente novamente"
+
+# O mesmo no UPDATE pelo ORM: 409 sem If-Match e 412 quando o If-Match casava com a versão lida
+def test_stale_orm_update(client, project, concurrent_change):
+    user_id, _, _ = project
+    assert client.put(f"/users/{user_id}", json={"name": "novo nome"}).status_code == 409
+    version = client.get("/users/", params={"after_id": user_id - 1, "limit": 1}).json()[0]["version"]
+    response = client.put(f"/users/{user_id}", json={"name": "novo nome"}, headers={"If-Match": f'"{version}"'})
+    assert response.status_code == 412